@@ -0,0 +1,117 @@
+import click
+from src.utils.migrations import upgrade_database, migration_status
+from src.utils.query_plans import check_query_plans
+from src.utils.drop_simulation import simulate_drops
+from src.utils.pet_sampler import BOX_PROBABILITIES
+from src.utils.json_benchmark import benchmark_serialization
+from src.utils.user_export import export_lines, import_history, HistoryImportError
+from src.utils.asset_pipeline import ASSET_WIDTHS, ASSET_FORMATS, build_assets
+from src.utils.sprite_atlas import build_atlases
+from src.utils.static_files import precompress_static
+from src.models.user import db, User
+
+def register_commands(app):
+    """Registra os comandos de manutenção (uso: flask --app src.main <comando>)"""
+
+    @app.cli.command('db-upgrade')
+    def db_upgrade():
+        """Aplica as migrações pendentes do banco"""
+        applied = upgrade_database()
+        click.echo(f"Migrações aplicadas: {applied or 'nenhuma'}")
+
+    @app.cli.command('db-status')
+    def db_status():
+        """Lista as migrações aplicadas e pendentes"""
+        for migration in migration_status():
+            mark = 'x' if migration['applied'] else ' '
+            click.echo(f"[{mark}] {migration['version']:03d} {migration['description']}")
+
+    @app.cli.command('db-check-plans')
+    def db_check_plans():
+        """Falha se alguma consulta dos caminhos quentes varrer uma tabela inteira"""
+        problems = check_query_plans()
+        for name, tables in problems.items():
+            click.echo(f"{name}: varredura completa em {', '.join(tables)}")
+        if problems:
+            raise SystemExit(1)
+        click.echo("Nenhuma varredura completa nas consultas dos caminhos quentes")
+
+    @app.cli.command('pets-simulate')
+    @click.option('--box', 'box_type', type=click.Choice(sorted(BOX_PROBABILITIES)), default='basic')
+    @click.option('--draws', type=click.IntRange(min=1), default=1_000_000, show_default=True)
+    @click.option('--seed', type=int, default=None, help='Semente para reproduzir a simulação')
+    @click.option('--numpy/--no-numpy', 'use_numpy', default=None, help='Padrão: NumPy se estiver instalado')
+    def pets_simulate(box_type, draws, seed, use_numpy):
+        """Simula aberturas de caixa e compara as raridades observadas com as configuradas"""
+        try:
+            result = simulate_drops(box_type, draws, seed, use_numpy)
+        except (ValueError, RuntimeError) as e:
+            raise click.ClickException(str(e))
+
+        click.echo(f"Caixa {result['box_type']}: {result['draws']} sorteios, semente {result['seed']} ({result['engine']})")
+        click.echo(f"{'raridade':<10} {'configurada':>12} {'observada':>12} {'diferença':>10}")
+        for rarity, stats in result['rarities'].items():
+            diff = stats['observed'] - stats['configured']
+            click.echo(f"{rarity:<10} {stats['configured']:>12.4%} {stats['observed']:>12.4%} {diff:>+10.4%}")
+        click.echo(f"{result['draws_per_second']:,.0f} sorteios/s em {result['seconds']:.2f} s")
+
+    @app.cli.command('bench-json')
+    @click.option('--rows', type=click.IntRange(min=1), default=1000, show_default=True)
+    @click.option('--repeat', type=click.IntRange(min=1), default=20, show_default=True)
+    def bench_json(rows, repeat):
+        """Compara a serialização atual (to_dict + json) com a pré-compilada + provedor rápido"""
+        result = benchmark_serialization(app, rows, repeat)
+        click.echo(f"{result['rows']} tarefas, melhor de {repeat} execuções (backend: {result['backend']})")
+        click.echo(f"to_dict + json do Flask:     {result['current_ms']:8.2f} ms  ({result['bytes_current']} bytes)")
+        click.echo(f"serializador + FastJSON:     {result['fast_ms']:8.2f} ms  ({result['bytes_fast']} bytes)")
+        click.echo(f"{result['speedup']:.1f}x mais rápido")
+
+    @app.cli.command('user-export')
+    @click.argument('user_id', type=int)
+    @click.argument('output', type=click.File('w', encoding='utf-8'), default='-')
+    def user_export(user_id, output):
+        """Grava o histórico do usuário em NDJSON (mesmo formato de GET /users/<id>/export)"""
+        if db.session.get(User, user_id) is None:
+            raise click.ClickException(f'Usuário {user_id} não encontrado')
+        for chunk in export_lines(user_id):
+            output.write(chunk)
+
+    @app.cli.command('user-import')
+    @click.argument('source', type=click.File('r', encoding='utf-8'))
+    @click.option('--user-id', type=int, default=None, help='Acrescenta a um usuário existente em vez de criar um novo')
+    def user_import(source, user_id):
+        """Importa um arquivo de user-export em lotes, numa única transação"""
+        try:
+            summary = import_history(source, user_id)
+            db.session.commit()
+        except HistoryImportError as e:
+            db.session.rollback()
+            raise click.ClickException(str(e))
+        counts = ', '.join(f'{section}: {count}' for section, count in summary['imported'].items())
+        click.echo(f"Usuário {summary['user_id']} importado ({counts or 'sem histórico'})")
+
+    @app.cli.command('assets-build')
+    @click.option('--width', 'widths', type=click.IntRange(min=16), multiple=True, help=f'Padrão: {ASSET_WIDTHS}')
+    @click.option('--format', 'formats', type=click.Choice(ASSET_FORMATS), multiple=True, help=f'Padrão: {ASSET_FORMATS}')
+    @click.option('--force', is_flag=True, help='Regera mesmo as imagens que não mudaram')
+    @click.option('--jobs', type=click.IntRange(min=1), default=None, help='Processos de codificação (padrão: CPUs)')
+    @click.option('--atlas/--no-atlas', default=True, help='Gera também os atlas de sprites por raridade')
+    def assets_build(widths, formats, force, jobs, atlas):
+        """Gera variantes (AVIF/WebP/PNG) das imagens, os atlas, o manifesto e os .gz/.br dos estáticos"""
+        try:
+            result = build_assets(widths or ASSET_WIDTHS, formats or ASSET_FORMATS, force, jobs)
+            atlases = build_atlases(force=force, jobs=jobs) if atlas else None
+            compressed = precompress_static(app.static_folder)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+
+        click.echo(f"{result['assets']} imagens ({result['rebuilt']} regeradas), {result['variants']} variantes")
+        click.echo(f"Formatos: {', '.join(result['formats'])}; larguras: {', '.join(map(str, result['widths']))}")
+        click.echo(f"Originais: {result['source_bytes'] / 1e6:.1f} MB; WebP na largura padrão: {result['default_bytes'] / 1e6:.2f} MB")
+        if atlases:
+            sizes = ', '.join(f'{size}px' for size in atlases['frame_sizes'])
+            click.echo(f"{atlases['atlases']} atlas ({atlases['rebuilt']} regerados), {atlases['sprites']} sprites, quadros de {sizes}")
+        click.echo(f"{compressed} arquivos precomprimidos (.gz/.br) gravados")
+        removed = result['removed'] + (atlases['removed'] if atlases else 0)
+        if removed:
+            click.echo(f"{removed} arquivos antigos removidos")
@@ -3,7 +3,7 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask
 from flask_cors import CORS
 from src.models.user import db
 from src.routes.user import user_bp
@@ -13,14 +13,38 @@ from src.routes.store import store_bp
 from src.routes.timer import timer_bp
 from src.routes.pets import pets_bp
 from src.routes.file_manager import file_manager_bp
+from src.routes.dashboard import dashboard_bp
+from src.routes.assets import assets_bp
+from src.routes.metrics import metrics_bp
 from src.utils.daily_reset import schedule_daily_reset
+from src.utils.level_curve import configure_level_curve
+from src.utils.rng import configure_rng
+from src.utils.thumbnails import configure_thumbnails
+from src.config import load_config
+from src.utils.json_provider import FastJSONProvider
+from src.utils.static_files import StaticFiles, INDEX_MAX_AGE
+from src.utils.asset_manifest import get_asset_manifest, on_manifest_reload
+from src.utils.migrations import upgrade_database
+from src.utils.db_profile import configure_database, install_sqlite_profile, log_effective_pragmas
+from src.utils.query_plans import enable_plan_check
+from src.utils.query_budget import install_query_counter
+from src.utils.compression import install_compression
+from src.cli import register_commands
 from src.models.pet import Pet, UserPet, PetBoxOpening  # Importar modelos de pets
+from src.models.ledger import RewardLedger, DailyRewardRollup  # Ledger de recompensas
+from src.models.job import JobRun  # Marcadores de jobs agendados
+from src.models.migration import SchemaMigration  # Versões do esquema aplicadas
+from src.models.version import CatalogVersion  # Versões dos catálogos (ETags)
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
+app.json = FastJSONProvider(app)  # orjson quando instalado; datas em ISO 8601
 
 # Configurar CORS para permitir requisições do frontend
-CORS(app, origins="*")
+# Cabeçalhos legíveis pelo frontend: cursor da paginação, contagem de consultas e tempos do dashboard.
+# Também em app.config porque as rotas com @cross_origin() leem as opções de lá, não do CORS(app)
+app.config['CORS_EXPOSE_HEADERS'] = ['X-Next-Cursor', 'X-Query-Count', 'Server-Timing']
+CORS(app, origins="*", expose_headers=app.config['CORS_EXPOSE_HEADERS'])
 
 # Registrar blueprints
 app.register_blueprint(user_bp, url_prefix='/api')
@@ -30,21 +54,51 @@ app.register_blueprint(store_bp, url_prefix='/api')
 app.register_blueprint(timer_bp, url_prefix='/api')
 app.register_blueprint(pets_bp, url_prefix='/api')
 app.register_blueprint(file_manager_bp, url_prefix='/api')
+app.register_blueprint(dashboard_bp, url_prefix='/api')
+app.register_blueprint(assets_bp, url_prefix='/api')
+app.register_blueprint(metrics_bp, url_prefix='/api')
 
-# Configuração do banco de dados
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+# Configuração do banco de dados (padrão: SQLite em src/database; ver src/config.py)
+load_config(app)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config.setdefault('AUTO_MIGRATE', True)  # Aplicar migrações pendentes ao iniciar
+app.config.setdefault('QUERY_PLAN_CHECK', False)  # Avisar sobre consultas que varrem tabelas inteiras
+app.config.setdefault('QUERY_BUDGET_CHECK', False)  # 'warn' ou 'raise' quando uma rota passa do orçamento de consultas
+# Perfil do SQLite: WAL, busy_timeout, mmap, cache, pools de escrita e de leitura
+configure_database(app)
 db.init_app(app)
+install_sqlite_profile(app, db)
+install_query_counter(app, db)
+# Compressão das respostas (zstd/br/gzip) acima de COMPRESSION_MIN_BYTES; métricas em /api/metrics/compression
+install_compression(app)
+register_commands(app)
+
+# Curva de níveis (ex.: {'base': 100, 'step': 10, 'levels': 100} ou {'xp_per_level': [...]})
+configure_level_curve(app.config.get('LEVEL_CURVE'))
+configure_rng(app.config.get('RNG_SEED'))
+# Miniaturas sob demanda: diretório do cache em disco, limites em bytes e processos de codificação
+configure_thumbnails(
+    app.config.get('THUMBNAIL_CACHE_DIR'),
+    app.config.get('THUMBNAIL_DISK_BYTES'),
+    app.config.get('THUMBNAIL_MEMORY_BYTES'),
+    app.config.get('THUMBNAIL_WORKERS')
+)
 
 with app.app_context():
-    db.create_all()
+    if app.config['AUTO_MIGRATE']:
+        upgrade_database()
+    else:
+        db.create_all()
+    if app.config['QUERY_PLAN_CHECK']:
+        enable_plan_check(db.engine)
+    log_effective_pragmas(db)
     # Inicializar conquistas padrão
     init_default_achievements()
     # Inicializar pets
     from src.init_pets import init_pets
     init_pets()
     # Inicializar sistema de reset diário
-    schedule_daily_reset()
+    schedule_daily_reset(app)
     
     # Criar usuário padrão se não existir
     from src.models.user import User
@@ -60,21 +114,16 @@ with app.app_context():
         db.session.add(default_user)
         db.session.commit()
 
+# Arquivos estáticos da SPA: manifesto em memória montado uma vez na inicialização
+static_files = StaticFiles(app.static_folder, app.config.get('STATIC_INDEX_MAX_AGE', INDEX_MAX_AGE))
+# Um novo `flask assets-build` (manifest.json alterado) também remonta o manifesto estático
+on_manifest_reload(static_files.rebuild)
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-        return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
+    get_asset_manifest()  # Verifica se o manifest.json mudou (no máximo uma vez por intervalo)
+    return static_files.serve(path)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5001, debug=True)
@@ -0,0 +1,22 @@
+from datetime import datetime
+from src.models.user import db
+
+class JobRun(db.Model):
+    __tablename__ = 'job_runs'
+
+    name = db.Column(db.String(100), primary_key=True)  # Ex.: 'daily_reset'
+    last_run_date = db.Column(db.Date)  # Dia (local) da última execução reivindicada
+    last_run_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)  # None enquanto a execução reivindicada não terminou
+    rows_affected = db.Column(db.Integer, default=0)
+    duration_ms = db.Column(db.Float, default=0)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'last_run_date': self.last_run_date.isoformat() if self.last_run_date else None,
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'rows_affected': self.rows_affected,
+            'duration_ms': self.duration_ms
+        }
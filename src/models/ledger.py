@@ -0,0 +1,57 @@
+from datetime import datetime
+from src.models.user import db
+
+class RewardLedger(db.Model):
+    """Registro imutável de cada recompensa concedida (XP e moedas já com buffs)"""
+    __tablename__ = 'reward_ledger'
+    __table_args__ = (
+        db.Index('ix_reward_ledger_user_created', 'user_id', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    source = db.Column(db.String(20), nullable=False, default='task')  # 'task' ou 'achievement'
+    task_id = db.Column(db.Integer)  # Sem FK: o histórico sobrevive à exclusão de missões únicas
+    achievement_id = db.Column(db.Integer)
+    xp = db.Column(db.Integer, default=0)
+    coins = db.Column(db.Integer, default=0)
+    buffs = db.Column(db.JSON)  # Recompensa base e buffs aplicados
+    rng_seed = db.Column(db.BigInteger)  # Semente do sorteio de moedas em dobro (src/utils/rng.py), se houve
+    draw_index = db.Column(db.Integer)  # Posição do sorteio nessa sequência
+    day = db.Column(db.Date, nullable=False)  # Dia local do usuário
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'source': self.source,
+            'task_id': self.task_id,
+            'achievement_id': self.achievement_id,
+            'xp': self.xp,
+            'coins': self.coins,
+            'buffs': self.buffs,
+            'rng_seed': self.rng_seed,
+            'draw_index': self.draw_index,
+            'day': self.day.isoformat() if self.day else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class DailyRewardRollup(db.Model):
+    """Totais diários por usuário, mantidos a cada lançamento no ledger"""
+    __tablename__ = 'daily_reward_rollups'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    xp = db.Column(db.Integer, default=0)
+    coins = db.Column(db.Integer, default=0)
+    tasks_completed = db.Column(db.Integer, default=0)
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'day': self.day.isoformat() if self.day else None,
+            'xp': self.xp,
+            'coins': self.coins,
+            'tasks_completed': self.tasks_completed
+        }
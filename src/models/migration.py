@@ -0,0 +1,16 @@
+from datetime import datetime
+from src.models.user import db
+
+class SchemaMigration(db.Model):
+    __tablename__ = 'schema_migrations'
+
+    version = db.Column(db.Integer, primary_key=True)
+    description = db.Column(db.String(200))
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'version': self.version,
+            'description': self.description,
+            'applied_at': self.applied_at.isoformat() if self.applied_at else None
+        }
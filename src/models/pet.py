@@ -1,5 +1,6 @@
 from datetime import datetime
 from src.models.user import db, User
+from src.utils.asset_manifest import sprite_url
 
 class Pet(db.Model):
     __tablename__ = 'pets'
@@ -20,12 +21,18 @@ class Pet(db.Model):
             'name': self.name,
             'rarity': self.rarity,
             'sprite_path': self.sprite_path,
+            'sprite_url': sprite_url(self.sprite_path),
             'base_effects': self.base_effects,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
 class UserPet(db.Model):
     __tablename__ = 'user_pets'
+    __table_args__ = (
+        db.Index('ix_user_pets_equipped', 'user_id', 'is_equipped', 'slot_position'),
+        db.Index('ix_user_pets_user_pet', 'user_id', 'pet_id'),
+        db.Index('ix_user_pets_user_level', 'user_id', 'level'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -74,6 +81,9 @@ class UserPet(db.Model):
 
 class PetBoxOpening(db.Model):
     __tablename__ = 'pet_box_openings'
+    __table_args__ = (
+        db.Index('ix_pet_box_openings_user_opened', 'user_id', 'opened_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -82,6 +92,8 @@ class PetBoxOpening(db.Model):
     was_duplicate = db.Column(db.Boolean, default=False)
     level_gained = db.Column(db.Integer, default=1)  # Nível que o pet ficou após a abertura
     opened_at = db.Column(db.DateTime, default=datetime.utcnow)
+    rng_seed = db.Column(db.BigInteger)  # Semente da sequência usada no sorteio (src/utils/rng.py)
+    draw_index = db.Column(db.Integer, default=0)  # Posição da caixa nessa sequência
     
     # Relacionamentos
     user = db.relationship('User', backref='pet_box_openings')
@@ -96,6 +108,8 @@ class PetBoxOpening(db.Model):
             'box_type': self.box_type,
             'was_duplicate': self.was_duplicate,
             'level_gained': self.level_gained,
+            'rng_seed': self.rng_seed,
+            'draw_index': self.draw_index,
             'opened_at': self.opened_at.isoformat() if self.opened_at else None
         }
 
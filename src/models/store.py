@@ -25,6 +25,10 @@ class StoreItem(db.Model):
 
 class Purchase(db.Model):
     __tablename__ = 'purchases'
+    __table_args__ = (
+        db.Index('ix_purchases_user_redeemed', 'user_id', 'is_redeemed', 'purchased_at'),
+        db.Index('ix_purchases_user_purchased', 'user_id', 'purchased_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
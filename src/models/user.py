@@ -1,11 +1,17 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, date
 import json
+from src.utils.level_curve import get_level_curve, avatar_stage_for_level
+from src.utils.db_profile import RoutingSession
 
-db = SQLAlchemy()
+# GETs leem pelo pool somente leitura quando configurado (ver src/utils/db_profile.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        db.Index('ix_users_timezone', 'timezone'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
@@ -15,6 +21,32 @@ class User(db.Model):
     coins = db.Column(db.Integer, default=0)
     avatar_stage = db.Column(db.Integer, default=1)
     pet_slots = db.Column(db.Integer, default=1)  # Número de slots de pets desbloqueados
+    buff_version = db.Column(db.Integer, default=0)  # Incrementado quando os pets equipados mudam
+    stats_version = db.Column(db.Integer, default=0)  # Incrementado quando tarefas, conquistas ou pets mudam
+    data_version = db.Column(db.Integer, default=0)  # Incrementado a cada alteração dos dados do usuário (ETag)
+    rng_streams = db.Column(db.Integer, default=0)  # Sequências de sorteio já abertas com RNG_SEED (src/utils/rng.py)
+    last_activity_date = db.Column(db.Date)  # Último dia em que completou uma tarefa
+    timezone = db.Column(db.String(64), nullable=False, default='America/Sao_Paulo',
+                         server_default='America/Sao_Paulo')  # Fuso IANA usado no reset diário
+    
+    # Histórico de atividade: array('H') com tarefas completadas por dia, a partir de activity_origin
+    activity_days = db.Column(db.LargeBinary)
+    activity_origin = db.Column(db.Integer)  # Ordinal (date.toordinal) do primeiro dia do array
+    current_streak = db.Column(db.Integer, default=0)  # Sequência que termina em last_activity_date
+    
+    # Contadores usados na avaliação de conquistas
+    tasks_completed = db.Column(db.Integer, default=0)
+    tasks_today = db.Column(db.Integer, default=0)
+    max_streak = db.Column(db.Integer, default=0)  # Maior sequência de dias com atividade
+    achievements_unlocked = db.Column(db.Integer, default=0)
+    items_bought = db.Column(db.Integer, default=0)
+    total_coins_earned = db.Column(db.Integer, default=0)
+    total_coins_spent = db.Column(db.Integer, default=0)
+    early_bird_tasks = db.Column(db.Integer, default=0)
+    night_owl_tasks = db.Column(db.Integer, default=0)
+    weekend_tasks = db.Column(db.Integer, default=0)
+    perfect_days = db.Column(db.Integer, default=0)
+    last_perfect_date = db.Column(db.Date)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -27,42 +59,14 @@ class User(db.Model):
     
     def get_avatar_stage(self):
         """Determina o estágio do avatar baseado no nível"""
-        if self.level >= 50:
-            return 8  # Lendário
-        elif self.level >= 40:
-            return 7  # Mestre
-        elif self.level >= 30:
-            return 6  # Especialista
-        elif self.level >= 20:
-            return 5  # Avançado
-        elif self.level >= 15:
-            return 4  # Intermediário
-        elif self.level >= 10:
-            return 3  # Experiente
-        elif self.level >= 5:
-            return 2  # Novato
-        else:
-            return 1  # Iniciante
+        return avatar_stage_for_level(self.level)
     
     def add_xp(self, amount):
         """Adiciona XP e verifica se subiu de nível"""
         self.xp += amount
         old_level = self.level
         
-        # Nova progressão de XP para alcançar ~70.000 XP no nível 100
-        new_level = 1
-        total_xp_needed = 0
-        
-        # Progressão linear mais suave
-        for level in range(1, 101):  # Até nível 100
-            # XP necessário para o próximo nível
-            xp_for_next_level = 100 + (level - 1) * 10  # Começa com 100, aumenta 10 por nível
-            
-            if self.xp >= total_xp_needed + xp_for_next_level:
-                total_xp_needed += xp_for_next_level
-                new_level = level + 1
-            else:
-                break
+        new_level = get_level_curve().level_for_xp(self.xp)
         
         self.level = new_level
         self.avatar_stage = self.get_avatar_stage()
@@ -72,6 +76,7 @@ class User(db.Model):
     def add_coins(self, amount):
         """Adiciona moedas"""
         self.coins += amount
+        self.total_coins_earned = (self.total_coins_earned or 0) + amount
     
     def to_dict(self):
         return {
@@ -83,11 +88,24 @@ class User(db.Model):
             'coins': self.coins,
             'avatar_stage': self.avatar_stage,
             'pet_slots': self.pet_slots,
+            'timezone': self.timezone,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'last_login': self.last_login.isoformat() if self.last_login else None
         }
 
 class Task(db.Model):
+    __table_args__ = (
+        db.Index('ix_task_user_type', 'user_id', 'task_type'),
+        db.Index('ix_task_user_completed', 'user_id', 'completed', 'completed_at'),
+        db.Index('ix_task_user_created', 'user_id', 'created_at'),
+        db.Index('ix_task_type_completed', 'task_type', 'completed'),
+        db.Index(
+            'ix_task_auto_delete', 'auto_delete_at',
+            sqlite_where=db.text('auto_delete_at IS NOT NULL'),
+            postgresql_where=db.text('auto_delete_at IS NOT NULL')
+        ),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
@@ -107,7 +125,7 @@ class Task(db.Model):
     def __repr__(self):
         return f'<Task {self.title}>'
     
-    def complete_task(self):
+    def complete_task(self, today=None):
         """Marca a tarefa como completa e atualiza streak se necessário"""
         if not self.completed:
             self.completed = True
@@ -115,11 +133,9 @@ class Task(db.Model):
             
             # Atualiza streak para hábitos
             if self.task_type == 'habit':
-                today = date.today()
-                if self.last_completed == today - datetime.timedelta(days=1):
-                    self.streak += 1
-                elif self.last_completed != today:
-                    self.streak = 1
+                from src.utils.streaks import advance_streak
+                today = today or date.today()
+                self.streak = advance_streak(self.last_completed, self.streak or 0, today)
                 self.last_completed = today
             
             return True
@@ -176,6 +192,10 @@ class Achievement(db.Model):
         }
 
 class UserAchievement(db.Model):
+    __table_args__ = (
+        db.Index('ix_user_achievement_user', 'user_id', 'achievement_id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     achievement_id = db.Column(db.Integer, db.ForeignKey('achievement.id'), nullable=False)
@@ -0,0 +1,13 @@
+from src.models.user import db
+
+class CatalogVersion(db.Model):
+    __tablename__ = 'catalog_versions'
+
+    name = db.Column(db.String(50), primary_key=True)  # 'pets', 'store_items' ou 'achievements'
+    version = db.Column(db.Integer, nullable=False, default=0)  # Incrementada a cada alteração do catálogo
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'version': self.version
+        }
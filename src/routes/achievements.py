@@ -1,14 +1,18 @@
 from flask import Blueprint, jsonify, request
 from flask_cors import cross_origin
 from src.models.user import User, Achievement, UserAchievement, db
+from src.utils.load_plans import load_plan
+from src.utils.versions import conditional_get
+from src.utils.serializers import ACHIEVEMENT_SERIALIZER
 
 achievements_bp = Blueprint('achievements', __name__)
 
 @achievements_bp.route('/achievements', methods=['GET'])
 @cross_origin()
+@conditional_get(catalogs=('achievements',))
 def get_achievements():
-    achievements = Achievement.query.all()
-    return jsonify([achievement.to_dict() for achievement in achievements])
+    rows = db.session.execute(ACHIEVEMENT_SERIALIZER.select().order_by(Achievement.id)).all()
+    return jsonify(ACHIEVEMENT_SERIALIZER.serialize(rows))
 
 @achievements_bp.route('/achievements', methods=['POST'])
 @cross_origin()
@@ -62,14 +66,18 @@ def delete_achievement(achievement_id):
 
 @achievements_bp.route('/users/<int:user_id>/achievements', methods=['GET'])
 @cross_origin()
+@conditional_get(user=True, catalogs=('achievements',))
 def get_user_achievements(user_id):
     user = User.query.get_or_404(user_id)
-    user_achievements = UserAchievement.query.filter_by(user_id=user_id).all()
-    
-    return jsonify([ua.to_dict() for ua in user_achievements])
+    return jsonify(list_user_achievements(user_id))
+
+def list_user_achievements(user_id):
+    user_achievements = UserAchievement.query.options(*load_plan('user_achievements')).filter_by(user_id=user_id).all()
+    return [ua.to_dict() for ua in user_achievements]
 
 @achievements_bp.route('/users/<int:user_id>/achievements/available', methods=['GET'])
 @cross_origin()
+@conditional_get(user=True, catalogs=('achievements',))
 def get_available_achievements(user_id):
     """Retorna conquistas que o usuário ainda não desbloqueou"""
     user = User.query.get_or_404(user_id)
@@ -0,0 +1,70 @@
+from concurrent.futures import TimeoutError
+from flask import Blueprint, Response, jsonify, request, send_file
+from flask_cors import cross_origin
+from src.utils.asset_manifest import (
+    DEFAULT_ASSET_WIDTH, FORMAT_MIMETYPES, MAX_ASSET_WIDTH,
+    get_asset_manifest, accepted_formats, choose_variant, variant_file
+)
+from src.utils.thumbnails import ThumbnailError, ThumbnailNotFound, get_thumbnail_service
+
+assets_bp = Blueprint('assets', __name__)
+
+ASSET_MAX_AGE = 86400  # A URL negociada muda de conteúdo a cada build; as variantes em /generated são imutáveis
+
+@assets_bp.route('/assets/<name>', methods=['GET'])
+@cross_origin()
+def get_asset(name):
+    """Serve a melhor variante de uma imagem para o Accept do cliente e a largura ?w=
+
+    Sem o manifesto (assets-build não executado) serve a imagem original.
+    """
+    manifest = get_asset_manifest()
+    width = min(max(request.args.get('w', DEFAULT_ASSET_WIDTH, type=int), 1), MAX_ASSET_WIDTH)
+
+    entry = manifest['assets'].get(name)
+    variant = choose_variant(entry, accepted_formats(request.accept_mimetypes), width) if entry else None
+    if variant is not None:
+        response = send_file(
+            variant_file(variant), mimetype=FORMAT_MIMETYPES[variant['format']],
+            max_age=ASSET_MAX_AGE, conditional=True
+        )
+        response.headers['Content-Location'] = variant['path']
+    elif name in manifest['sources']:
+        response = send_file(manifest['sources'][name], mimetype='image/png', max_age=ASSET_MAX_AGE, conditional=True)
+    else:
+        return jsonify({'error': 'Imagem não encontrada'}), 404
+
+    response.vary.add('Accept')
+    return response
+
+@assets_bp.route('/thumbnails/<path:filename>', methods=['GET'])
+@cross_origin()
+def get_thumbnail(filename):
+    """Miniatura de qualquer imagem de static/assets na largura ?w= e no formato ?format=
+
+    Sem ?format= usa o melhor formato do Accept. Gerada no primeiro pedido e guardada em cache.
+    """
+    width = request.args.get('w', DEFAULT_ASSET_WIDTH, type=int)
+    fmt = request.args.get('format')
+    try:
+        service = get_thumbnail_service()
+        negotiated = fmt is None
+        if negotiated:
+            available = service.formats()
+            fmt = next(f for f in accepted_formats(request.accept_mimetypes) if f in available)
+        data, key = service.get(filename, width, fmt)
+    except ThumbnailNotFound as e:
+        return jsonify({'error': str(e)}), 404
+    except ThumbnailError as e:
+        return jsonify({'error': str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 503
+    except TimeoutError:
+        return jsonify({'error': 'Tempo esgotado gerando a miniatura'}), 504
+
+    response = Response(data, mimetype=FORMAT_MIMETYPES[fmt])
+    response.set_etag(key)
+    response.headers['Cache-Control'] = f'public, max-age={ASSET_MAX_AGE}'
+    if negotiated:
+        response.vary.add('Accept')
+    return response.make_conditional(request.environ)
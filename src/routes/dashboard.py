@@ -0,0 +1,62 @@
+import time
+from flask import Blueprint, jsonify, request
+from flask_cors import cross_origin
+from src.models.user import User
+from src.routes.user import get_level_title, xp_progress, xp_progress_window
+from src.routes.tasks import list_active_tasks
+from src.routes.achievements import list_user_achievements
+from src.routes.pets import list_equipped_pets, slots_info
+from src.utils.daily_reset import get_time_until_reset
+from src.utils.streaks import get_streak
+from src.utils.user_stats import get_task_stats
+
+dashboard_bp = Blueprint('dashboard', __name__)
+
+# Seções da tela inicial: nome -> função(user) que monta o mesmo JSON da rota individual
+DASHBOARD_SECTIONS = {
+    'user': lambda user: user.to_dict(),
+    'tasks': lambda user: list_active_tasks(user.id),
+    'stats': lambda user: {'user': user.to_dict(), 'stats': get_task_stats(user)},
+    'streak': get_streak,
+    'xp_progress': lambda user: xp_progress(user, xp_progress_window()),
+    'title': lambda user: {'title': get_level_title(user.level), 'level': user.level},
+    'equipped_pets': lambda user: list_equipped_pets(user.id),
+    'slots': slots_info,
+    'achievements': lambda user: list_user_achievements(user.id),
+    'daily_reset': lambda user: get_time_until_reset(user.timezone),
+}
+
+@dashboard_bp.route('/users/<int:user_id>/dashboard', methods=['GET'])
+@cross_origin()
+def get_dashboard(user_id):
+    """Tela inicial em uma única requisição (?include=tasks,stats,streak seleciona as seções)
+
+    O usuário é carregado uma vez e compartilhado por todas as seções; o tempo de cada
+    seção vai no cabeçalho Server-Timing.
+    """
+    include = request.args.get('include')
+    if include:
+        sections = [name.strip() for name in include.split(',') if name.strip()]
+        unknown = [name for name in sections if name not in DASHBOARD_SECTIONS]
+        if unknown:
+            return jsonify({'error': f"Seções inválidas: {', '.join(unknown)}"}), 400
+    else:
+        sections = list(DASHBOARD_SECTIONS)
+
+    started = time.perf_counter()
+    user = User.query.get_or_404(user_id)
+    timings = [('load_user', time.perf_counter() - started)]
+
+    dashboard = {}
+    for name in sections:
+        section_started = time.perf_counter()
+        dashboard[name] = DASHBOARD_SECTIONS[name](user)
+        timings.append((name, time.perf_counter() - section_started))
+
+    timings.append(('total', time.perf_counter() - started))
+
+    response = jsonify(dashboard)
+    response.headers['Server-Timing'] = ', '.join(
+        f'{name};dur={seconds * 1000:.2f}' for name, seconds in timings
+    )
+    return response
@@ -0,0 +1,17 @@
+from flask import Blueprint, jsonify
+from flask_cors import cross_origin
+from src.utils.compression import compression_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics/compression', methods=['GET'])
+@cross_origin()
+def get_compression_metrics():
+    """Taxa de compressão e tempo de CPU por rota e codificação desde o início do processo"""
+    return jsonify(compression_metrics.snapshot())
+
+@metrics_bp.route('/metrics/compression/reset', methods=['POST'])
+@cross_origin()
+def reset_compression_metrics():
+    compression_metrics.reset()
+    return '', 204
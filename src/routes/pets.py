@@ -1,39 +1,68 @@
-import random
-from datetime import datetime
 from flask import Blueprint, request, jsonify
 from flask_cors import cross_origin
 from src.models.user import db, User
-from src.models.pet import Pet, UserPet, PetBoxOpening
+from src.models.pet import UserPet, PetBoxOpening
+from src.utils.reward_engine import invalidate_buffs
+from src.utils.pet_catalog import MAX_PET_LEVEL, get_pet_catalog, pet_entry_to_dict, current_effects
+from src.utils.pet_sampler import get_box_sampler
+from src.utils.rng import user_stream
+from src.utils.load_plans import load_plan, list_user_pets, list_box_history
+from src.utils.user_stats import get_pet_stats as get_cached_pet_stats, invalidate_stats
+from src.utils.versions import conditional_get
+from src.utils.pagination import PageError, page_request, project, paged_response
+from src.utils.asset_manifest import atlas_frame, get_asset_manifest
 
 pets_bp = Blueprint('pets', __name__)
 
-# Probabilidades de raridade
-RARITY_PROBABILITIES = {
-    'common': 0.60,      # 60%
-    'rare': 0.25,        # 25%
-    'epic': 0.125,       # 12.5%
-    'legendary': 0.025   # 2.5%
+# Preço de cada tipo de caixa
+BOX_PRICES = {
+    'basic': 200,
+    'luxury': 500
 }
 
+MAX_BOXES_PER_REQUEST = 100
+
+# Campos aceitos em ?fields= no histórico de caixas (chaves de PetBoxOpening.to_dict)
+BOX_OPENING_FIELDS = (
+    'id', 'user_id', 'pet_id', 'pet', 'box_type', 'was_duplicate', 'level_gained',
+    'rng_seed', 'draw_index', 'opened_at'
+)
+
 # Listar todos os pets disponíveis
 @pets_bp.route('/pets', methods=['GET'])
 @cross_origin()
+@conditional_get(catalogs=('pets',), assets=True)
 def get_all_pets():
-    pets = Pet.query.all()
-    return jsonify([pet.to_dict() for pet in pets])
+    # Cada pet leva o atlas da raridade e o retângulo do seu quadro (None sem assets-build)
+    return jsonify([
+        dict(pet_entry_to_dict(pet), atlas=atlas_frame(pet.sprite_path))
+        for pet in get_pet_catalog().pets
+    ])
+
+# Folhas de sprites (raridades e caixas) com os retângulos de todos os quadros
+@pets_bp.route('/pets/atlases', methods=['GET'])
+@cross_origin()
+@conditional_get(assets=True)
+def get_pet_atlases():
+    atlases = get_asset_manifest()['atlases']
+    return jsonify({
+        group: {'names': atlas['names'], 'sheets': atlas['sheets']}
+        for group, atlas in atlases.items()
+    })
 
 # Listar pets do usuário
 @pets_bp.route('/users/<int:user_id>/pets', methods=['GET'])
 @cross_origin()
+@conditional_get(user=True, catalogs=('pets',))
 def get_user_pets(user_id):
-    user_pets = UserPet.query.filter_by(user_id=user_id).all()
-    return jsonify([user_pet.to_dict() for user_pet in user_pets])
+    return jsonify(list_user_pets(user_id))
 
 # Obter pet equipado do usuário
 @pets_bp.route('/users/<int:user_id>/pets/equipped', methods=['GET'])
 @cross_origin()
+@conditional_get(user=True, catalogs=('pets',))
 def get_equipped_pet(user_id):
-    equipped_pet = UserPet.query.filter_by(user_id=user_id, is_equipped=True).first()
+    equipped_pet = UserPet.query.options(*load_plan('equipped_pets')).filter_by(user_id=user_id, is_equipped=True).first()
     if equipped_pet:
         return jsonify(equipped_pet.to_dict())
     return jsonify(None)
@@ -53,6 +82,7 @@ def equip_pet(user_id, user_pet_id):
         return jsonify({'error': 'Pet não encontrado'}), 404
     
     user_pet.is_equipped = True
+    invalidate_buffs(user_id)
     db.session.commit()
     
     return jsonify({
@@ -67,6 +97,7 @@ def unequip_pet(user_id):
     equipped_pet = UserPet.query.filter_by(user_id=user_id, is_equipped=True).first()
     if equipped_pet:
         equipped_pet.is_equipped = False
+        invalidate_buffs(user_id)
         db.session.commit()
         return jsonify({'message': 'Pet desequipado com sucesso!'})
     
@@ -79,94 +110,67 @@ def open_pet_box(user_id):
     try:
         data = request.get_json() or {}
         box_type = data.get('box_type', 'basic')  # 'basic' ou 'luxury'
+        if box_type not in BOX_PRICES:
+            return jsonify({'error': f'Tipo de caixa inválido: {box_type}'}), 400
         
         user = User.query.get_or_404(user_id)
-        
-        # Definir preço e probabilidades baseado no tipo de caixa
-        if box_type == 'luxury':
-            box_price = 500
-            probabilities = {
-                'common': 0.0,    # 0% de chance
-                'rare': 0.5,      # 50% de chance
-                'epic': 0.4,      # 40% de chance
-                'legendary': 0.1  # 10% de chance
-            }
-        else:  # basic
-            box_price = 200
-            probabilities = {
-                'common': 0.60,   # 60% de chance
-                'rare': 0.25,     # 25% de chance
-                'epic': 0.125,    # 12.5% de chance
-                'legendary': 0.025 # 2.5% de chance
-            }
+        box_price = BOX_PRICES[box_type]
         
         # Verificar se o usuário tem moedas suficientes
         if user.coins < box_price:
             return jsonify({'error': f'Moedas insuficientes. Necessário: {box_price}'}), 400
         
-        # Deduzir moedas
-        user.coins -= box_price
-        
-        # Selecionar pet baseado na probabilidade
-        selected_pet = select_random_pet_with_probabilities(user_id, probabilities)
-        if not selected_pet:
+        results = open_boxes(user, box_type, 1)
+        if not results:
             return jsonify({'error': 'Nenhum pet disponível'}), 400
         
-        # Verificar se o usuário já tem este pet
-        existing_user_pet = UserPet.query.filter_by(user_id=user_id, pet_id=selected_pet.id).first()
+        db.session.commit()
         
-        was_duplicate = False
-        level_gained = 1
+        response = box_result_to_dict(*results[0])
+        response.update({
+            'success': True,
+            'box_type': box_type,
+            'user_coins': user.coins
+        })
+        return jsonify(response)
         
-        if existing_user_pet:
-            # Pet duplicado - aumentar nível
-            if existing_user_pet.level < 25:  # Nível máximo
-                existing_user_pet.level += 1
-                level_gained = existing_user_pet.level
-                was_duplicate = True
-                user_pet = existing_user_pet
-            else:
-                # Pet já está no nível máximo, selecionar outro
-                return open_pet_box(user_id)  # Recursão para tentar novamente
-        else:
-            # Novo pet
-            user_pet = UserPet(
-                user_id=user_id,
-                pet_id=selected_pet.id,
-                level=1
-            )
-            db.session.add(user_pet)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+# Abrir várias caixas de uma vez (uma transação, uma cobrança)
+@pets_bp.route('/users/<int:user_id>/pets/open-boxes', methods=['POST'])
+@cross_origin()
+def open_pet_boxes(user_id):
+    try:
+        data = request.get_json() or {}
+        box_type = data.get('box_type', 'basic')
+        if box_type not in BOX_PRICES:
+            return jsonify({'error': f'Tipo de caixa inválido: {box_type}'}), 400
         
-        # Registrar abertura da caixa
-        box_opening = PetBoxOpening(
-            user_id=user_id,
-            pet_id=selected_pet.id,
-            box_type=box_type,
-            was_duplicate=was_duplicate,
-            level_gained=level_gained
-        )
-        db.session.add(box_opening)
+        count = data.get('count', 1)
+        if not isinstance(count, int) or isinstance(count, bool) or not 1 <= count <= MAX_BOXES_PER_REQUEST:
+            return jsonify({'error': f'Quantidade inválida (1 a {MAX_BOXES_PER_REQUEST})'}), 400
         
-        db.session.commit()
+        user = User.query.get_or_404(user_id)
+        total_price = BOX_PRICES[box_type] * count
+        
+        if user.coins < total_price:
+            return jsonify({'error': f'Moedas insuficientes. Necessário: {total_price}'}), 400
+        
+        # Se os pets disponíveis acabarem no meio, só as caixas abertas são cobradas
+        results = open_boxes(user, box_type, count)
+        if not results:
+            return jsonify({'error': 'Nenhum pet disponível'}), 400
         
-        # Calcular efeitos atuais do pet
-        current_effects = {}
-        for effect_name, base_value in selected_pet.base_effects.items():
-            current_effects[effect_name] = base_value * level_gained
+        db.session.commit()
         
         return jsonify({
             'success': True,
-            'pet': {
-                'id': selected_pet.id,
-                'name': selected_pet.name,
-                'rarity': selected_pet.rarity,
-                'sprite_path': selected_pet.sprite_path,
-                'base_effects': selected_pet.base_effects
-            },
-            'was_duplicate': was_duplicate,
-            'level_gained': level_gained,
-            'current_effects': current_effects,
             'box_type': box_type,
+            'boxes_opened': len(results),
+            'coins_spent': BOX_PRICES[box_type] * len(results),
+            'results': [box_result_to_dict(*result) for result in results],
             'user_coins': user.coins
         })
         
@@ -174,102 +178,109 @@ def open_pet_box(user_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-def select_random_pet_with_probabilities(user_id, probabilities):
-    """Seleciona um pet aleatório baseado nas probabilidades customizadas, excluindo pets no nível máximo"""
-    
-    # Obter pets que o usuário já tem no nível máximo
-    max_level_pets = db.session.query(UserPet.pet_id).filter_by(user_id=user_id, level=25).all()
-    max_level_pet_ids = [pet.pet_id for pet in max_level_pets]
-    
-    # Obter pets disponíveis (excluindo os de nível máximo)
-    available_pets = Pet.query.filter(~Pet.id.in_(max_level_pet_ids)).all()
-    
-    if not available_pets:
-        return None
-    
-    # Agrupar pets por raridade
-    pets_by_rarity = {
-        'common': [p for p in available_pets if p.rarity == 'common'],
-        'rare': [p for p in available_pets if p.rarity == 'rare'],
-        'epic': [p for p in available_pets if p.rarity == 'epic'],
-        'legendary': [p for p in available_pets if p.rarity == 'legendary']
+def open_boxes(user, box_type, count, seed=None):
+    """Abre até `count` caixas na sessão atual (sem commit)
+
+    Retorna [(pet, was_duplicate, level_gained)]; a lista fica menor que `count` se todos
+    os pets atingirem o nível máximo. As moedas são deduzidas uma única vez e as aberturas
+    são gravadas em um único INSERT, com a semente da sequência do usuário usada no sorteio.
+    """
+    seed, rng = user_stream(user.id, seed)
+    
+    owned = {
+        user_pet.pet_id: user_pet
+        for user_pet in UserPet.query.filter_by(user_id=user.id).all()
     }
+    excluded = frozenset(
+        pet_id for pet_id, user_pet in owned.items() if (user_pet.level or 1) >= MAX_PET_LEVEL
+    )
+    sampler = get_box_sampler(box_type, excluded)
     
-    # Selecionar raridade baseada na probabilidade customizada
-    rand = random.random()
-    cumulative_prob = 0
+    results = []
+    buffs_changed = False
     
-    for rarity, prob in probabilities.items():
-        cumulative_prob += prob
-        if rand <= cumulative_prob and pets_by_rarity[rarity]:
-            return random.choice(pets_by_rarity[rarity])
+    for _ in range(count):
+        if sampler is None:
+            break
+        
+        pet = sampler.draw(rng)
+        user_pet = owned.get(pet.id)
+        
+        if user_pet:
+            # Pet duplicado - aumentar nível
+            user_pet.level = (user_pet.level or 1) + 1
+            was_duplicate = True
+            buffs_changed = buffs_changed or user_pet.is_equipped
+            if user_pet.level >= MAX_PET_LEVEL:
+                # Nível máximo: deixa de sair nas próximas caixas
+                excluded = excluded | {pet.id}
+                sampler = get_box_sampler(box_type, excluded)
+        else:
+            # Novo pet
+            user_pet = UserPet(user_id=user.id, pet_id=pet.id, level=1)
+            db.session.add(user_pet)
+            owned[pet.id] = user_pet
+            was_duplicate = False
+        
+        results.append((pet, was_duplicate, user_pet.level))
     
-    # Fallback - selecionar qualquer pet disponível
-    return random.choice(available_pets)
-
-def select_random_pet(user_id):
-    """Seleciona um pet aleatório baseado nas probabilidades, excluindo pets no nível máximo"""
+    if not results:
+        return results
     
-    # Obter pets que o usuário já tem no nível máximo
-    max_level_pets = db.session.query(UserPet.pet_id).filter_by(user_id=user_id, level=25).all()
-    max_level_pet_ids = [pet.pet_id for pet in max_level_pets]
+    user.coins -= BOX_PRICES[box_type] * len(results)
     
-    # Obter pets disponíveis (excluindo os de nível máximo)
-    available_pets = Pet.query.filter(~Pet.id.in_(max_level_pet_ids)).all()
+    db.session.execute(db.insert(PetBoxOpening), [
+        {
+            'user_id': user.id,
+            'pet_id': pet.id,
+            'box_type': box_type,
+            'was_duplicate': was_duplicate,
+            'level_gained': level_gained,
+            'rng_seed': seed,
+            'draw_index': draw_index
+        }
+        for draw_index, (pet, was_duplicate, level_gained) in enumerate(results)
+    ])
     
-    if not available_pets:
-        return None
+    if buffs_changed:
+        invalidate_buffs(user.id)
+    invalidate_stats(user.id)
     
-    # Agrupar pets por raridade
-    pets_by_rarity = {
-        'common': [p for p in available_pets if p.rarity == 'common'],
-        'rare': [p for p in available_pets if p.rarity == 'rare'],
-        'epic': [p for p in available_pets if p.rarity == 'epic'],
-        'legendary': [p for p in available_pets if p.rarity == 'legendary']
+    return results
+
+def box_result_to_dict(pet, was_duplicate, level_gained):
+    return {
+        'pet': {
+            'id': pet.id,
+            'name': pet.name,
+            'rarity': pet.rarity,
+            'sprite_path': pet.sprite_path,
+            'base_effects': dict(pet.base_effects)
+        },
+        'was_duplicate': was_duplicate,
+        'level_gained': level_gained,
+        'current_effects': current_effects(pet, level_gained)
     }
-    
-    # Selecionar raridade baseada na probabilidade
-    rand = random.random()
-    cumulative_prob = 0
-    
-    for rarity, prob in RARITY_PROBABILITIES.items():
-        cumulative_prob += prob
-        if rand <= cumulative_prob and pets_by_rarity[rarity]:
-            return random.choice(pets_by_rarity[rarity])
-    
-    # Fallback - selecionar qualquer pet disponível
-    return random.choice(available_pets)
 
 # Histórico de aberturas de caixa
 @pets_bp.route('/users/<int:user_id>/pets/box-history', methods=['GET'])
 @cross_origin()
+@conditional_get(user=True, catalogs=('pets',))
 def get_box_history(user_id):
-    history = PetBoxOpening.query.filter_by(user_id=user_id).order_by(PetBoxOpening.opened_at.desc()).limit(20).all()
-    return jsonify([opening.to_dict() for opening in history])
+    try:
+        limit, cursor, fields = page_request(BOX_OPENING_FIELDS, default_limit=20)
+    except PageError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    history, next_cursor = list_box_history(user_id, limit, cursor)
+    return paged_response(project(history, fields), next_cursor)
 
 # Estatísticas de pets do usuário
 @pets_bp.route('/users/<int:user_id>/pets/stats', methods=['GET'])
 @cross_origin()
+@conditional_get(user=True, catalogs=('pets',))
 def get_pet_stats(user_id):
-    user_pets = UserPet.query.filter_by(user_id=user_id).all()
-    
-    stats = {
-        'total_pets': len(user_pets),
-        'pets_by_rarity': {
-            'common': len([p for p in user_pets if p.pet.rarity == 'common']),
-            'rare': len([p for p in user_pets if p.pet.rarity == 'rare']),
-            'epic': len([p for p in user_pets if p.pet.rarity == 'epic']),
-            'legendary': len([p for p in user_pets if p.pet.rarity == 'legendary'])
-        },
-        'max_level_pets': len([p for p in user_pets if p.level == 25]),
-        'equipped_pet': None
-    }
-    
-    equipped_pet = UserPet.query.filter_by(user_id=user_id, is_equipped=True).first()
-    if equipped_pet:
-        stats['equipped_pet'] = equipped_pet.to_dict()
-    
-    return jsonify(stats)
+    return jsonify(get_cached_pet_stats(user_id))
 
 
 # Comprar slot de pet
@@ -313,9 +324,15 @@ def buy_pet_slot(user_id):
 # Obter pets equipados (todos os slots)
 @pets_bp.route('/users/<int:user_id>/pets/equipped-all', methods=['GET'])
 @cross_origin()
+@conditional_get(user=True, catalogs=('pets',))
 def get_all_equipped_pets(user_id):
-    equipped_pets = UserPet.query.filter_by(user_id=user_id, is_equipped=True).order_by(UserPet.slot_position).all()
-    return jsonify([pet.to_dict() for pet in equipped_pets])
+    return jsonify(list_equipped_pets(user_id))
+
+def list_equipped_pets(user_id):
+    equipped_pets = UserPet.query.options(*load_plan('equipped_pets')).filter_by(
+        user_id=user_id, is_equipped=True
+    ).order_by(UserPet.slot_position).all()
+    return [pet.to_dict() for pet in equipped_pets]
 
 # Equipar pet em slot específico
 @pets_bp.route('/users/<int:user_id>/pets/<int:user_pet_id>/equip-slot/<int:slot>', methods=['POST'])
@@ -346,6 +363,7 @@ def equip_pet_in_slot(user_id, user_pet_id, slot):
     # Equipar pet no slot desejado
     user_pet.is_equipped = True
     user_pet.slot_position = slot
+    invalidate_buffs(user_id)
     
     db.session.commit()
     
@@ -372,6 +390,7 @@ def unequip_pet_from_slot(user_id, slot):
     # Desequipar pet
     pet_in_slot.is_equipped = False
     pet_in_slot.slot_position = None
+    invalidate_buffs(user_id)
     
     db.session.commit()
     
@@ -384,18 +403,18 @@ def unequip_pet_from_slot(user_id, slot):
 @cross_origin()
 def get_slots_info(user_id):
     user = User.query.get_or_404(user_id)
-    
+    return jsonify(slots_info(user))
+
+def slots_info(user):
     slot_prices = {
         2: 3000,   # Segundo slot custa 3000 moedas
         3: 10000   # Terceiro slot custa 10000 moedas
     }
     
-    slots_info = {
+    return {
         'current_slots': user.pet_slots,
         'max_slots': 3,
         'next_slot_price': slot_prices.get(user.pet_slots + 1),
         'can_buy_next_slot': user.pet_slots < 3 and user.coins >= slot_prices.get(user.pet_slots + 1, 0)
     }
-    
-    return jsonify(slots_info)
 
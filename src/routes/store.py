@@ -3,15 +3,28 @@ from flask import Blueprint, request, jsonify
 from flask_cors import cross_origin
 from src.models.user import db, User
 from src.models.store import StoreItem, Purchase
+from src.utils.achievement_evaluator import record_purchase
+from src.utils.load_plans import load_plan
+from src.utils.versions import conditional_get
+from src.utils.pagination import PageError, page_request, fetch_page, project, paged_response
+from src.utils.serializers import STORE_ITEM_SERIALIZER
 
 store_bp = Blueprint('store', __name__)
 
+# Campos aceitos em ?fields= (chaves de Purchase.to_dict)
+PURCHASE_FIELDS = (
+    'id', 'user_id', 'store_item', 'quantity', 'total_cost', 'purchased_at', 'is_redeemed', 'redeemed_at'
+)
+
 # Listar todos os itens da loja ativos
 @store_bp.route('/store/items', methods=['GET'])
 @cross_origin()
+@conditional_get(catalogs=('store_items',))
 def get_store_items():
-    items = StoreItem.query.filter_by(is_active=True).all()
-    return jsonify([item.to_dict() for item in items])
+    rows = db.session.execute(
+        STORE_ITEM_SERIALIZER.select().where(StoreItem.is_active == True).order_by(StoreItem.id)
+    ).all()
+    return jsonify(STORE_ITEM_SERIALIZER.serialize(rows))
 
 # Criar novo item na loja
 @store_bp.route('/store/items', methods=['POST'])
@@ -113,6 +126,10 @@ def purchase_item(user_id):
     )
     
     db.session.add(purchase)
+    
+    # Atualizar contadores de compras e verificar conquistas
+    record_purchase(user, quantity, total_cost)
+    
     db.session.commit()
     
     return jsonify({
@@ -127,9 +144,16 @@ def purchase_item(user_id):
 # Listar compras do usuário
 @store_bp.route('/users/<int:user_id>/purchases', methods=['GET'])
 @cross_origin()
+@conditional_get(user=True, catalogs=('store_items',))
 def get_user_purchases(user_id):
-    purchases = Purchase.query.filter_by(user_id=user_id).order_by(Purchase.purchased_at.desc()).all()
-    return jsonify([purchase.to_dict() for purchase in purchases])
+    try:
+        limit, cursor, fields = page_request(PURCHASE_FIELDS)
+    except PageError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query = Purchase.query.options(*load_plan('purchases')).filter_by(user_id=user_id)
+    purchases, next_cursor = fetch_page(query, Purchase.purchased_at, Purchase.id, limit, cursor)
+    return paged_response(project([purchase.to_dict() for purchase in purchases], fields), next_cursor)
 
 # Resgatar item comprado
 @store_bp.route('/purchases/<int:purchase_id>/redeem', methods=['POST'])
@@ -153,7 +177,14 @@ def redeem_purchase(purchase_id):
 # Listar itens não resgatados do usuário
 @store_bp.route('/users/<int:user_id>/inventory', methods=['GET'])
 @cross_origin()
+@conditional_get(user=True, catalogs=('store_items',))
 def get_user_inventory(user_id):
-    purchases = Purchase.query.filter_by(user_id=user_id, is_redeemed=False).order_by(Purchase.purchased_at.desc()).all()
-    return jsonify([purchase.to_dict() for purchase in purchases])
+    try:
+        limit, cursor, fields = page_request(PURCHASE_FIELDS)
+    except PageError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query = Purchase.query.options(*load_plan('inventory')).filter_by(user_id=user_id, is_redeemed=False)
+    purchases, next_cursor = fetch_page(query, Purchase.purchased_at, Purchase.id, limit, cursor)
+    return paged_response(project([purchase.to_dict() for purchase in purchases], fields), next_cursor)
 
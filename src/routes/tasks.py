@@ -1,21 +1,41 @@
 from flask import Blueprint, jsonify, request
 from flask_cors import cross_origin
 from src.models.user import User, Task, Achievement, UserAchievement, db
+from src.utils.reward_engine import get_buff_vector, compute_rewards
+from src.utils.daily_reset import reset_completed_dailies
+from src.utils.reward_ledger import record_reward, buff_breakdown
+from src.utils.streaks import ensure_activity, local_now, local_date_of, record_completion, record_uncompletion
+from src.utils.achievement_evaluator import snapshot_counters, record_task_completed, record_task_uncompleted
+from src.utils.rng import user_stream
+from src.utils.user_stats import invalidate_stats
+from src.utils.versions import conditional_get
+from src.utils.pagination import PageError, page_request, keyset_page, split_page, paged_response
+from src.utils.serializers import TASK_SERIALIZER
 from datetime import datetime, date, timedelta
 
 tasks_bp = Blueprint('tasks', __name__)
 
+# Campos aceitos em ?fields= (chaves de Task.to_dict)
+TASK_FIELDS = TASK_SERIALIZER.fields
+
 @tasks_bp.route('/users/<int:user_id>/tasks', methods=['GET'])
 @cross_origin()
+@conditional_get(user=True)
 def get_user_tasks(user_id):
     task_type = request.args.get('type')
     
-    query = Task.query.filter_by(user_id=user_id)
+    try:
+        limit, cursor, fields = page_request(TASK_FIELDS)
+    except PageError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query = TASK_SERIALIZER.select().where(Task.user_id == user_id)
     if task_type:
-        query = query.filter_by(task_type=task_type)
+        query = query.where(Task.task_type == task_type)
     
-    tasks = query.order_by(Task.created_at.desc()).all()
-    return jsonify([task.to_dict() for task in tasks])
+    # Com ?limit= ou ?cursor=: páginas por (created_at, id); próximo cursor em X-Next-Cursor
+    rows, next_cursor = fetch_task_rows(query, limit, cursor)
+    return paged_response(TASK_SERIALIZER.serialize(rows, fields), next_cursor)
 
 @tasks_bp.route('/users/<int:user_id>/tasks', methods=['POST'])
 @cross_origin()
@@ -54,6 +74,7 @@ def create_task(user_id):
     )
     
     db.session.add(task)
+    invalidate_stats(user_id)
     db.session.commit()
     return jsonify(task.to_dict()), 201
 
@@ -94,6 +115,7 @@ def update_task(task_id):
             task.xp_reward = rewards['xp']
             task.coin_reward = rewards['coins']
     
+    invalidate_stats(task.user_id)
     db.session.commit()
     return jsonify(task.to_dict())
 
@@ -101,6 +123,7 @@ def update_task(task_id):
 @cross_origin()
 def delete_task(task_id):
     task = Task.query.get_or_404(task_id)
+    invalidate_stats(task.user_id)
     db.session.delete(task)
     db.session.commit()
     return '', 204
@@ -111,117 +134,48 @@ def complete_task(task_id):
     task = Task.query.get_or_404(task_id)
     user = User.query.get_or_404(task.user_id)
     
-    if task.complete_task():
-        # Aplicar buffs dos pets equipados (sistema aditivo)
-        from src.models.pet import UserPet
-        equipped_pets = UserPet.query.filter_by(user_id=user.id, is_equipped=True).all()
-        
-        base_xp = task.xp_reward
-        base_coins = task.coin_reward
+    # Datas no fuso do usuário (mesmo dia usado pelo reset diário)
+    ensure_activity(user)
+    now = local_now(user)
+    today = now.date()
+    
+    if task.complete_task(today):
+        # Primeira tarefa do dia (para o bônus de moedas) sem consultar outras tarefas
+        is_first_task_today = user.last_activity_date != today
         
-        if equipped_pets:
-            # Coletar todos os efeitos de todos os pets equipados
-            total_xp_bonus = 0
-            total_coin_bonus = 0
-            total_easy_task_xp_bonus = 0
-            total_hard_task_coin_bonus = 0
-            total_weekend_xp_bonus = 0
-            total_weekend_coin_bonus = 0
-            total_weekday_xp_bonus = 0
-            total_weekday_coin_bonus = 0
-            total_last_task_xp_bonus = 0
-            total_first_task_coin_bonus = 0
-            total_duplicate_coin_chance = 0
-            
-            # Somar todos os buffs de forma aditiva
-            for pet in equipped_pets:
-                effects = pet.get_current_effects()
-                
-                # Buffs gerais
-                total_xp_bonus += effects.get('xp_bonus', 0)
-                total_coin_bonus += effects.get('coin_bonus', 0)
-                
-                # Buffs específicos por dificuldade
-                total_easy_task_xp_bonus += effects.get('easy_task_xp_bonus', 0)
-                total_hard_task_coin_bonus += effects.get('hard_task_coin_bonus', 0)
-                
-                # Buffs de final de semana/dia da semana
-                total_weekend_xp_bonus += effects.get('weekend_xp_bonus', 0)
-                total_weekend_coin_bonus += effects.get('weekend_coin_bonus', 0)
-                total_weekday_xp_bonus += effects.get('weekday_xp_bonus', 0)
-                total_weekday_coin_bonus += effects.get('weekday_coin_bonus', 0)
-                
-                # Buffs especiais
-                total_last_task_xp_bonus += effects.get('last_task_xp_bonus', 0)
-                total_first_task_coin_bonus += effects.get('first_task_coin_bonus', 0)
-                total_duplicate_coin_chance += effects.get('duplicate_coin_chance', 0)
-            
-            # Aplicar buffs de XP (aditivos)
-            if total_xp_bonus > 0:
-                base_xp = int(base_xp * (1 + total_xp_bonus))
-            
-            # Aplicar buffs de moedas (aditivos)
-            if total_coin_bonus > 0:
-                base_coins = int(base_coins * (1 + total_coin_bonus))
-            
-            # Buffs específicos por dificuldade
-            if task.difficulty == 'easy' and total_easy_task_xp_bonus > 0:
-                base_xp = int(base_xp * (1 + total_easy_task_xp_bonus))
-            
-            if task.difficulty == 'hard' and total_hard_task_coin_bonus > 0:
-                base_coins = int(base_coins * (1 + total_hard_task_coin_bonus))
-            
-            # Buffs de final de semana
-            from datetime import datetime
-            today = datetime.now().weekday()  # 0=Monday, 6=Sunday
-            is_weekend = today >= 5  # Saturday or Sunday
-            
-            if is_weekend:
-                if total_weekend_xp_bonus > 0:
-                    base_xp = int(base_xp * (1 + total_weekend_xp_bonus))
-                if total_weekend_coin_bonus > 0:
-                    base_coins = int(base_coins * (1 + total_weekend_coin_bonus))
-            else:
-                if total_weekday_xp_bonus > 0:
-                    base_xp = int(base_xp * (1 + total_weekday_xp_bonus))
-                if total_weekday_coin_bonus > 0:
-                    base_coins = int(base_coins * (1 + total_weekday_coin_bonus))
-            
-            # Buffs especiais
-            if total_first_task_coin_bonus > 0:
-                # Verificar se é a primeira tarefa do dia
-                from datetime import date
-                today_tasks = Task.query.filter(
-                    Task.user_id == user.id,
-                    Task.completed == True,
-                    db.func.date(Task.completed_at) == date.today()
-                ).count()
-                
-                if today_tasks == 1:  # Esta é a primeira tarefa do dia
-                    base_coins += int(total_first_task_coin_bonus)
-            
-            if total_last_task_xp_bonus > 0:
-                # Aplicar bônus na última tarefa (simplificado - aplicar sempre)
-                base_xp = int(base_xp * (1 + total_last_task_xp_bonus))
-            
-            # Chance de duplicar moedas (limitada a 100%)
-            if total_duplicate_coin_chance > 0:
-                import random
-                chance = min(total_duplicate_coin_chance, 1.0)  # Máximo 100%
-                if random.random() < chance:
-                    base_coins *= 2
+        # Aplicar buffs dos pets equipados (vetor pré-calculado por usuário)
+        buffs = get_buff_vector(user)
+        # Moedas em dobro sorteadas numa sequência do usuário; semente e posição vão para o ledger
+        seed, rng = user_stream(user.id) if buffs.duplicate_coin_chance > 0 else (None, None)
+        base_xp, base_coins = compute_rewards(
+            task, buffs, is_first_task_today=is_first_task_today, now=now, rng=rng
+        )
         
         # Adicionar XP e moedas ao usuário com buffs aplicados
+        counters_before = snapshot_counters(user)
         level_up = user.add_xp(base_xp)
         user.add_coins(base_coins)
         
-        # Verificar conquistas
-        check_achievements(user)
+        # Registrar o dia no histórico de atividade (atualiza a sequência de dias)
+        record_completion(user, today)
+        
+        # Lançar a recompensa concedida no ledger e no total diário
+        record_reward(
+            user, today, base_xp, base_coins,
+            task_id=task.id,
+            buffs=buff_breakdown(task, buffs, is_first_task_today),
+            rng_seed=seed,
+            draw_index=0 if seed is not None else None
+        )
+        
+        # Atualizar contadores e verificar conquistas recém-alcançadas
+        record_task_completed(user, task, is_first_task_today, counters_before, now=now)
         
         # Se for missão única, agendar para deletar em 2 minutos
         if task.task_type == 'unique':
             task.auto_delete_at = datetime.utcnow() + timedelta(minutes=2)
         
+        invalidate_stats(user.id)
         db.session.commit()
         
         return jsonify({
@@ -242,6 +196,12 @@ def uncomplete_task(task_id):
     task = Task.query.get_or_404(task_id)
     
     if task.completed:
+        user = task.user
+        ensure_activity(user)
+        completed_on = local_date_of(user, task.completed_at) if task.completed_at else None
+        if completed_on:
+            record_uncompletion(user, completed_on)
+        
         task.completed = False
         task.completed_at = None
         
@@ -249,6 +209,9 @@ def uncomplete_task(task_id):
         if task.task_type == 'habit' and task.streak > 0:
             task.streak -= 1
         
+        record_task_uncompleted(user, completed_today=completed_on == local_now(user).date())
+        invalidate_stats(user.id)
+        
         db.session.commit()
         return jsonify(task.to_dict())
     else:
@@ -258,46 +221,10 @@ def uncomplete_task(task_id):
 @cross_origin()
 def reset_daily_tasks(user_id):
     """Reseta todas as tarefas diárias do usuário"""
-    daily_tasks = Task.query.filter_by(user_id=user_id, task_type='daily').all()
-    
-    for task in daily_tasks:
-        task.reset_daily_task()
+    reset_count = reset_completed_dailies(user_ids=[user_id])
     
     db.session.commit()
-    return jsonify({'message': f'Resetadas {len(daily_tasks)} tarefas diárias'})
-
-def check_achievements(user):
-    """Verifica se o usuário desbloqueou novas conquistas"""
-    # Buscar todas as conquistas que o usuário ainda não tem
-    earned_achievement_ids = [ua.achievement_id for ua in user.achievements]
-    available_achievements = Achievement.query.filter(~Achievement.id.in_(earned_achievement_ids)).all()
-    
-    for achievement in available_achievements:
-        earned = False
-        
-        if achievement.condition_type == 'level_reached':
-            earned = user.level >= achievement.condition_value
-        elif achievement.condition_type == 'tasks_completed':
-            completed_count = Task.query.filter_by(user_id=user.id, completed=True).count()
-            earned = completed_count >= achievement.condition_value
-        elif achievement.condition_type == 'streak':
-            max_streak = db.session.query(db.func.max(Task.streak)).filter_by(
-                user_id=user.id, task_type='habit'
-            ).scalar() or 0
-            earned = max_streak >= achievement.condition_value
-        
-        if earned:
-            user_achievement = UserAchievement(
-                user_id=user.id,
-                achievement_id=achievement.id
-            )
-            db.session.add(user_achievement)
-            
-            # Adicionar recompensas da conquista
-            user.add_xp(achievement.xp_reward)
-            user.add_coins(achievement.coin_reward)
-
-
+    return jsonify({'message': f'Resetadas {reset_count} tarefas diárias'})
 
 @tasks_bp.route('/tasks/cleanup-expired', methods=['POST'])
 @cross_origin()
@@ -312,6 +239,8 @@ def cleanup_expired_tasks():
     
     deleted_count = len(expired_tasks)
     
+    if expired_tasks:
+        invalidate_stats(list({task.user_id for task in expired_tasks}))
     for task in expired_tasks:
         db.session.delete(task)
     
@@ -326,15 +255,34 @@ def cleanup_expired_tasks():
 @cross_origin()
 def get_active_user_tasks(user_id):
     """Retorna apenas tarefas ativas (não expiradas)"""
+    try:
+        limit, cursor, fields = page_request(TASK_FIELDS)
+    except PageError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    rows, next_cursor = fetch_task_rows(active_tasks_query(user_id), limit, cursor)
+    return paged_response(TASK_SERIALIZER.serialize(rows, fields), next_cursor)
+
+def active_tasks_query(user_id):
     now = datetime.utcnow()
     
     # Buscar tarefas que não estão marcadas para auto-exclusão ou ainda não expiraram
-    tasks = Task.query.filter_by(user_id=user_id).filter(
+    return TASK_SERIALIZER.select().where(
+        Task.user_id == user_id,
         db.or_(
             Task.auto_delete_at.is_(None),
             Task.auto_delete_at > now
         )
-    ).order_by(Task.created_at.desc()).all()
-    
-    return jsonify([task.to_dict() for task in tasks])
+    )
+
+def fetch_task_rows(query, limit=None, cursor=None):
+    """Executa a consulta de colunas das tarefas; sem limit devolve todas (mais recentes primeiro)"""
+    if limit is None:
+        return db.session.execute(query.order_by(Task.created_at.desc())).all(), None
+    rows = db.session.execute(keyset_page(query, Task.created_at, Task.id, limit, cursor)).all()
+    return split_page(rows, limit, 'created_at')
+
+def list_active_tasks(user_id):
+    rows, _ = fetch_task_rows(active_tasks_query(user_id))
+    return TASK_SERIALIZER.serialize(rows)
 
@@ -1,5 +1,6 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from flask_cors import cross_origin
+from src.models.user import User
 from src.utils.daily_reset import get_time_until_reset
 
 timer_bp = Blueprint('timer', __name__)
@@ -7,7 +8,19 @@ timer_bp = Blueprint('timer', __name__)
 @timer_bp.route('/timer/daily-reset', methods=['GET'])
 @cross_origin()
 def get_daily_reset_timer():
-    """Retorna o tempo restante até o próximo reset diário"""
-    time_info = get_time_until_reset()
+    """Retorna o tempo restante até o próximo reset diário (no fuso do usuário, se informado)"""
+    tz_name = None
+    user_id = request.args.get('user_id', type=int)
+    if user_id:
+        user = User.query.get_or_404(user_id)
+        tz_name = user.timezone
+    
+    time_info = get_time_until_reset(tz_name)
     return jsonify(time_info)
 
+@timer_bp.route('/users/<int:user_id>/timer/daily-reset', methods=['GET'])
+@cross_origin()
+def get_user_daily_reset_timer(user_id):
+    """Retorna o tempo restante até o próximo reset diário no fuso do usuário"""
+    user = User.query.get_or_404(user_id)
+    return jsonify(get_time_until_reset(user.timezone))
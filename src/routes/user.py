@@ -1,6 +1,14 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from flask_cors import cross_origin
 from src.models.user import User, Task, Achievement, UserAchievement, db
+from src.utils.daily_reset import is_valid_timezone, schedule_timezone
+from src.utils.streaks import get_streak, local_today
+from src.utils.reward_ledger import daily_series, delete_user_history
+from src.utils.level_curve import get_level_curve, title_for_level
+from src.utils.user_stats import get_task_stats, invalidate_stats
+from src.utils.versions import conditional_get
+from src.utils.user_export import export_lines, import_history, HistoryImportError
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, date
 
 user_bp = Blueprint('user', __name__)
@@ -22,6 +30,7 @@ def create_user():
 
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
 @cross_origin()
+@conditional_get(user=True)
 def get_user(user_id):
     user = User.query.get_or_404(user_id)
     return jsonify(user.to_dict())
@@ -33,7 +42,15 @@ def update_user(user_id):
     data = request.json
     user.username = data.get('username', user.username)
     user.email = data.get('email', user.email)
+    
+    if 'timezone' in data:
+        if not is_valid_timezone(data['timezone']):
+            return jsonify({'error': 'Fuso horário inválido'}), 400
+        user.timezone = data['timezone']
+    
     db.session.commit()
+    if 'timezone' in data:
+        schedule_timezone(user.timezone)
     return jsonify(user.to_dict())
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
@@ -44,36 +61,44 @@ def delete_user(user_id):
     db.session.commit()
     return '', 204
 
+@user_bp.route('/users/<int:user_id>/export', methods=['GET'])
+@cross_origin()
+def export_user(user_id):
+    """Exporta o histórico completo do usuário como NDJSON em streaming"""
+    User.query.get_or_404(user_id)
+    response = Response(stream_with_context(export_lines(user_id)), mimetype='application/x-ndjson')
+    response.headers['Content-Disposition'] = f'attachment; filename=user-{user_id}-export.ndjson'
+    return response
+
+@user_bp.route('/users/import', methods=['POST'])
+@cross_origin()
+def import_user():
+    """Importa um arquivo de /export lido linha a linha do corpo da requisição
+
+    Sem ?user_id= cria um usuário novo; com ele acrescenta o histórico a um usuário existente.
+    """
+    try:
+        summary = import_history(request.stream, request.args.get('user_id', type=int))
+        db.session.commit()
+        schedule_timezone(db.session.get(User, summary['user_id']).timezone)
+        return jsonify(summary), 201
+    except HistoryImportError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Conflito ao importar: nome de usuário, e-mail ou registros já existem'}), 409
+
 @user_bp.route('/users/<int:user_id>/stats', methods=['GET'])
 @cross_origin()
+@conditional_get(user=True, catalogs=('achievements',))
 def get_user_stats(user_id):
     user = User.query.get_or_404(user_id)
     
-    # Estatísticas das tarefas
-    total_tasks = Task.query.filter_by(user_id=user_id).count()
-    completed_tasks = Task.query.filter_by(user_id=user_id, completed=True).count()
-    
-    # Tarefas por tipo
-    habits = Task.query.filter_by(user_id=user_id, task_type='habit').count()
-    dailies = Task.query.filter_by(user_id=user_id, task_type='daily').count()
-    uniques = Task.query.filter_by(user_id=user_id, task_type='unique').count()
-    
-    # Conquistas
-    achievements_earned = UserAchievement.query.filter_by(user_id=user_id).count()
-    total_achievements = Achievement.query.count()
-    
+    # Uma consulta agregada por versão de estatísticas; conquistas vêm do contador do usuário
     return jsonify({
         'user': user.to_dict(),
-        'stats': {
-            'total_tasks': total_tasks,
-            'completed_tasks': completed_tasks,
-            'completion_rate': (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0,
-            'habits': habits,
-            'dailies': dailies,
-            'uniques': uniques,
-            'achievements_earned': achievements_earned,
-            'total_achievements': total_achievements
-        }
+        'stats': get_task_stats(user)
     })
 
 @user_bp.route('/users/<int:user_id>/login', methods=['POST'])
@@ -89,7 +114,8 @@ def user_login(user_id):
 @cross_origin()
 def reset_user_progress(user_id):
     """Reset completo do progresso do usuário"""
-    from src.models.user import Purchase
+    from src.models.store import Purchase
+    from src.utils.achievement_evaluator import reset_counters
     
     user = User.query.get_or_404(user_id)
     
@@ -98,8 +124,8 @@ def reset_user_progress(user_id):
     user.xp = 0
     user.coins = 0
     user.avatar_stage = 1
-    user.tasks_completed = 0
-    user.total_coins_earned = 0
+    user.last_activity_date = None
+    reset_counters(user)
     
     # Deletar todas as tarefas do usuário
     Task.query.filter_by(user_id=user_id).delete()
@@ -110,6 +136,10 @@ def reset_user_progress(user_id):
     # Deletar todas as compras do usuário
     Purchase.query.filter_by(user_id=user_id).delete()
     
+    # Deletar o histórico de recompensas do usuário
+    delete_user_history(user_id)
+    
+    invalidate_stats(user_id)
     db.session.commit()
     
     return jsonify({
@@ -119,28 +149,7 @@ def reset_user_progress(user_id):
 
 def get_level_title(level):
     """Retorna o título baseado no nível do usuário"""
-    if level >= 50:
-        return "Lenda Suprema"
-    elif level >= 45:
-        return "Mestre Absoluto"
-    elif level >= 40:
-        return "Grande Mestre"
-    elif level >= 35:
-        return "Mestre Sênior"
-    elif level >= 30:
-        return "Mestre"
-    elif level >= 25:
-        return "Especialista Avançado"
-    elif level >= 20:
-        return "Especialista"
-    elif level >= 15:
-        return "Veterano"
-    elif level >= 10:
-        return "Experiente"
-    elif level >= 5:
-        return "Aprendiz"
-    else:
-        return "Novato"
+    return title_for_level(level)
 
 @user_bp.route('/users/<int:user_id>/title', methods=['GET'])
 @cross_origin()
@@ -158,87 +167,31 @@ def get_user_streak(user_id):
     """Retorna o streak de tarefas do usuário"""
     user = User.query.get_or_404(user_id)
     
-    # Calcular streak baseado nas tarefas completadas
-    from datetime import datetime, timedelta
-    
-    # Buscar tarefas completadas ordenadas por data
-    completed_tasks = Task.query.filter_by(
-        user_id=user_id, 
-        completed=True
-    ).order_by(Task.completed_at.desc()).all()
-    
-    if not completed_tasks:
-        return jsonify({'streak': 0, 'last_activity': None})
-    
-    # Calcular streak consecutivo
-    streak = 0
-    current_date = datetime.now().date()
-    
-    # Verificar se completou tarefa hoje
-    today_tasks = [task for task in completed_tasks 
-                   if task.completed_at and task.completed_at.date() == current_date]
-    
-    if today_tasks:
-        streak = 1
-        check_date = current_date - timedelta(days=1)
-    else:
-        # Se não completou hoje, verificar se completou ontem
-        yesterday = current_date - timedelta(days=1)
-        yesterday_tasks = [task for task in completed_tasks 
-                          if task.completed_at and task.completed_at.date() == yesterday]
-        if yesterday_tasks:
-            streak = 1
-            check_date = yesterday - timedelta(days=1)
-        else:
-            return jsonify({'streak': 0, 'last_activity': completed_tasks[0].completed_at.isoformat()})
-    
-    # Contar dias consecutivos
-    while True:
-        day_tasks = [task for task in completed_tasks 
-                    if task.completed_at and task.completed_at.date() == check_date]
-        if day_tasks:
-            streak += 1
-            check_date -= timedelta(days=1)
-        else:
-            break
-    
-    return jsonify({
-        'streak': streak,
-        'last_activity': completed_tasks[0].completed_at.isoformat()
-    })
+    # Leitura O(1) do histórico de atividade (somente leitura, ver get_streak)
+    return jsonify(get_streak(user))
 
 @user_bp.route('/users/<int:user_id>/xp-progress', methods=['GET'])
 @cross_origin()
 def get_user_xp_progress(user_id):
-    """Retorna o progresso de XP dos últimos 5 dias"""
+    """Retorna o progresso de XP dos últimos dias (5 por padrão, até 365 via ?days=)"""
     user = User.query.get_or_404(user_id)
+    return jsonify(xp_progress(user, xp_progress_window()))
+
+def xp_progress_window():
+    return min(max(request.args.get('days', 5, type=int), 1), 365)
+
+def xp_progress(user, window):
+    # Uma leitura por faixa na tabela de totais diários (XP realmente concedido)
+    series = daily_series(user.id, local_today(user), window)
+    days = [entry['day'].strftime('%d/%m') for entry in series]
+    xp_data = [entry['xp'] for entry in series]
     
-    from datetime import datetime, timedelta
-    
-    # Calcular os últimos 5 dias
-    today = datetime.now().date()
-    days = []
-    xp_data = []
-    
-    for i in range(4, -1, -1):  # 4, 3, 2, 1, 0 (últimos 5 dias)
-        day = today - timedelta(days=i)
-        days.append(day.strftime('%d/%m'))
-        
-        # Buscar tarefas completadas neste dia
-        day_tasks = Task.query.filter_by(
-            user_id=user_id,
-            completed=True
-        ).filter(
-            db.func.date(Task.completed_at) == day
-        ).all()
-        
-        # Somar XP do dia
-        day_xp = sum(task.xp_reward for task in day_tasks)
-        xp_data.append(day_xp)
-    
-    return jsonify({
+    return {
         'days': days,
         'xp_data': xp_data,
-        'total_xp': sum(xp_data)
-    })
+        'coin_data': [entry['coins'] for entry in series],
+        'tasks_data': [entry['tasks_completed'] for entry in series],
+        'total_xp': sum(xp_data),
+        'level_progress': get_level_curve().progress(user.xp)
+    }
 
@@ -0,0 +1,216 @@
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import datetime, timedelta
+from flask import g, has_request_context
+from sqlalchemy import event
+from src.models.user import db, Task, Achievement, UserAchievement
+from src.utils.db_profile import RoutingSession
+from src.utils.reward_ledger import record_reward
+from src.utils.streaks import local_today
+from src.utils.versions import catalog_version
+
+# condition_type -> atributo do usuário que funciona como contador da condição
+CONDITION_COUNTERS = {
+    'tasks_completed': 'tasks_completed',
+    'level_reached': 'level',
+    'streak': 'max_streak',
+    'achievements_unlocked': 'achievements_unlocked',
+    'items_bought': 'items_bought',
+    'coins_spent': 'total_coins_spent',
+    'coins_earned': 'total_coins_earned',
+    'early_bird': 'early_bird_tasks',
+    'night_owl': 'night_owl_tasks',
+    'weekend_warrior': 'weekend_tasks',
+    'daily_sprint': 'tasks_today',
+    'perfect_week': 'perfect_days',
+}
+
+EARLY_BIRD_HOUR = 6   # Antes das 6h
+NIGHT_OWL_HOUR = 23   # A partir das 23h
+
+# Índice de limiares por condition_type: {condition_type: ([valores], [(id, xp, moedas)])}
+# e total de conquistas cadastradas, ambos da versão 'achievements' de catalog_versions
+ThresholdIndex = namedtuple('ThresholdIndex', ('version', 'thresholds', 'total'))
+
+_threshold_index = None
+
+def build_threshold_index(version):
+    rows = db.session.query(
+        Achievement.condition_type,
+        Achievement.condition_value,
+        Achievement.id,
+        Achievement.xp_reward,
+        Achievement.coin_reward
+    ).order_by(Achievement.condition_value, Achievement.id).all()
+
+    thresholds = {}
+    for condition_type, value, achievement_id, xp_reward, coin_reward in rows:
+        if condition_type not in CONDITION_COUNTERS or value is None:
+            continue
+        values, rewards = thresholds.setdefault(condition_type, ([], []))
+        values.append(value)
+        rewards.append((achievement_id, xp_reward or 0, coin_reward or 0))
+
+    return ThresholdIndex(version=version, thresholds=thresholds, total=len(rows))
+
+def get_threshold_index():
+    """Retorna o índice de limiares do processo, recarregando quando a versão no banco muda
+
+    Assim conquistas criadas, alteradas ou removidas por outros workers ou pela CLI
+    também valem aqui (mesmo esquema de get_pet_catalog).
+    """
+    global _threshold_index
+    version = catalog_version('achievements')
+    index = _threshold_index
+    if index is None or index.version != version:
+        index = build_threshold_index(version)
+        _threshold_index = index
+    return index
+
+def get_achievement_total():
+    """Número de conquistas cadastradas (contado junto com o índice de limiares)"""
+    return get_threshold_index().total
+
+def invalidate_threshold_index():
+    """Descarta o índice de limiares e a versão lida nesta requisição"""
+    global _threshold_index
+    _threshold_index = None
+    if has_request_context():
+        g.get('catalog_versions', {}).pop('achievements', None)
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _track_achievement_changes(session, flush_context):
+    if any(isinstance(obj, Achievement) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info['achievements_changed'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _achievements_committed(session):
+    # Só depois do commit: um índice montado com dados não confirmados não fica em cache
+    if session.info.pop('achievements_changed', False):
+        invalidate_threshold_index()
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _achievements_rolled_back(session):
+    if session.info.pop('achievements_changed', False):
+        invalidate_threshold_index()
+
+def snapshot_counters(user):
+    """Captura os contadores do usuário antes de um evento"""
+    return {
+        condition_type: getattr(user, attribute) or 0
+        for condition_type, attribute in CONDITION_COUNTERS.items()
+    }
+
+def crossed_thresholds(thresholds, condition_type, old_value, new_value):
+    """Retorna as conquistas cujo limiar foi cruzado entre old_value e new_value"""
+    entry = thresholds.get(condition_type)
+    if not entry or new_value <= old_value:
+        return []
+    values, rewards = entry
+    return rewards[bisect_right(values, old_value):bisect_right(values, new_value)]
+
+def evaluate_achievements(user, before):
+    """Desbloqueia apenas as conquistas recém-alcançadas desde o snapshot `before`"""
+    unlocked = []
+    thresholds = get_threshold_index().thresholds
+
+    while True:
+        candidates = []
+        for condition_type, old_value in before.items():
+            new_value = getattr(user, CONDITION_COUNTERS[condition_type]) or 0
+            candidates.extend(crossed_thresholds(thresholds, condition_type, old_value, new_value))
+
+        if not candidates:
+            break
+
+        # Ignorar conquistas já obtidas (só consulta quando algum limiar foi cruzado)
+        candidate_ids = [achievement_id for achievement_id, _, _ in candidates]
+        earned_ids = {
+            row.achievement_id for row in db.session.query(UserAchievement.achievement_id).filter(
+                UserAchievement.user_id == user.id,
+                UserAchievement.achievement_id.in_(candidate_ids)
+            )
+        }
+
+        # Recompensas podem cruzar novos limiares (nível, moedas, conquistas)
+        before = snapshot_counters(user)
+        for achievement_id, xp_reward, coin_reward in candidates:
+            if achievement_id in earned_ids:
+                continue
+            earned_ids.add(achievement_id)
+
+            db.session.add(UserAchievement(user_id=user.id, achievement_id=achievement_id))
+            user.achievements_unlocked = (user.achievements_unlocked or 0) + 1
+            user.add_xp(xp_reward)
+            user.add_coins(coin_reward)
+            record_reward(user, local_today(user), xp_reward, coin_reward,
+                          source='achievement', achievement_id=achievement_id)
+            unlocked.append(achievement_id)
+
+    if unlocked:
+        # Import local: user_stats depende deste módulo (get_achievement_total)
+        from src.utils.user_stats import invalidate_stats
+        invalidate_stats(user.id)
+
+    return unlocked
+
+def record_task_completed(user, task, is_first_task_today, before, now=None):
+    """Atualiza os contadores após completar uma tarefa e avalia conquistas
+
+    `before` é o snapshot tirado antes de aplicar o XP e as moedas da tarefa.
+    """
+    now = now or datetime.now()
+
+    user.tasks_completed = (user.tasks_completed or 0) + 1
+    user.tasks_today = 1 if is_first_task_today else (user.tasks_today or 0) + 1
+
+    if now.hour < EARLY_BIRD_HOUR:
+        user.early_bird_tasks = (user.early_bird_tasks or 0) + 1
+    if now.hour >= NIGHT_OWL_HOUR:
+        user.night_owl_tasks = (user.night_owl_tasks or 0) + 1
+    if now.weekday() >= 5:
+        user.weekend_tasks = (user.weekend_tasks or 0) + 1
+
+    if task.task_type == 'daily':
+        _record_perfect_day(user, now.date())
+
+    return evaluate_achievements(user, before)
+
+def record_task_uncompleted(user, completed_today=False):
+    """Desfaz a contagem da tarefa (as conquistas já obtidas são mantidas)
+
+    `completed_today`: a tarefa tinha sido completada hoje, então também sai de tasks_today.
+    """
+    if user.tasks_completed:
+        user.tasks_completed -= 1
+    if completed_today and user.tasks_today:
+        user.tasks_today -= 1
+
+def record_purchase(user, quantity, total_cost):
+    """Atualiza os contadores após uma compra na loja e avalia conquistas"""
+    before = snapshot_counters(user)
+    user.items_bought = (user.items_bought or 0) + quantity
+    user.total_coins_spent = (user.total_coins_spent or 0) + total_cost
+    return evaluate_achievements(user, before)
+
+def reset_counters(user):
+    """Zera todos os contadores de conquistas do usuário"""
+    for attribute in CONDITION_COUNTERS.values():
+        if attribute != 'level':
+            setattr(user, attribute, 0)
+    user.last_perfect_date = None
+
+def _record_perfect_day(user, today):
+    """Conta dias seguidos em que todas as tarefas diárias foram completadas"""
+    if user.last_perfect_date == today:
+        return
+
+    pending_dailies = Task.query.filter_by(user_id=user.id, task_type='daily', completed=False).count()
+    if pending_dailies:
+        return
+
+    if user.last_perfect_date == today - timedelta(days=1):
+        user.perfect_days = (user.perfect_days or 0) + 1
+    else:
+        user.perfect_days = 1
+    user.last_perfect_date = today
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
+ASSETS_DIR = os.path.join(STATIC_DIR, 'assets')
+GENERATED_DIR = os.path.join(STATIC_DIR, 'generated')  # Saída de `flask assets-build` (fora do git)
+MANIFEST_PATH = os.path.join(GENERATED_DIR, 'manifest.json')
+GENERATED_URL = '/generated'
+ASSET_ROUTE = '/api/assets'
+
+DEFAULT_ASSET_WIDTH = 256  # Largura servida sem ?w= (os cards mostram os sprites pequenos)
+MAX_ASSET_WIDTH = 4096
+MANIFEST_CHECK_INTERVAL = 1.0  # Segundos entre verificações do mtime do manifest.json
+
+# Formatos em ordem de preferência; png é o fallback aceito por qualquer navegador
+FORMAT_MIMETYPES = {
+    'avif': 'image/avif',
+    'webp': 'image/webp',
+    'png': 'image/png',
+}
+
+# Nome lógico do asset: o arquivo do Vite sem o hash (pet_comum_cao-C89ts5qK.png -> pet_comum_cao)
+_HASHED_NAME = re.compile(r'^(?P<name>.+)-[A-Za-z0-9_-]{8}$')
+
+_manifest = None
+_manifest_mtime = None
+_checked_at = 0.0
+_lock = threading.Lock()
+_reload_callbacks = []
+
+def logical_name(filename):
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    match = _HASHED_NAME.match(stem)
+    return match.group('name') if match else stem
+
+def source_images():
+    """{nome lógico: caminho} das imagens originais em static/assets"""
+    if not os.path.isdir(ASSETS_DIR):
+        return {}
+    return {
+        logical_name(filename): os.path.join(ASSETS_DIR, filename)
+        for filename in sorted(os.listdir(ASSETS_DIR))
+        if filename.lower().endswith('.png')
+    }
+
+def read_manifest(path=MANIFEST_PATH):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'version': 1, 'assets': {}, 'atlases': {}}
+
+def manifest_mtime(path=MANIFEST_PATH):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def load_asset_manifest():
+    """Manifesto e índice das imagens originais, como ficam em cache"""
+    data = read_manifest()
+    atlases = data.get('atlases', {})
+    return {
+        'assets': data.get('assets', {}),
+        'atlases': atlases,
+        'frames': atlas_frame_index(atlases),
+        'sources': source_images(),
+        # Entra no ETag das respostas que citam URLs geradas (mudam a cada build)
+        'digest': hashlib.blake2b(
+            json.dumps(data, sort_keys=True).encode(), digest_size=8
+        ).hexdigest()
+    }
+
+def get_asset_manifest():
+    """Manifesto do processo, recarregado quando o mtime do manifest.json muda
+
+    `flask assets-build` roda em outro processo: sem a verificação, os workers em execução
+    continuariam citando arquivos que o build acabou de apagar. O mtime é consultado no
+    máximo a cada MANIFEST_CHECK_INTERVAL segundos.
+    """
+    global _manifest, _manifest_mtime, _checked_at
+    manifest = _manifest
+    now = time.monotonic()
+    if manifest is not None and now - _checked_at < MANIFEST_CHECK_INTERVAL:
+        return manifest
+
+    reloaded = False
+    with _lock:
+        mtime = manifest_mtime()
+        if _manifest is None or mtime != _manifest_mtime:
+            reloaded = _checked_at > 0  # A primeira carga não é recarga
+            _manifest = load_asset_manifest()
+            _manifest_mtime = mtime
+        _checked_at = now
+        manifest = _manifest
+
+    if reloaded:
+        for callback in _reload_callbacks:
+            callback()
+    return manifest
+
+def on_manifest_reload(callback):
+    """Registra uma função chamada sempre que o manifesto for recarregado (novo build)"""
+    _reload_callbacks.append(callback)
+
+def invalidate_asset_manifest():
+    global _manifest
+    with _lock:
+        _manifest = None
+
+def sprite_url(sprite_path):
+    """URL negociada (formato e largura) para um sprite_path como '/sprites/pet_comum_cao.png'
+
+    Caminhos sem imagem correspondente em static/assets são devolvidos como estão.
+    """
+    if not sprite_path:
+        return sprite_path
+    name = logical_name(sprite_path)
+    manifest = get_asset_manifest()
+    if name in manifest['assets'] or name in manifest['sources']:
+        return f'{ASSET_ROUTE}/{name}'
+    return sprite_path
+
+def accepted_formats(accept):
+    """Formatos aceitos pelo cliente, em ordem de preferência
+
+    Só conta o tipo explícito no Accept: navegadores sem AVIF também mandam */*.
+    """
+    explicit = {value for value, quality in accept if quality > 0}
+    return [
+        fmt for fmt, mimetype in FORMAT_MIMETYPES.items()
+        if fmt == 'png' or mimetype in explicit
+    ]
+
+def choose_variant(entry, formats, width):
+    """Menor variante com largura >= width no formato preferido (ou a maior disponível)"""
+    for fmt in formats:
+        variants = sorted(
+            (variant for variant in entry['variants'] if variant['format'] == fmt),
+            key=lambda variant: variant['width']
+        )
+        if not variants:
+            continue
+        for variant in variants:
+            if variant['width'] >= width:
+                return variant
+        return variants[-1]
+    return None
+
+def variant_file(variant):
+    return os.path.join(GENERATED_DIR, os.path.basename(variant['path']))
+
+def atlas_frame_index(atlases):
+    """{nome lógico: grupo} para achar o atlas de um sprite sem varrer todos"""
+    return {
+        name: group
+        for group, atlas in atlases.items()
+        for name in atlas['names']
+    }
+
+def atlas_sheet_info(sheet, name):
+    return {
+        'frame_size': sheet['frame_size'],
+        'width': sheet['width'],
+        'height': sheet['height'],
+        'images': sheet['images'],
+        'frame': sheet['frames'][name]
+    }
+
+def atlas_frame(sprite_path):
+    """Atlas e retângulo do sprite no menor tamanho de quadro, com a folha 2x para telas densas
+
+    None quando o sprite não está em nenhum atlas (assets-build não executado ou pet novo).
+    """
+    if not sprite_path:
+        return None
+    name = logical_name(sprite_path)
+    manifest = get_asset_manifest()
+    group = manifest['frames'].get(name)
+    if group is None:
+        return None
+
+    sheets = manifest['atlases'][group]['sheets']
+    info = atlas_sheet_info(sheets[0], name)
+    info['group'] = group
+    if len(sheets) > 1:
+        info['images_2x'] = sheets[1]['images']
+    return info
@@ -0,0 +1,184 @@
+import hashlib
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from src.utils.asset_manifest import (
+    DEFAULT_ASSET_WIDTH, GENERATED_DIR, GENERATED_URL, MANIFEST_PATH,
+    choose_variant, invalidate_asset_manifest, read_manifest, source_images
+)
+
+try:
+    from PIL import Image, features
+except ImportError:  # Pillow é opcional: só o comando assets-build precisa dele
+    Image = None
+
+ASSET_WIDTHS = (128, 256, 512)
+ASSET_FORMATS = ('avif', 'webp', 'png')
+
+# Parâmetros de codificação por formato
+ENCODE_OPTIONS = {
+    'avif': {'format': 'AVIF', 'quality': 60},
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'png': {'format': 'PNG', 'optimize': True},
+}
+
+def content_hash(data, length=10):
+    return hashlib.blake2b(data, digest_size=8).hexdigest()[:length]
+
+def supported_formats(formats):
+    """Formatos que o Pillow instalado consegue gravar (AVIF depende da versão e da build)"""
+    if Image is None:
+        raise RuntimeError('Pillow não está instalado (pip install Pillow)')
+    available = []
+    for fmt in formats:
+        if fmt in ('avif', 'webp') and not features.check(fmt):
+            continue
+        available.append(fmt)
+    return available
+
+def write_atomic(path, data):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def build_entry(name, source_path, source_hash, widths, formats, output_dir=GENERATED_DIR):
+    """Gera as variantes de uma imagem; roda num processo do pool"""
+    with Image.open(source_path) as image:
+        image.load()
+        original_width, original_height = image.size
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+
+        variants = []
+        for width in sorted({min(width, original_width) for width in widths}):
+            height = max(1, round(original_height * width / original_width))
+            resized = image if width == original_width else image.resize((width, height), Image.LANCZOS)
+            for fmt in formats:
+                buffer = io.BytesIO()
+                resized.save(buffer, **ENCODE_OPTIONS[fmt])
+                data = buffer.getvalue()
+                filename = f'{name}.{width}w.{content_hash(data)}.{fmt}'
+                path = os.path.join(output_dir, filename)
+                if not os.path.exists(path):
+                    write_atomic(path, data)
+                variants.append({
+                    'width': width,
+                    'height': height,
+                    'format': fmt,
+                    'path': f'{GENERATED_URL}/{filename}',
+                    'bytes': len(data)
+                })
+
+    return {
+        'source': source_path,
+        'source_hash': source_hash,
+        'source_bytes': os.path.getsize(source_path),
+        'width': original_width,
+        'height': original_height,
+        'variants': variants
+    }
+
+def manifest_files(manifest):
+    """Arquivos de GENERATED_DIR citados pelo manifesto (variantes e folhas dos atlas)"""
+    files = {
+        os.path.basename(variant['path'])
+        for entry in manifest.get('assets', {}).values()
+        for variant in entry['variants']
+    }
+    files.update(
+        os.path.basename(url)
+        for atlas in manifest.get('atlases', {}).values()
+        for sheet in atlas['sheets']
+        for url in sheet['images'].values()
+    )
+    return files
+
+def save_manifest(manifest, output_dir=GENERATED_DIR, manifest_path=MANIFEST_PATH):
+    """Grava o manifesto, apaga os arquivos gerados que ele não cita mais e recarrega o cache
+
+    Os arquivos do build anterior ficam até o próximo: workers que ainda não recarregaram
+    o manifesto (e respostas já entregues) continuam apontando para eles.
+    Retorna quantos arquivos foram removidos.
+    """
+    previous = read_manifest(manifest_path)
+    write_atomic(manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode())
+
+    referenced = manifest_files(manifest) | manifest_files(previous)
+    referenced.add(os.path.basename(manifest_path))
+    removed = 0
+    for filename in os.listdir(output_dir):
+        if filename not in referenced and os.path.isfile(os.path.join(output_dir, filename)):
+            os.remove(os.path.join(output_dir, filename))
+            removed += 1
+
+    invalidate_asset_manifest()
+    return removed
+
+def _is_current(entry, source_hash, widths, formats, output_dir):
+    if entry is None or entry.get('source_hash') != source_hash:
+        return False
+    if entry.get('widths') != list(widths) or entry.get('formats') != list(formats):
+        return False
+    return all(
+        os.path.exists(os.path.join(output_dir, os.path.basename(variant['path'])))
+        for variant in entry['variants']
+    )
+
+def build_assets(widths=ASSET_WIDTHS, formats=ASSET_FORMATS, force=False, jobs=None,
+                 output_dir=GENERATED_DIR, manifest_path=MANIFEST_PATH):
+    """Gera larguras e formatos de cada PNG de static/assets e grava o manifesto
+
+    Incremental: imagens com o mesmo hash de origem e a mesma configuração são mantidas.
+    Arquivos gerados que saíram do manifesto são apagados. Retorna um resumo da execução.
+    """
+    formats = supported_formats(formats)
+    widths = sorted(set(widths))
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = read_manifest(manifest_path)
+    previous = manifest.get('assets', {})
+
+    assets = {}
+    pending = {}
+    for name, source_path in source_images().items():
+        with open(source_path, 'rb') as f:
+            source_hash = content_hash(f.read())
+        entry = previous.get(name)
+        if not force and _is_current(entry, source_hash, widths, formats, output_dir):
+            assets[name] = entry
+        else:
+            pending[name] = (source_path, source_hash)
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            name: pool.submit(build_entry, name, source_path, source_hash, widths, formats, output_dir)
+            for name, (source_path, source_hash) in pending.items()
+        }
+        for name, future in futures.items():
+            entry = future.result()
+            entry['source'] = '/assets/' + os.path.basename(entry['source'])
+            entry['widths'] = widths
+            entry['formats'] = formats
+            assets[name] = entry
+
+    removed = save_manifest({
+        'version': 1,
+        'assets': dict(sorted(assets.items())),
+        'atlases': manifest.get('atlases', {})
+    }, output_dir, manifest_path)
+    return {
+        'assets': len(assets),
+        'rebuilt': len(pending),
+        'formats': formats,
+        'widths': widths,
+        'variants': sum(len(entry['variants']) for entry in assets.values()),
+        'removed': removed,
+        'source_bytes': sum(entry['source_bytes'] for entry in assets.values()),
+        # Bytes servidos a um navegador comum (WebP) na largura padrão, para comparar com as originais
+        'default_bytes': sum(
+            variant['bytes'] for variant in (
+                choose_variant(entry, ['webp', 'png'], DEFAULT_ASSET_WIDTH) for entry in assets.values()
+            ) if variant
+        )
+    }
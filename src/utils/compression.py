@@ -0,0 +1,330 @@
+import threading
+import time
+import zlib
+from itertools import chain
+from flask import request
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele negociamos só zstd/gzip
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard é opcional: sem ele negociamos só br/gzip
+    zstandard = None
+
+COMPRESSION_MIN_BYTES = 1024  # Abaixo disso o cabeçalho e a CPU não compensam
+
+# Tipos comprimíveis (prefixos de Content-Type); imagens e vídeo já vêm comprimidos
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+
+# Níveis pensados para respostas dinâmicas: boa taxa sem pesar na latência
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+class GzipCodec:
+    """gzip via zlib; cada resposta copia um compressor já inicializado em vez de criar outro"""
+    name = 'gzip'
+
+    def __init__(self, level=GZIP_LEVEL):
+        self._template = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        compressor = self._template.copy()
+        return compressor.compress(data) + compressor.flush()
+
+    def stream(self):
+        return self._template.copy()
+
+class _BrotliStream:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.finish()
+
+class BrotliCodec:
+    name = 'br'
+
+    def __init__(self, quality=BROTLI_QUALITY):
+        self.quality = quality
+
+    def compress(self, data):
+        return brotli.compress(data, quality=self.quality)
+
+    def stream(self):
+        return _BrotliStream(self.quality)
+
+class ZstdCodec:
+    """zstd com um ZstdCompressor por thread, reaproveitado entre respostas (não é thread-safe)"""
+    name = 'zstd'
+
+    def __init__(self, level=ZSTD_LEVEL):
+        self.level = level
+        self._local = threading.local()
+
+    def _compressor(self):
+        compressor = getattr(self._local, 'compressor', None)
+        if compressor is None:
+            compressor = zstandard.ZstdCompressor(level=self.level)
+            self._local.compressor = compressor
+        return compressor
+
+    def compress(self, data):
+        return self._compressor().compress(data)
+
+    def stream(self):
+        return self._compressor().compressobj()
+
+def available_codecs():
+    """Codecs instalados, em ordem de preferência do servidor"""
+    codecs = []
+    if zstandard is not None:
+        codecs.append(ZstdCodec())
+    if brotli is not None:
+        codecs.append(BrotliCodec())
+    codecs.append(GzipCodec())
+    return codecs
+
+def negotiate(accept_encoding, codecs):
+    """Codec com a maior qualidade no Accept-Encoding; empates ficam com a ordem do servidor"""
+    if not accept_encoding:
+        return None
+    accept = parse_accept_header(accept_encoding)
+    best, best_quality = None, 0
+    for codec in codecs:
+        quality = accept.quality(codec.name)
+        if quality > best_quality:
+            best, best_quality = codec, quality
+    return best
+
+class CompressionMetrics:
+    """Totais por rota e codificação: respostas, bytes antes/depois e tempo de CPU comprimindo
+
+    Respostas comprimíveis abaixo do limite entram em below_threshold.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def record(self, route, encoding, bytes_in, bytes_out=0, cpu_seconds=0.0):
+        with self.lock:
+            entry = self.routes.setdefault(route, {'below_threshold': 0, 'below_threshold_bytes': 0, 'encodings': {}})
+            if encoding is None:
+                entry['below_threshold'] += 1
+                entry['below_threshold_bytes'] += bytes_in
+                return
+            totals = entry['encodings'].setdefault(
+                encoding, {'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'cpu_seconds': 0.0}
+            )
+            totals['responses'] += 1
+            totals['bytes_in'] += bytes_in
+            totals['bytes_out'] += bytes_out
+            totals['cpu_seconds'] += cpu_seconds
+
+    def snapshot(self):
+        with self.lock:
+            result = {}
+            for route, entry in sorted(self.routes.items()):
+                encodings = {}
+                for encoding, totals in entry['encodings'].items():
+                    encodings[encoding] = dict(
+                        totals,
+                        ratio=totals['bytes_in'] / totals['bytes_out'] if totals['bytes_out'] else None,
+                        cpu_ms_per_response=totals['cpu_seconds'] * 1000 / totals['responses']
+                    )
+                result[route] = {
+                    'below_threshold': entry['below_threshold'],
+                    'below_threshold_bytes': entry['below_threshold_bytes'],
+                    'encodings': encodings
+                }
+            return result
+
+    def reset(self):
+        with self.lock:
+            self.routes.clear()
+
+compression_metrics = CompressionMetrics()
+
+ROUTE_ENVIRON_KEY = 'rotina.route'
+
+def _route(environ):
+    # A regra do Flask (/api/users/<int:user_id>/tasks) agrupa as URLs; gravada por install_compression
+    return environ.get(ROUTE_ENVIRON_KEY) or '<sem rota>'
+
+def _header(headers, name):
+    name = name.lower()
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+class CompressionMiddleware:
+    """Middleware WSGI que comprime respostas com zstd, br ou gzip conforme o Accept-Encoding
+
+    Só comprime tipos de COMPRESSIBLE_TYPES com pelo menos `min_size` bytes e respostas que
+    ainda não têm Content-Encoding (os .br/.gz dos estáticos passam direto). Respostas com
+    Content-Length são comprimidas de uma vez; streams (ex.: /export) são comprimidos por
+    partes depois de acumular `min_size` bytes.
+    """
+
+    def __init__(self, app, min_size=COMPRESSION_MIN_BYTES, content_types=COMPRESSIBLE_TYPES,
+                 codecs=None, metrics=compression_metrics):
+        self.app = app
+        self.min_size = min_size
+        self.content_types = tuple(content_types)
+        self.codecs = codecs if codecs is not None else available_codecs()
+        self.metrics = metrics
+
+    def __call__(self, environ, start_response):
+        codec = negotiate(environ.get('HTTP_ACCEPT_ENCODING'), self.codecs)
+        if codec is None or environ.get('REQUEST_METHOD') == 'HEAD' or environ.get('HTTP_RANGE'):
+            return self.app(environ, start_response)
+
+        state = {}
+
+        def capture(status, headers, exc_info=None):
+            state['status'] = status
+            state['headers'] = headers
+            state['exc_info'] = exc_info
+            return _unsupported_write
+
+        body = self.app(environ, capture)
+        return self._respond(environ, start_response, state, body, codec)
+
+    def _compressible(self, status, headers):
+        if not status.startswith('2') or status.startswith(('204', '206')) or _header(headers, 'Content-Encoding'):
+            return False
+        content_type = (_header(headers, 'Content-Type') or '').lower()
+        if not content_type.startswith(self.content_types):
+            return False
+        cache_control = (_header(headers, 'Cache-Control') or '').lower()
+        return 'no-transform' not in cache_control
+
+    def _respond(self, environ, start_response, state, body, codec):
+        chunks = iter(body)
+        try:
+            pending = []
+            if 'status' not in state:
+                # Aplicações que só chamam start_response ao gerar o primeiro pedaço
+                for chunk in chunks:
+                    pending.append(chunk)
+                    if 'status' in state:
+                        break
+
+            status, headers = state['status'], state['headers']
+            if not self._compressible(status, headers):
+                start_response(status, headers, state['exc_info'])
+                yield from pending
+                yield from chunks
+                return
+
+            # Acumula até o limite (ou o fim do corpo) para decidir se vale comprimir
+            size = sum(map(len, pending))
+            complete = False
+            while size < self.min_size:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    complete = True
+                    break
+                pending.append(chunk)
+                size += len(chunk)
+
+            length = _header(headers, 'Content-Length')
+            if length is not None and not complete:
+                # Corpo com tamanho conhecido: lê o resto e comprime de uma vez
+                pending.extend(chunks)
+                complete = True
+
+            route = _route(environ)
+            if complete and size < self.min_size:
+                self.metrics.record(route, None, size)
+                start_response(status, headers, state['exc_info'])
+                yield from pending
+                return
+
+            headers = self._compressed_headers(headers, codec)
+            if complete:
+                data = b''.join(pending)
+                started = time.thread_time()
+                compressed = codec.compress(data)
+                cpu = time.thread_time() - started
+                headers.append(('Content-Length', str(len(compressed))))
+                self.metrics.record(route, codec.name, len(data), len(compressed), cpu)
+                start_response(status, headers, state['exc_info'])
+                yield compressed
+                return
+
+            start_response(status, headers, state['exc_info'])
+            stream = codec.stream()
+            bytes_in = bytes_out = 0
+            cpu = 0.0
+            for chunk in chain(pending, chunks):
+                started = time.thread_time()
+                out = stream.compress(chunk)
+                cpu += time.thread_time() - started
+                bytes_in += len(chunk)
+                if out:
+                    bytes_out += len(out)
+                    yield out
+            started = time.thread_time()
+            out = stream.flush()
+            cpu += time.thread_time() - started
+            bytes_out += len(out)
+            self.metrics.record(route, codec.name, bytes_in, bytes_out, cpu)
+            if out:
+                yield out
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+
+    def _compressed_headers(self, headers, codec):
+        result = []
+        vary = None
+        for key, value in headers:
+            lower = key.lower()
+            if lower in ('content-length', 'accept-ranges'):
+                continue
+            if lower == 'etag' and not value.startswith('W/'):
+                value = 'W/' + value  # Outra representação: o ETag forte deixa de valer byte a byte
+            if lower == 'vary':
+                vary = value
+                continue
+            result.append((key, value))
+        result.append(('Content-Encoding', codec.name))
+        if vary and 'accept-encoding' not in vary.lower():
+            vary = f'{vary}, Accept-Encoding'
+        result.append(('Vary', vary or 'Accept-Encoding'))
+        return result
+
+def _unsupported_write(data):
+    raise RuntimeError('CompressionMiddleware não suporta o write() legado do WSGI')
+
+def install_compression(app):
+    """Envolve o app com CompressionMiddleware (desligue com COMPRESSION_ENABLED = False)"""
+    if not app.config.get('COMPRESSION_ENABLED', True):
+        return None
+    middleware = CompressionMiddleware(app.wsgi_app, app.config.get('COMPRESSION_MIN_BYTES', COMPRESSION_MIN_BYTES))
+    app.wsgi_app = middleware
+
+    @app.before_request
+    def remember_route():
+        # O Flask limpa o request do environ ao terminar; a regra fica guardada para as métricas
+        if request.url_rule is not None:
+            request.environ[ROUTE_ENVIRON_KEY] = request.url_rule.rule
+
+    return middleware
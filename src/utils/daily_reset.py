@@ -1,69 +1,306 @@
 from datetime import datetime, timezone, timedelta
-from src.models.user import db, Task
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from sqlalchemy.exc import IntegrityError
+from src.models.user import db, User, Task
+from src.models.job import JobRun
+import heapq
 import threading
 import time
 
-# Timezone UTC-3 (Brasil)
-BRAZIL_TZ = timezone(timedelta(hours=-3))
+# Fuso padrão dos usuários sem fuso configurado (Brasil, UTC-3)
+DEFAULT_TIMEZONE = 'America/Sao_Paulo'
 
-def reset_daily_tasks():
-    """Reseta todas as tarefas diárias para não completadas"""
+DAILY_RESET_JOB = 'daily_reset'
+
+# Tempo máximo de espera entre verificações (para retomar resets que falharam)
+MAX_SLEEP_SECONDS = 300
+
+# Execução reivindicada e não terminada há mais que isso (worker morto no meio) pode ser retomada
+STALE_JOB_AFTER = timedelta(minutes=30)
+
+def get_zone(tz_name):
+    """Retorna o ZoneInfo do fuso, caindo no fuso padrão se for inválido"""
     try:
-        # Buscar todas as tarefas diárias
-        daily_tasks = Task.query.filter_by(task_type='daily').all()
-        
-        for task in daily_tasks:
-            task.completed = False
-            task.completed_at = None
-        
+        return ZoneInfo(tz_name or DEFAULT_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(DEFAULT_TIMEZONE)
+
+def is_valid_timezone(tz_name):
+    """Verifica se o nome do fuso existe na base IANA"""
+    try:
+        ZoneInfo(tz_name)
+        return True
+    except (ZoneInfoNotFoundError, ValueError, TypeError):
+        return False
+
+def local_midnight(tz_name, local_date):
+    """Retorna a meia-noite local de local_date em UTC"""
+    midnight = datetime(local_date.year, local_date.month, local_date.day, tzinfo=get_zone(tz_name))
+    return midnight.astimezone(timezone.utc)
+
+def next_local_midnight(tz_name, now=None):
+    """Retorna (meia-noite local seguinte em UTC, data local que começa nela)"""
+    now = now or datetime.now(timezone.utc)
+    next_date = now.astimezone(get_zone(tz_name)).date() + timedelta(days=1)
+    return local_midnight(tz_name, next_date), next_date
+
+class ResetHeap:
+    """Min-heap das próximas meias-noites locais, agrupando fusos que viram o dia no mesmo instante"""
+
+    def __init__(self):
+        self._heap = []  # (meia-noite UTC, data local, fusos)
+        self._next_by_zone = {}  # fuso -> (meia-noite UTC, data local)
+        self._lock = threading.Lock()
+
+    def add_timezones(self, tz_names, now=None):
+        """Agenda os fusos ainda desconhecidos"""
+        with self._lock:
+            new_zones = [tz for tz in tz_names if tz not in self._next_by_zone]
+            self._push(new_zones, now)
+
+    def _push(self, tz_names, now):
+        buckets = {}
+        for tz_name in tz_names:
+            midnight, local_date = next_local_midnight(tz_name, now)
+            self._next_by_zone[tz_name] = (midnight, local_date)
+            buckets.setdefault((midnight, local_date), []).append(tz_name)
+
+        for (midnight, local_date), zones in buckets.items():
+            heapq.heappush(self._heap, (midnight, local_date, tuple(sorted(zones))))
+
+    def pop_due(self, now=None):
+        """Remove e retorna os grupos cuja meia-noite já chegou, reagendando-os para o dia seguinte"""
+        now = now or datetime.now(timezone.utc)
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                midnight, local_date, zones = heapq.heappop(self._heap)
+                due.append((midnight, local_date, zones))
+                # Um instante depois da meia-noite, para calcular a próxima
+                self._push(zones, midnight + timedelta(seconds=1))
+        return due
+
+    def zones(self):
+        """Fusos agendados no heap"""
+        return list(self._next_by_zone)
+
+    def seconds_until_next(self, now=None):
+        """Segundos até a próxima meia-noite agendada"""
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            if not self._heap:
+                return None
+            return max((self._heap[0][0] - now).total_seconds(), 0)
+
+    def next_reset(self, tz_name, now=None):
+        """Próxima meia-noite (UTC) do fuso, pelo heap quando já estiver agendado"""
+        now = now or datetime.now(timezone.utc)
+        entry = self._next_by_zone.get(tz_name)
+        if entry and entry[0] > now:
+            return entry[0]
+        return next_local_midnight(tz_name, now)[0]
+
+reset_heap = ResetHeap()
+
+def claim_job_run(name, run_date, now=None):
+    """Marca o job como iniciado em run_date; retorna False se outro worker já o fez
+
+    Uma execução de run_date que não terminou (finished_at nulo) volta a ser reivindicável
+    quando foi liberada depois de um erro ou quando está parada há mais de STALE_JOB_AFTER.
+    """
+    now = now or datetime.utcnow()
+    if db.session.get(JobRun, name) is None:
+        try:
+            db.session.add(JobRun(name=name))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+
+    result = db.session.execute(
+        db.update(JobRun).where(
+            JobRun.name == name,
+            db.or_(
+                JobRun.last_run_date.is_(None),
+                JobRun.last_run_date < run_date,
+                db.and_(
+                    JobRun.last_run_date == run_date,
+                    JobRun.finished_at.is_(None),
+                    db.or_(JobRun.last_run_at.is_(None), JobRun.last_run_at < now - STALE_JOB_AFTER)
+                )
+            )
+        ).values(last_run_date=run_date, last_run_at=now, finished_at=None)
+    )
+    return result.rowcount == 1
+
+def release_job_run(name):
+    """Libera uma execução que falhou para que a próxima verificação a reivindique de novo"""
+    db.session.execute(
+        db.update(JobRun).where(JobRun.name == name, JobRun.finished_at.is_(None)).values(last_run_at=None)
+    )
+    db.session.commit()
+
+def users_in_timezones(tz_names):
+    """Subconsulta com os ids dos usuários dos fusos informados (usa ix_users_timezone)"""
+    return db.select(User.id).where(User.timezone.in_(tz_names)).scalar_subquery()
+
+def reset_completed_dailies(user_ids=None, completed_before=None, batch_size=None):
+    """Desmarca as tarefas diárias completadas com UPDATE em lote; retorna as linhas afetadas"""
+    from src.utils.user_stats import invalidate_stats
+
+    filters = [Task.task_type == 'daily', Task.completed == True]
+    if user_ids is not None:
+        filters.append(Task.user_id.in_(user_ids))
+    if completed_before is not None:
+        # completed_at é gravado em UTC sem fuso
+        cutoff = completed_before.astimezone(timezone.utc).replace(tzinfo=None)
+        filters.append(db.or_(Task.completed_at.is_(None), Task.completed_at < cutoff))
+
+    if not batch_size:
+        invalidate_stats(db.select(Task.user_id).where(*filters))
+        result = db.session.execute(
+            db.update(Task).where(*filters).values(completed=False, completed_at=None)
+        )
+        return result.rowcount
+
+    # Paginação por chave (id) para tabelas muito grandes: cada lote é uma transação curta
+    rows_affected = 0
+    last_id = 0
+    while True:
+        batch_ids = db.session.execute(
+            db.select(Task.id).where(*filters, Task.id > last_id).order_by(Task.id).limit(batch_size)
+        ).scalars().all()
+        if not batch_ids:
+            break
+
+        invalidate_stats(db.select(Task.user_id).where(Task.id.in_(batch_ids)))
+        result = db.session.execute(
+            db.update(Task).where(Task.id.in_(batch_ids)).values(completed=False, completed_at=None)
+        )
         db.session.commit()
-        print(f"Reset diário executado às {datetime.now(BRAZIL_TZ).strftime('%Y-%m-%d %H:%M:%S')} (UTC-3)")
-        
-    except Exception as e:
-        print(f"Erro no reset diário: {e}")
-        db.session.rollback()
-
-def get_next_midnight_brazil():
-    """Retorna o próximo horário de meia-noite no fuso horário do Brasil"""
-    now = datetime.now(BRAZIL_TZ)
-    next_midnight = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
-    return next_midnight
-
-def seconds_until_next_midnight():
-    """Retorna quantos segundos faltam para a próxima meia-noite"""
-    now = datetime.now(BRAZIL_TZ)
-    next_midnight = get_next_midnight_brazil()
-    return (next_midnight - now).total_seconds()
-
-def schedule_daily_reset():
-    """Agenda o reset diário para executar à meia-noite"""
+        rows_affected += result.rowcount
+        last_id = batch_ids[-1]
+
+    return rows_affected
+
+def reset_daily_tasks(tz_names, run_date, midnight, batch_size=None):
+    """Reseta as tarefas diárias dos usuários dos fusos cuja meia-noite chegou (uma vez por fuso e dia)"""
+    started = time.perf_counter()
+    rows_affected = 0
+    claimed_zones = []
+
+    for tz_name in tz_names:
+        job_name = f'{DAILY_RESET_JOB}:{tz_name}'
+        try:
+            if not claim_job_run(job_name, run_date):
+                db.session.rollback()
+                continue
+
+            # Com lotes, a reivindicação é confirmada antes para não segurar o lock durante o reset
+            if batch_size:
+                db.session.commit()
+
+            zone_started = time.perf_counter()
+            zone_rows = reset_completed_dailies(
+                user_ids=users_in_timezones([tz_name]),
+                completed_before=midnight,
+                batch_size=batch_size
+            )
+            # Concluído só depois do último lote: uma falha no meio deixa a execução pendente
+            db.session.execute(
+                db.update(JobRun).where(JobRun.name == job_name).values(
+                    rows_affected=zone_rows,
+                    duration_ms=(time.perf_counter() - zone_started) * 1000,
+                    finished_at=datetime.utcnow()
+                )
+            )
+            db.session.commit()
+            rows_affected += zone_rows
+            claimed_zones.append(tz_name)
+
+        except Exception as e:
+            print(f"Erro no reset diário ({tz_name}): {e}")
+            db.session.rollback()
+            if batch_size:
+                try:
+                    release_job_run(job_name)
+                except Exception:
+                    db.session.rollback()  # Fica pendente até STALE_JOB_AFTER
+
+    duration_ms = (time.perf_counter() - started) * 1000
+    if claimed_zones:
+        print(f"Reset diário de {run_date.isoformat()} ({', '.join(claimed_zones)}): "
+              f"{rows_affected} tarefas em {duration_ms:.1f} ms")
+    return {'zones': claimed_zones, 'rows_affected': rows_affected, 'duration_ms': duration_ms}
+
+def load_user_timezones():
+    """Agenda no heap todos os fusos usados pelos usuários (na inicialização)"""
+    tz_names = db.session.execute(db.select(User.timezone).distinct()).scalars().all()
+    reset_heap.add_timezones(set(tz_names) | {DEFAULT_TIMEZONE})
+
+def schedule_timezone(tz_name):
+    """Agenda o fuso de um usuário que acabou de mudar (ou de ser importado)
+
+    O agendador não relê os fusos dos usuários a cada volta: quem altera users.timezone
+    chama esta função depois do commit.
+    """
+    reset_heap.add_timezones([tz_name or DEFAULT_TIMEZONE])
+
+def catch_up_missed_resets(batch_size=None):
+    """Executa os resets de hoje que não rodaram (ex.: processo parado à meia-noite)"""
+    now = datetime.now(timezone.utc)
+    buckets = {}
+    for tz_name in reset_heap.zones():
+        today = now.astimezone(get_zone(tz_name)).date()
+        buckets.setdefault((local_midnight(tz_name, today), today), []).append(tz_name)
+
+    for (midnight, today), tz_names in buckets.items():
+        reset_daily_tasks(tz_names, today, midnight, batch_size=batch_size)
+
+def schedule_daily_reset(app):
+    """Agenda o reset diário por fuso: cada grupo de usuários é resetado na sua meia-noite local"""
+    batch_size = app.config.get('DAILY_RESET_BATCH_SIZE')
+
     def run_scheduler():
         while True:
-            # Calcular segundos até a próxima meia-noite
-            seconds_to_wait = seconds_until_next_midnight()
-            
-            print(f"Próximo reset diário em {seconds_to_wait/3600:.1f} horas")
-            
-            # Aguardar até a meia-noite
-            time.sleep(seconds_to_wait)
-            
-            # Executar reset
-            reset_daily_tasks()
-    
+            with app.app_context():
+                for midnight, run_date, tz_names in reset_heap.pop_due():
+                    reset_daily_tasks(tz_names, run_date, midnight, batch_size=batch_size)
+
+                # Retoma os resets de hoje que falharam ou ficaram pela metade
+                catch_up_missed_resets(batch_size=batch_size)
+
+                db.session.remove()
+
+            # Aguardar até a próxima meia-noite agendada
+            seconds_to_wait = reset_heap.seconds_until_next()
+            if seconds_to_wait is None:
+                seconds_to_wait = MAX_SLEEP_SECONDS
+            time.sleep(min(seconds_to_wait, MAX_SLEEP_SECONDS))
+
+    with app.app_context():
+        load_user_timezones()
+        catch_up_missed_resets(batch_size=batch_size)
+
     # Executar em thread separada para não bloquear a aplicação
     scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
     scheduler_thread.start()
-    print("Agendador de reset diário iniciado!")
 
-def get_time_until_reset():
-    """Retorna o tempo restante até o próximo reset em formato legível"""
-    seconds = seconds_until_next_midnight()
+    seconds = reset_heap.seconds_until_next() or 0
+    print(f"Agendador de reset diário iniciado! Próximo reset em {seconds/3600:.1f} horas")
+
+def get_time_until_reset(tz_name=None):
+    """Retorna o tempo restante até o próximo reset do fuso em formato legível"""
+    tz_name = tz_name or DEFAULT_TIMEZONE
+    now = datetime.now(timezone.utc)
+    next_reset = reset_heap.next_reset(tz_name, now)
+    seconds = (next_reset - now).total_seconds()
     hours = int(seconds // 3600)
     minutes = int((seconds % 3600) // 60)
-    
+
     return {
         'hours': hours,
         'minutes': minutes,
-        'total_seconds': int(seconds)
+        'total_seconds': int(seconds),
+        'timezone': tz_name,
+        'next_reset_at': next_reset.isoformat()
     }
-
@@ -0,0 +1,124 @@
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql import Select
+
+READONLY_BIND = 'readonly'
+
+# Perfil de produção do SQLite (pode ser sobrescrito por SQLITE_PRAGMAS na configuração)
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',         # Leitores não bloqueiam o escritor
+    'synchronous': 'NORMAL',       # Seguro com WAL e bem mais rápido que FULL
+    'busy_timeout': 5000,          # Espera até 5 s pelo lock em vez de "database is locked"
+    'mmap_size': 268435456,        # 256 MB de I/O mapeado em memória
+    'cache_size': -65536,          # 64 MB de cache de páginas por conexão
+    'temp_store': 'MEMORY',
+}
+
+# Pragmas que só fazem sentido na conexão de escrita
+WRITER_ONLY_PRAGMAS = {'journal_mode', 'synchronous'}
+
+class RoutingSession(Session):
+    """Sessão que envia os SELECTs de requisições GET para o pool somente leitura"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and isinstance(clause, Select)
+            and has_request_context()
+            and request.method in ('GET', 'HEAD')
+        ):
+            readonly = self._db.engines.get(READONLY_BIND)
+            if readonly is not None:
+                return readonly
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def is_file_sqlite(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+def configure_database(app):
+    """Define pool e bind somente leitura conforme a URI; chamar antes de db.init_app"""
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    backend = make_url(uri).get_backend_name()
+
+    if backend != 'sqlite':
+        # Postgres/MySQL: pool por processo, descartando conexões derrubadas pelo servidor
+        _set_engine_defaults(app, {
+            'pool_size': app.config.get('DB_POOL_SIZE', 10),
+            'max_overflow': app.config.get('DB_MAX_OVERFLOW', 20),
+            'pool_timeout': app.config.get('DB_POOL_TIMEOUT', 30),
+            'pool_recycle': app.config.get('DB_POOL_RECYCLE', 1800),
+            'pool_pre_ping': True,
+        })
+        if app.config.get('DATABASE_READ_URL'):
+            binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+            binds.setdefault(READONLY_BIND, app.config['DATABASE_READ_URL'])
+        return
+
+    if not is_file_sqlite(uri):
+        return
+
+    _set_engine_defaults(app, {
+        'pool_size': app.config.get('DB_POOL_SIZE', 10),
+        'max_overflow': app.config.get('DB_MAX_OVERFLOW', 20),
+        'pool_timeout': app.config.get('DB_POOL_TIMEOUT', 30),
+        'connect_args': {'check_same_thread': False, 'timeout': 5},
+    })
+
+    if app.config.get('SQLITE_READ_POOL', True):
+        database = make_url(uri).database
+        binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+        binds.setdefault(READONLY_BIND, {
+            'url': f'sqlite:///file:{database}?mode=ro&uri=true',
+            'pool_size': app.config.get('DB_READ_POOL_SIZE', 20),
+            'max_overflow': app.config.get('DB_MAX_OVERFLOW', 20),
+            'connect_args': {'check_same_thread': False, 'timeout': 5},
+        })
+
+def _set_engine_defaults(app, engine_options):
+    options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    for key, value in engine_options.items():
+        options.setdefault(key, value)
+
+def install_sqlite_profile(app, db):
+    """Aplica os pragmas em cada nova conexão SQLite; chamar depois de db.init_app"""
+    pragmas = dict(DEFAULT_SQLITE_PRAGMAS, **app.config.get('SQLITE_PRAGMAS', {}))
+
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            if engine.dialect.name != 'sqlite':
+                continue
+            readonly = bind_key == READONLY_BIND
+            engine_pragmas = {
+                name: value for name, value in pragmas.items()
+                if not (readonly and name in WRITER_ONLY_PRAGMAS)
+            }
+            if readonly:
+                engine_pragmas['query_only'] = 'ON'
+            _listen_pragmas(engine, engine_pragmas)
+
+def _listen_pragmas(engine, pragmas):
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+def effective_pragmas(engine, names=None):
+    """Lê os pragmas efetivos de uma conexão do engine"""
+    names = names or list(DEFAULT_SQLITE_PRAGMAS) + ['query_only']
+    with engine.connect() as conn:
+        return {name: conn.exec_driver_sql(f'PRAGMA {name}').scalar() for name in names}
+
+def log_effective_pragmas(db):
+    """Autoverificação na inicialização: registra os pragmas efetivos e o pool de cada engine"""
+    for bind_key, engine in db.engines.items():
+        if engine.dialect.name != 'sqlite':
+            continue
+        name = bind_key or 'default'
+        pragmas = ', '.join(f'{key}={value}' for key, value in effective_pragmas(engine).items())
+        print(f"SQLite [{name}] pool={engine.pool.status()} {pragmas}")
@@ -0,0 +1,78 @@
+import random
+import time
+from collections import Counter
+from src.utils.pet_sampler import BOX_PROBABILITIES, get_box_sampler
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele a simulação usa o laço em Python
+    np = None
+
+def draw_rarities_python(sampler, draws, seed):
+    """Sorteia `draws` caixas com AliasTable.draw, exatamente como a rota de abertura"""
+    rng = random.Random(seed)
+    draw = sampler.draw
+    return Counter(draw(rng).rarity for _ in range(draws))
+
+def draw_rarities_numpy(sampler, draws, seed, chunk_size=1_000_000):
+    """Mesmo sorteio da tabela de alias, vetorizado em blocos com NumPy"""
+    rng = np.random.default_rng(seed)
+    prob = np.asarray(sampler.prob)
+    alias = np.asarray(sampler.alias)
+    rarities = sorted({pet.rarity for pet in sampler.items})
+    rarity_codes = np.asarray([rarities.index(pet.rarity) for pet in sampler.items])
+
+    totals = np.zeros(len(rarities), dtype=np.int64)
+    remaining = draws
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        column = rng.integers(0, len(sampler), size)
+        picked = np.where(rng.random(size) < prob[column], column, alias[column])
+        totals += np.bincount(rarity_codes[picked], minlength=len(rarities))
+        remaining -= size
+
+    return Counter(dict(zip(rarities, totals.tolist())))
+
+def simulate_drops(box_type='basic', draws=1_000_000, seed=None, use_numpy=None, excluded_pet_ids=frozenset()):
+    """Simula aberturas de caixa com a tabela de alias real e compara com as probabilidades configuradas
+
+    Retorna {'box_type', 'draws', 'seed', 'engine', 'seconds', 'draws_per_second', 'rarities'},
+    onde rarities é {raridade: {'configured', 'observed', 'count'}}.
+    """
+    sampler = get_box_sampler(box_type, excluded_pet_ids)
+    if sampler is None:
+        raise ValueError('Nenhum pet disponível para a simulação')
+
+    if seed is None:
+        seed = random.getrandbits(63)
+    if use_numpy is None:
+        use_numpy = np is not None
+    elif use_numpy and np is None:
+        raise RuntimeError('NumPy não está instalado')
+
+    started = time.perf_counter()
+    if use_numpy:
+        counts = draw_rarities_numpy(sampler, draws, seed)
+    else:
+        counts = draw_rarities_python(sampler, draws, seed)
+    seconds = time.perf_counter() - started
+
+    configured = BOX_PROBABILITIES[box_type]
+    rarities = {
+        rarity: {
+            'configured': configured.get(rarity, 0),
+            'observed': counts.get(rarity, 0) / draws,
+            'count': counts.get(rarity, 0),
+        }
+        for rarity in list(configured) + [r for r in counts if r not in configured]
+    }
+
+    return {
+        'box_type': box_type,
+        'draws': draws,
+        'seed': seed,
+        'engine': 'numpy' if use_numpy else 'python',
+        'seconds': seconds,
+        'draws_per_second': draws / seconds if seconds > 0 else float('inf'),
+        'rarities': rarities,
+    }
@@ -0,0 +1,76 @@
+import json
+import time
+from datetime import datetime, timedelta
+from flask.json.provider import DefaultJSONProvider
+from src.models.user import Task
+from src.utils.json_provider import FastJSONProvider, json_backend
+from src.utils.serializers import TASK_SERIALIZER
+
+def sample_tasks(count):
+    """Tarefas em memória (não persistidas) com todos os campos preenchidos"""
+    now = datetime.utcnow()
+    tasks = []
+    for i in range(count):
+        tasks.append(Task(
+            id=i + 1,
+            user_id=1,
+            title=f'Tarefa {i}',
+            description='Descrição de exemplo com acentuação ' * 2,
+            task_type=('habit', 'daily', 'unique')[i % 3],
+            difficulty=('easy', 'medium', 'hard')[i % 3],
+            xp_reward=20,
+            coin_reward=10,
+            completed=i % 2 == 0,
+            completed_at=now - timedelta(minutes=i) if i % 2 == 0 else None,
+            created_at=now - timedelta(hours=i),
+            due_date=(now + timedelta(days=i % 30)).date(),
+            streak=i % 7,
+            last_completed=(now - timedelta(days=1)).date(),
+            auto_delete_at=None
+        ))
+    return tasks
+
+def task_rows(tasks):
+    """As mesmas tarefas como tuplas, na ordem das colunas de TASK_SERIALIZER"""
+    return [tuple(getattr(task, field) for field in TASK_SERIALIZER.fields) for task in tasks]
+
+def _best_of(repeat, func):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def benchmark_serialization(app, rows=1000, repeat=20):
+    """Compara to_dict() + json do Flask com o serializador pré-compilado + FastJSONProvider
+
+    Retorna {'rows', 'backend', 'current_ms', 'fast_ms', 'speedup', 'bytes_current', 'bytes_fast'};
+    falha se os dois caminhos produzirem documentos diferentes.
+    """
+    tasks = sample_tasks(rows)
+    table = task_rows(tasks)
+    current = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+    compact = {'separators': (',', ':')}
+
+    def current_path():
+        return current.dumps([task.to_dict() for task in tasks], **compact)
+
+    def fast_path():
+        return fast.dumps(TASK_SERIALIZER.serialize(table))
+
+    if json.loads(current_path()) != json.loads(fast_path()):
+        raise AssertionError('Os dois caminhos geraram documentos diferentes')
+
+    current_seconds = _best_of(repeat, current_path)
+    fast_seconds = _best_of(repeat, fast_path)
+    return {
+        'rows': rows,
+        'backend': json_backend(),
+        'current_ms': current_seconds * 1000,
+        'fast_ms': fast_seconds * 1000,
+        'speedup': current_seconds / fast_seconds if fast_seconds > 0 else float('inf'),
+        'bytes_current': len(current_path().encode()),
+        'bytes_fast': len(fast_path().encode()),
+    }
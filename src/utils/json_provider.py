@@ -0,0 +1,47 @@
+from datetime import date
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional: sem ele usamos o json da biblioteca padrão
+    orjson = None
+
+def _default(o):
+    # Datas em ISO 8601, como nos to_dict() (o padrão do Flask seria o formato HTTP)
+    if isinstance(o, date):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Provedor JSON do app: orjson quando instalado, json da biblioteca padrão caso contrário
+
+    As duas implementações geram o mesmo documento (chaves ordenadas, datas em ISO 8601);
+    com orjson os caracteres não ASCII saem em UTF-8 em vez de escapados.
+    """
+    default = staticmethod(_default)
+
+    def _orjson_options(self):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._orjson_options()).decode()
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self._orjson_options()
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=option) + b'\n', mimetype=self.mimetype
+        )
+
+def json_backend():
+    return 'orjson' if orjson is not None else 'json'
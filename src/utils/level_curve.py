@@ -0,0 +1,105 @@
+from bisect import bisect_right
+
+# Estágios do avatar por nível mínimo: (nível, estágio)
+AVATAR_STAGES = [
+    (1, 1),   # Iniciante
+    (5, 2),   # Novato
+    (10, 3),  # Experiente
+    (15, 4),  # Intermediário
+    (20, 5),  # Avançado
+    (30, 6),  # Especialista
+    (40, 7),  # Mestre
+    (50, 8),  # Lendário
+]
+
+# Títulos por nível mínimo: (nível, título)
+LEVEL_TITLES = [
+    (1, "Novato"),
+    (5, "Aprendiz"),
+    (10, "Experiente"),
+    (15, "Veterano"),
+    (20, "Especialista"),
+    (25, "Especialista Avançado"),
+    (30, "Mestre"),
+    (35, "Mestre Sênior"),
+    (40, "Grande Mestre"),
+    (45, "Mestre Absoluto"),
+    (50, "Lenda Suprema"),
+]
+
+_AVATAR_LEVELS = [level for level, _ in AVATAR_STAGES]
+_TITLE_LEVELS = [level for level, _ in LEVEL_TITLES]
+
+class LevelCurve:
+    """Tabela de XP acumulado por nível, consultada com busca binária"""
+
+    def __init__(self, xp_per_level):
+        # cumulative[n] = XP total necessário para chegar ao nível n + 1
+        self.cumulative = [0]
+        for xp_needed in xp_per_level:
+            self.cumulative.append(self.cumulative[-1] + xp_needed)
+        self.max_level = len(self.cumulative)
+
+    @classmethod
+    def arithmetic(cls, base=100, step=10, levels=100):
+        """Progressão aritmética: base XP no nível 1, mais `step` a cada nível"""
+        return cls([base + (level - 1) * step for level in range(1, levels + 1)])
+
+    @classmethod
+    def from_config(cls, config):
+        """Cria a curva a partir de {'xp_per_level': [...]} ou {'base', 'step', 'levels'}"""
+        if not config:
+            return cls.arithmetic()
+        if 'xp_per_level' in config:
+            return cls(config['xp_per_level'])
+        return cls.arithmetic(
+            base=config.get('base', 100),
+            step=config.get('step', 10),
+            levels=config.get('levels', 100)
+        )
+
+    def level_for_xp(self, xp):
+        """Retorna o nível correspondente ao XP total"""
+        return bisect_right(self.cumulative, max(xp, 0))
+
+    def progress(self, xp):
+        """Retorna nível, XP dentro do nível e XP que falta para o próximo"""
+        level = self.level_for_xp(xp)
+        level_start = self.cumulative[level - 1]
+
+        if level >= self.max_level:
+            return {
+                'level': level,
+                'xp_into_level': xp - level_start,
+                'xp_for_level': None,
+                'xp_to_next': None
+            }
+
+        level_end = self.cumulative[level]
+        return {
+            'level': level,
+            'xp_into_level': xp - level_start,
+            'xp_for_level': level_end - level_start,
+            'xp_to_next': level_end - xp
+        }
+
+# Progressão para alcançar ~70.000 XP no nível 100 (começa com 100, aumenta 10 por nível)
+_level_curve = LevelCurve.arithmetic()
+
+def get_level_curve():
+    """Retorna a curva de níveis ativa"""
+    return _level_curve
+
+def configure_level_curve(config):
+    """Substitui a curva de níveis ativa pela definida na configuração"""
+    global _level_curve
+    _level_curve = LevelCurve.from_config(config)
+    return _level_curve
+
+def avatar_stage_for_level(level):
+    """Retorna o estágio do avatar para o nível"""
+    return AVATAR_STAGES[max(bisect_right(_AVATAR_LEVELS, level) - 1, 0)][1]
+
+def title_for_level(level):
+    """Retorna o título para o nível"""
+    return LEVEL_TITLES[max(bisect_right(_TITLE_LEVELS, level) - 1, 0)][1]
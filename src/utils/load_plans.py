@@ -0,0 +1,97 @@
+from sqlalchemy.orm import joinedload
+from src.models.user import db, UserAchievement
+from src.models.pet import UserPet, PetBoxOpening
+from src.models.store import Purchase
+from src.utils.pet_catalog import get_pet_catalog, pet_entry_to_dict
+from src.utils.pagination import keyset_page, split_page
+
+# Planos de carga por rota de listagem: relacionamentos lidos pelo to_dict() vêm na mesma consulta
+LOAD_PLANS = {
+    'purchases': (joinedload(Purchase.store_item),),
+    'inventory': (joinedload(Purchase.store_item),),
+    'user_achievements': (joinedload(UserAchievement.achievement),),
+    'equipped_pets': (joinedload(UserPet.pet),),
+}
+
+# Projeções: só as colunas usadas na resposta; o pet vem do catálogo em memória
+USER_PET_COLUMNS = (
+    UserPet.id,
+    UserPet.user_id,
+    UserPet.pet_id,
+    UserPet.level,
+    UserPet.is_equipped,
+    UserPet.slot_position,
+    UserPet.obtained_at,
+)
+
+BOX_OPENING_COLUMNS = (
+    PetBoxOpening.id,
+    PetBoxOpening.user_id,
+    PetBoxOpening.pet_id,
+    PetBoxOpening.box_type,
+    PetBoxOpening.was_duplicate,
+    PetBoxOpening.level_gained,
+    PetBoxOpening.rng_seed,
+    PetBoxOpening.draw_index,
+    PetBoxOpening.opened_at,
+)
+
+def load_plan(name):
+    return LOAD_PLANS[name]
+
+def scaled_effects(pet, level):
+    """Mesmo cálculo de UserPet.get_current_effects() a partir de um pet do catálogo"""
+    if pet is None:
+        return {}
+    return {
+        effect: value * level if isinstance(value, (int, float)) else value
+        for effect, value in pet.base_effects.items()
+    }
+
+def user_pet_row_to_dict(row, catalog):
+    """Mesmo formato de UserPet.to_dict() para uma linha de USER_PET_COLUMNS"""
+    pet = catalog.by_id.get(row.pet_id)
+    return {
+        'id': row.id,
+        'user_id': row.user_id,
+        'pet_id': row.pet_id,
+        'pet': pet_entry_to_dict(pet) if pet else None,
+        'level': row.level,
+        'is_equipped': row.is_equipped,
+        'slot_position': row.slot_position,
+        'obtained_at': row.obtained_at.isoformat() if row.obtained_at else None,
+        'current_effects': scaled_effects(pet, row.level)
+    }
+
+def box_opening_row_to_dict(row, catalog):
+    """Mesmo formato de PetBoxOpening.to_dict() para uma linha de BOX_OPENING_COLUMNS"""
+    pet = catalog.by_id.get(row.pet_id)
+    return {
+        'id': row.id,
+        'user_id': row.user_id,
+        'pet_id': row.pet_id,
+        'pet': pet_entry_to_dict(pet) if pet else None,
+        'box_type': row.box_type,
+        'was_duplicate': row.was_duplicate,
+        'level_gained': row.level_gained,
+        'rng_seed': row.rng_seed,
+        'draw_index': row.draw_index,
+        'opened_at': row.opened_at.isoformat() if row.opened_at else None
+    }
+
+def list_user_pets(user_id):
+    rows = db.session.execute(
+        db.select(*USER_PET_COLUMNS).where(UserPet.user_id == user_id).order_by(UserPet.id)
+    ).all()
+    catalog = get_pet_catalog()
+    return [user_pet_row_to_dict(row, catalog) for row in rows]
+
+def list_box_history(user_id, limit=20, cursor=None):
+    """Uma página do histórico de caixas por (opened_at, id); retorna (itens, próximo cursor)"""
+    query = db.select(*BOX_OPENING_COLUMNS).where(PetBoxOpening.user_id == user_id)
+    rows = db.session.execute(
+        keyset_page(query, PetBoxOpening.opened_at, PetBoxOpening.id, limit, cursor)
+    ).all()
+    rows, next_cursor = split_page(rows, limit, 'opened_at')
+    catalog = get_pet_catalog()
+    return [box_opening_row_to_dict(row, catalog) for row in rows], next_cursor
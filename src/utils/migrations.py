@@ -0,0 +1,205 @@
+from datetime import datetime
+from src.models.user import db, User, Task, UserAchievement
+from src.models.store import Purchase
+from src.models.ledger import RewardLedger, DailyRewardRollup
+from src.models.pet import PetBoxOpening
+from src.models.migration import SchemaMigration
+from src.models.job import JobRun
+from src.utils.sql_functions import day_bucket
+
+# Colunas adicionadas a tabelas existentes depois da criação inicial do banco
+USER_COLUMNS_V1 = [
+    'buff_version',
+    'last_activity_date',
+    'timezone',
+    'activity_days',
+    'activity_origin',
+    'current_streak',
+    'tasks_completed',
+    'tasks_today',
+    'max_streak',
+    'achievements_unlocked',
+    'items_bought',
+    'total_coins_earned',
+    'total_coins_spent',
+    'early_bird_tasks',
+    'night_owl_tasks',
+    'weekend_tasks',
+    'perfect_days',
+    'last_perfect_date',
+]
+
+def add_missing_columns(conn, model, column_names):
+    """ALTER TABLE ... ADD COLUMN para as colunas do modelo que ainda não existem no banco"""
+    table = model.__table__
+    existing = {column['name'] for column in db.inspect(conn).get_columns(table.name)}
+    preparer = conn.dialect.identifier_preparer
+
+    for name in column_names:
+        if name in existing:
+            continue
+
+        column = table.columns[name]
+        ddl = (f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN '
+               f'{preparer.format_column(column)} {column.type.compile(dialect=conn.dialect)}')
+
+        default = column.default.arg if column.default is not None and column.default.is_scalar else None
+        if default is not None:
+            literal = db.literal(default, type_=column.type).compile(
+                dialect=conn.dialect, compile_kwargs={'literal_binds': True}
+            )
+            ddl += f' DEFAULT {literal}'
+
+        conn.execute(db.text(ddl))
+
+def migrate_stats_version(conn):
+    add_missing_columns(conn, User, ['stats_version'])
+
+def migrate_data_version(conn):
+    add_missing_columns(conn, User, ['data_version'])
+
+def migrate_box_opening_seed(conn):
+    add_missing_columns(conn, PetBoxOpening, ['rng_seed', 'draw_index'])
+
+def migrate_rng_streams(conn):
+    """Contador persistido das sequências de sorteio, continuando depois das já gravadas"""
+    add_missing_columns(conn, User, ['rng_streams'])
+    streams = db.select(db.func.count(db.distinct(PetBoxOpening.rng_seed))).where(
+        PetBoxOpening.user_id == User.id
+    ).scalar_subquery()
+    conn.execute(db.update(User).values(rng_streams=streams))
+
+def migrate_job_run_finished(conn):
+    """Execuções já gravadas terminaram (antes só eram gravadas ao concluir ou eram lotes)"""
+    add_missing_columns(conn, JobRun, ['finished_at'])
+    conn.execute(db.update(JobRun).where(JobRun.last_run_date.isnot(None)).values(
+        finished_at=JobRun.last_run_at
+    ))
+
+def migrate_timezone_not_null(conn):
+    """Usuários sem fuso recebem o padrão; a coluna passa a ser NOT NULL com DEFAULT
+
+    Assim o filtro do reset diário compara users.timezone direto e usa ix_users_timezone.
+    O SQLite não altera restrições de colunas existentes: lá basta o preenchimento
+    (bancos novos já são criados com NOT NULL pelo modelo).
+    """
+    column = User.__table__.columns['timezone']
+    conn.execute(db.update(User).where(User.timezone.is_(None)).values(timezone=column.default.arg))
+    if conn.dialect.name == 'sqlite':
+        return
+
+    preparer = conn.dialect.identifier_preparer
+    table, name = preparer.format_table(User.__table__), preparer.format_column(column)
+    default = db.literal(column.default.arg, type_=column.type).compile(
+        dialect=conn.dialect, compile_kwargs={'literal_binds': True}
+    )
+    conn.execute(db.text(f'ALTER TABLE {table} ALTER COLUMN {name} SET DEFAULT {default}'))
+    conn.execute(db.text(f'ALTER TABLE {table} ALTER COLUMN {name} SET NOT NULL'))
+
+def migrate_reward_rng(conn):
+    add_missing_columns(conn, RewardLedger, ['rng_seed', 'draw_index'])
+
+def create_declared_indexes(conn):
+    """Cria todos os índices declarados nos modelos que ainda não existem"""
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=conn, checkfirst=True)
+
+def migrate_user_columns(conn):
+    add_missing_columns(conn, User, USER_COLUMNS_V1)
+
+def user_counter_values():
+    """Contadores de conquistas calculados a partir do histórico (subconsultas por usuário)"""
+    completed = db.select(db.func.count(Task.id)).where(
+        Task.user_id == User.id, Task.completed == True
+    ).scalar_subquery()
+    unlocked = db.select(db.func.count(UserAchievement.id)).where(
+        UserAchievement.user_id == User.id
+    ).scalar_subquery()
+    bought = db.select(db.func.coalesce(db.func.sum(Purchase.quantity), 0)).where(
+        Purchase.user_id == User.id
+    ).scalar_subquery()
+    spent = db.select(db.func.coalesce(db.func.sum(Purchase.total_cost), 0)).where(
+        Purchase.user_id == User.id
+    ).scalar_subquery()
+    return {
+        'tasks_completed': completed,
+        'achievements_unlocked': unlocked,
+        'items_bought': bought,
+        'total_coins_spent': spent,
+    }
+
+def backfill_user_counters(conn):
+    """Preenche os contadores de conquistas a partir do histórico existente"""
+    values = user_counter_values()
+    conn.execute(db.update(User).values(
+        **values,
+        # Aproximação: saldo atual + o que foi gasto na loja
+        total_coins_earned=db.func.coalesce(User.coins, 0) + values['total_coins_spent']
+    ))
+
+def backfill_daily_rollups(conn):
+    """Gera os totais diários (dia UTC) das tarefas completadas de usuários ainda sem totais"""
+    day = day_bucket(Task.completed_at)
+    history = db.select(
+        Task.user_id,
+        day,
+        db.func.sum(Task.xp_reward),
+        db.func.sum(Task.coin_reward),
+        db.func.count(Task.id)
+    ).where(
+        Task.completed == True,
+        Task.completed_at.isnot(None),
+        Task.user_id.not_in(db.select(DailyRewardRollup.user_id))
+    ).group_by(Task.user_id, day)
+
+    conn.execute(db.insert(DailyRewardRollup).from_select(
+        ['user_id', 'day', 'xp', 'coins', 'tasks_completed'], history
+    ))
+
+# (versão, descrição, função) — nunca altere uma migração já publicada, adicione uma nova
+MIGRATIONS = [
+    (1, 'Colunas de buffs, contadores, fuso e atividade em users', migrate_user_columns),
+    (2, 'Índices compostos e parciais dos caminhos mais usados', create_declared_indexes),
+    (3, 'Preenche os contadores de conquistas a partir do histórico', backfill_user_counters),
+    (4, 'Preenche os totais diários de XP a partir das tarefas completadas', backfill_daily_rollups),
+    (5, 'Semente do sorteio em pet_box_openings', migrate_box_opening_seed),
+    (6, 'Versão das estatísticas em users', migrate_stats_version),
+    (7, 'Versão dos dados do usuário para ETags', migrate_data_version),
+    (8, 'Contador persistido das sequências de sorteio em users', migrate_rng_streams),
+    (9, 'Conclusão das execuções de jobs em job_runs', migrate_job_run_finished),
+    (10, 'Fuso padrão e NOT NULL em users.timezone', migrate_timezone_not_null),
+    (11, 'Semente do sorteio de moedas em dobro em reward_ledger', migrate_reward_rng),
+]
+
+def applied_versions(conn):
+    return set(conn.execute(db.select(SchemaMigration.version)).scalars())
+
+def upgrade_database():
+    """Cria tabelas novas e aplica as migrações pendentes, em ordem; retorna as versões aplicadas"""
+    db.create_all()
+
+    applied = []
+    with db.engine.begin() as conn:
+        done = applied_versions(conn)
+        for version, description, migrate in MIGRATIONS:
+            if version in done:
+                continue
+
+            migrate(conn)
+            conn.execute(db.insert(SchemaMigration).values(
+                version=version, description=description, applied_at=datetime.utcnow()
+            ))
+            applied.append(version)
+            print(f"Migração {version} aplicada: {description}")
+
+    return applied
+
+def migration_status():
+    """Lista as migrações com a indicação de aplicadas ou pendentes"""
+    with db.engine.connect() as conn:
+        done = applied_versions(conn)
+    return [
+        {'version': version, 'description': description, 'applied': version in done}
+        for version, description, _ in MIGRATIONS
+    ]
@@ -0,0 +1,107 @@
+import base64
+import json
+from datetime import datetime
+from flask import jsonify, request
+from src.models.user import db
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+class PageError(ValueError):
+    """Parâmetro de paginação ou projeção inválido (responder com 400)"""
+
+def encode_cursor(timestamp, row_id):
+    payload = json.dumps([timestamp.isoformat() if timestamp else None, row_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(timestamp) if timestamp else None), int(row_id)
+    except (ValueError, TypeError):
+        raise PageError('Cursor inválido')
+
+def page_args(default_limit=None):
+    """Lê ?limit= e ?cursor= da requisição; retorna (limit, cursor) ou (None, None) sem paginação
+
+    Sem nenhum dos dois (e sem default_limit) a rota devolve a lista completa, como antes.
+    """
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor')
+    if limit is None and cursor is None and default_limit is None:
+        return None, None
+
+    if limit is None:
+        limit = default_limit or DEFAULT_PAGE_SIZE
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise PageError('Limite inválido')
+        if limit < 1:
+            raise PageError('Limite inválido')
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    return limit, decode_cursor(cursor) if cursor else None
+
+def keyset_page(query, time_column, id_column, limit, cursor=None):
+    """Ordena por (time_column, id) decrescente e continua depois do cursor
+
+    Busca limit + 1 linhas para saber se existe próxima página (ver split_page).
+    """
+    if cursor is not None:
+        timestamp, row_id = cursor
+        if timestamp is None:
+            query = query.filter(time_column.is_(None), id_column < row_id)
+        else:
+            query = query.filter(db.or_(
+                time_column < timestamp,
+                db.and_(time_column == timestamp, id_column < row_id),
+                time_column.is_(None)
+            ))
+    # NULLS LAST explícito: o padrão muda entre SQLite e Postgres
+    return query.order_by(time_column.desc().nulls_last(), id_column.desc()).limit(limit + 1)
+
+def split_page(rows, limit, time_attr):
+    """Separa a linha extra de keyset_page e gera o cursor da próxima página (ou None)"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, time_attr), last.id)
+
+def fetch_page(query, time_column, id_column, limit, cursor=None):
+    """Executa uma Query do ORM paginada; sem limit devolve tudo (ordem de sempre) e cursor None"""
+    if limit is None:
+        return query.order_by(time_column.desc()).all(), None
+    rows = keyset_page(query, time_column, id_column, limit, cursor).all()
+    return split_page(rows, limit, time_column.key)
+
+def page_request(allowed_fields, default_limit=None):
+    """(limit, cursor, fields) da requisição; lança PageError para parâmetros inválidos"""
+    limit, cursor = page_args(default_limit)
+    return limit, cursor, parse_fields(allowed_fields)
+
+def parse_fields(allowed):
+    """Lê ?fields=a,b,c e valida contra as chaves do to_dict(); None = todos os campos"""
+    fields = request.args.get('fields')
+    if not fields:
+        return None
+    selected = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in selected if name not in allowed]
+    if unknown:
+        raise PageError(f"Campos inválidos: {', '.join(unknown)}")
+    return selected
+
+def project(items, fields):
+    if fields is None:
+        return items
+    return [{name: item[name] for name in fields} for item in items]
+
+def paged_response(items, next_cursor):
+    """Lista no corpo (formato de sempre) e o cursor da próxima página em X-Next-Cursor"""
+    response = jsonify(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
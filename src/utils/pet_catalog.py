@@ -0,0 +1,101 @@
+from collections import namedtuple
+from types import MappingProxyType
+from flask import g, has_request_context
+from sqlalchemy import event
+from src.models.pet import Pet
+from src.utils.asset_manifest import sprite_url
+from src.utils.db_profile import RoutingSession
+from src.utils.versions import catalog_version
+
+MAX_PET_LEVEL = 25
+RARITIES = ('common', 'rare', 'epic', 'legendary')
+
+PetEntry = namedtuple('PetEntry', (
+    'id', 'name', 'rarity', 'sprite_path', 'base_effects', 'numeric_effects', 'created_at'
+))
+
+# Catálogo imutável: versão, todos os pets, índice por id e pets agrupados por raridade
+PetCatalog = namedtuple('PetCatalog', ('version', 'pets', 'by_id', 'by_rarity'))
+
+_catalog = None
+
+def pet_entry_to_dict(entry):
+    """Mesmo formato de Pet.to_dict()"""
+    return {
+        'id': entry.id,
+        'name': entry.name,
+        'rarity': entry.rarity,
+        'sprite_path': entry.sprite_path,
+        'sprite_url': sprite_url(entry.sprite_path),
+        'base_effects': dict(entry.base_effects),
+        'created_at': entry.created_at.isoformat() if entry.created_at else None
+    }
+
+def current_effects(entry, level):
+    """Efeitos numéricos do pet multiplicados pelo nível"""
+    return {effect: value * level for effect, value in entry.numeric_effects}
+
+def build_pet_catalog(version):
+    pets = []
+    for pet in Pet.query.order_by(Pet.id).all():
+        base_effects = dict(pet.base_effects or {})
+        pets.append(PetEntry(
+            id=pet.id,
+            name=pet.name,
+            rarity=pet.rarity,
+            sprite_path=pet.sprite_path,
+            base_effects=MappingProxyType(base_effects),
+            numeric_effects=tuple(
+                (effect, value) for effect, value in base_effects.items()
+                if isinstance(value, (int, float))
+            ),
+            created_at=pet.created_at
+        ))
+
+    by_rarity = {rarity: [] for rarity in RARITIES}
+    for entry in pets:
+        by_rarity.setdefault(entry.rarity, []).append(entry)
+
+    return PetCatalog(
+        version=version,
+        pets=tuple(pets),
+        by_id=MappingProxyType({entry.id: entry for entry in pets}),
+        by_rarity=MappingProxyType({rarity: tuple(entries) for rarity, entries in by_rarity.items()})
+    )
+
+def get_pet_catalog():
+    """Retorna o catálogo de pets do processo, recarregando quando a versão no banco muda
+
+    A versão vem de catalog_versions, então alterações feitas por outros workers ou
+    pela CLI também descartam o catálogo deste processo.
+    """
+    global _catalog
+    version = catalog_version('pets')
+    catalog = _catalog
+    if catalog is None or catalog.version != version:
+        catalog = build_pet_catalog(version)
+        _catalog = catalog
+    return catalog
+
+def invalidate_pet_catalog():
+    """Descarta o catálogo e a versão lida nesta requisição"""
+    global _catalog
+    _catalog = None
+    if has_request_context():
+        g.get('catalog_versions', {}).pop('pets', None)
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _track_pet_changes(session, flush_context):
+    if any(isinstance(obj, Pet) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info['pets_changed'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _pets_committed(session):
+    # Só depois do commit: um catálogo montado com dados não confirmados não fica em cache
+    if session.info.pop('pets_changed', False):
+        invalidate_pet_catalog()
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _pets_rolled_back(session):
+    if session.info.pop('pets_changed', False):
+        invalidate_pet_catalog()
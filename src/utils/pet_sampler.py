@@ -0,0 +1,92 @@
+import random
+from src.utils.pet_catalog import get_pet_catalog
+
+# Probabilidades de raridade da caixa básica
+RARITY_PROBABILITIES = {
+    'common': 0.60,      # 60%
+    'rare': 0.25,        # 25%
+    'epic': 0.125,       # 12.5%
+    'legendary': 0.025   # 2.5%
+}
+
+# Probabilidades de raridade por tipo de caixa
+BOX_PROBABILITIES = {
+    'basic': RARITY_PROBABILITIES,
+    'luxury': {
+        'common': 0.0,    # 0% de chance
+        'rare': 0.5,      # 50% de chance
+        'epic': 0.4,      # 40% de chance
+        'legendary': 0.1  # 10% de chance
+    },
+}
+
+class AliasTable:
+    """Amostragem ponderada em O(1) pelo método de alias (Walker/Vose)"""
+
+    def __init__(self, items, weights):
+        self.items = tuple(items)
+        n = len(self.items)
+        total = float(sum(weights))
+        if n == 0 or total <= 0:
+            raise ValueError('AliasTable precisa de ao menos um peso positivo')
+
+        scaled = [weight * n / total for weight in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+
+        small = [i for i, value in enumerate(scaled) if value < 1.0]
+        large = [i for i, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # O que sobrar nas listas tem probabilidade 1 (erro de arredondamento)
+
+    def __len__(self):
+        return len(self.items)
+
+    def draw(self, rng=random):
+        i = int(rng.random() * len(self.items))
+        return self.items[i if rng.random() < self.prob[i] else self.alias[i]]
+
+def pet_weights(box_type, pets):
+    """Peso de cada pet: probabilidade da raridade dividida igualmente entre os pets disponíveis dela"""
+    probabilities = BOX_PROBABILITIES[box_type]
+    counts = {}
+    for pet in pets:
+        counts[pet.rarity] = counts.get(pet.rarity, 0) + 1
+    return [probabilities.get(pet.rarity, 0) / counts[pet.rarity] for pet in pets]
+
+def build_box_sampler(box_type, excluded_pet_ids=frozenset()):
+    """Tabela de alias dos pets que ainda podem sair na caixa, ou None se não houver nenhum
+
+    Raridades sem pets disponíveis têm sua probabilidade redistribuída entre as demais;
+    se só restarem pets de peso zero na caixa, eles são sorteados com chances iguais.
+    """
+    pets = [pet for pet in get_pet_catalog().pets if pet.id not in excluded_pet_ids]
+    if not pets:
+        return None
+
+    weights = pet_weights(box_type, pets)
+    if sum(weights) <= 0:
+        weights = [1] * len(pets)
+    return AliasTable(pets, weights)
+
+# Cache do processo: box_type -> (versão do catálogo, tabela sem exclusões)
+_sampler_cache = {}
+
+def get_box_sampler(box_type, excluded_pet_ids=frozenset()):
+    """Tabela de alias da caixa; a tabela sem exclusões é compartilhada entre usuários"""
+    if excluded_pet_ids:
+        return build_box_sampler(box_type, excluded_pet_ids)
+
+    version = get_pet_catalog().version
+    cached = _sampler_cache.get(box_type)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    sampler = build_box_sampler(box_type)
+    _sampler_cache[box_type] = (version, sampler)
+    return sampler
@@ -0,0 +1,101 @@
+from contextlib import contextmanager
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+# Máximo de consultas SQL por rota (endpoint do Flask), contando o aquecimento dos caches
+# e a leitura de versões do GET condicional (src/utils/versions.py)
+QUERY_BUDGETS = {
+    'pets.get_user_pets': 3,
+    'pets.get_equipped_pet': 2,
+    'pets.get_all_equipped_pets': 2,
+    'pets.get_box_history': 3,
+    'store.get_user_purchases': 2,
+    'store.get_user_inventory': 2,
+    'achievements.get_user_achievements': 3,
+    'user.get_user_stats': 4,
+    'pets.get_pet_stats': 4,
+    'dashboard.get_dashboard': 8,
+}
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+    def record(self, statement):
+        self.count += 1
+        self.statements.append(statement)
+
+# Contadores ativos fora de requisições (scripts e verificações manuais)
+_active_counters = []
+_instrumented = set()
+
+def instrument_engine(engine):
+    if id(engine) in _instrumented:
+        return
+    _instrumented.add(id(engine))
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _count_query(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            counter = g.get('query_counter')
+            if counter is not None:
+                counter.record(statement)
+        for counter in _active_counters:
+            counter.record(statement)
+
+@contextmanager
+def count_queries(db):
+    """Conta as consultas executadas dentro do bloco (requer contexto da aplicação)"""
+    for engine in db.engines.values():
+        instrument_engine(engine)
+    counter = QueryCounter()
+    _active_counters.append(counter)
+    try:
+        yield counter
+    finally:
+        _active_counters.remove(counter)
+
+def check_budget(endpoint, counter):
+    budget = QUERY_BUDGETS.get(endpoint)
+    if budget is not None and counter.count > budget:
+        statements = '\n'.join(counter.statements)
+        raise QueryBudgetExceeded(
+            f"{endpoint} executou {counter.count} consultas (orçamento: {budget}):\n{statements}"
+        )
+
+def install_query_counter(app, db):
+    """Conta as consultas de cada requisição e aplica QUERY_BUDGETS
+
+    QUERY_BUDGET_CHECK: 'warn' registra as rotas que estouram o orçamento,
+    'raise' lança QueryBudgetExceeded (uso em testes e desenvolvimento).
+    Com o contador ativo, toda resposta leva o cabeçalho X-Query-Count.
+    """
+    mode = app.config.get('QUERY_BUDGET_CHECK')
+    if not mode:
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_engine(engine)
+
+    @app.before_request
+    def _start_query_counter():
+        g.query_counter = QueryCounter()
+
+    @app.after_request
+    def _check_query_budget(response):
+        counter = g.get('query_counter')
+        if counter is None:
+            return response
+        response.headers['X-Query-Count'] = str(counter.count)
+        try:
+            check_budget(request.endpoint, counter)
+        except QueryBudgetExceeded as e:
+            if mode == 'raise':
+                raise
+            app.logger.warning(str(e))
+        return response
@@ -0,0 +1,94 @@
+import re
+from datetime import datetime, date
+from sqlalchemy import event
+from src.models.user import db, Task, UserAchievement
+from src.models.pet import UserPet, PetBoxOpening
+from src.models.store import Purchase
+from src.models.ledger import DailyRewardRollup
+
+# Tabelas pequenas (catálogos e controle) em que varrer tudo é aceitável
+SMALL_TABLES = {'achievement', 'pets', 'store_items', 'job_runs', 'schema_migrations'}
+
+_SCAN_PATTERN = re.compile(r'^SCAN (?:TABLE )?(\w+)')
+
+def hot_queries():
+    """Consultas dos caminhos mais usados pelas rotas, com parâmetros de exemplo"""
+    now = datetime.utcnow()
+    today = date.today()
+    return {
+        'tasks_by_user': db.select(Task).where(Task.user_id == 1).order_by(Task.created_at.desc()),
+        'tasks_by_user_type': db.select(Task).where(Task.user_id == 1, Task.task_type == 'daily'),
+        'completed_tasks': db.select(Task.completed_at).where(Task.user_id == 1, Task.completed == True),
+        'active_tasks': db.select(Task).where(
+            Task.user_id == 1,
+            db.or_(Task.auto_delete_at.is_(None), Task.auto_delete_at > now)
+        ).order_by(Task.created_at.desc()),
+        'expired_tasks': db.select(Task).where(
+            Task.task_type == 'unique', Task.auto_delete_at.isnot(None), Task.auto_delete_at <= now
+        ),
+        'daily_reset': db.select(Task.id).where(Task.task_type == 'daily', Task.completed == True),
+        'equipped_pets': db.select(UserPet).where(
+            UserPet.user_id == 1, UserPet.is_equipped == True
+        ).order_by(UserPet.slot_position),
+        'user_pet_by_pet': db.select(UserPet).where(UserPet.user_id == 1, UserPet.pet_id == 1),
+        'max_level_pets': db.select(UserPet.pet_id).where(UserPet.user_id == 1, UserPet.level == 25),
+        'purchases': db.select(Purchase).where(Purchase.user_id == 1).order_by(Purchase.purchased_at.desc()),
+        'inventory': db.select(Purchase).where(
+            Purchase.user_id == 1, Purchase.is_redeemed == False
+        ).order_by(Purchase.purchased_at.desc()),
+        'box_history': db.select(PetBoxOpening).where(
+            PetBoxOpening.user_id == 1
+        ).order_by(PetBoxOpening.opened_at.desc()).limit(20),
+        'user_achievements': db.select(UserAchievement).where(UserAchievement.user_id == 1),
+        'daily_rollups': db.select(DailyRewardRollup).where(
+            DailyRewardRollup.user_id == 1,
+            DailyRewardRollup.day >= today,
+            DailyRewardRollup.day <= today
+        ),
+    }
+
+def full_scans(plan_rows):
+    """Tabelas grandes varridas por completo em um EXPLAIN QUERY PLAN do SQLite"""
+    tables = []
+    for row in plan_rows:
+        match = _SCAN_PATTERN.match(row[-1])
+        if match and match.group(1) not in SMALL_TABLES:
+            tables.append(match.group(1))
+    return tables
+
+def explain(conn, statement, parameters=None):
+    """Executa EXPLAIN QUERY PLAN para um SQL (string) ou uma consulta SQLAlchemy"""
+    if not isinstance(statement, str):
+        compiled = statement.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True})
+        statement, parameters = str(compiled), None
+    return conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters or ()).fetchall()
+
+def check_query_plans():
+    """Retorna {consulta: [tabelas varridas por completo]} para as consultas dos caminhos quentes"""
+    if db.engine.dialect.name != 'sqlite':
+        return {}
+
+    problems = {}
+    with db.engine.connect() as conn:
+        for name, statement in hot_queries().items():
+            scanned = full_scans(explain(conn, statement))
+            if scanned:
+                problems[name] = scanned
+    return problems
+
+def enable_plan_check(engine):
+    """Em desenvolvimento: avisa quando qualquer SELECT executado por uma rota varre uma tabela grande"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    checked = set()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _check_plan(conn, cursor, statement, parameters, context, executemany):
+        if executemany or statement in checked or not statement.lstrip().upper().startswith('SELECT'):
+            return
+        checked.add(statement)
+
+        scanned = full_scans(cursor.connection.execute(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall())
+        if scanned:
+            print(f"Consulta com varredura completa em {', '.join(scanned)}: {statement}")
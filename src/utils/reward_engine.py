@@ -0,0 +1,117 @@
+from collections import namedtuple
+from datetime import datetime
+from src.models.user import db, User
+
+# Efeitos de pets que influenciam a recompensa de uma tarefa (sempre somados de forma aditiva)
+BUFF_FIELDS = (
+    'xp_bonus',
+    'coin_bonus',
+    'easy_task_xp_bonus',
+    'hard_task_coin_bonus',
+    'weekend_xp_bonus',
+    'weekend_coin_bonus',
+    'weekday_xp_bonus',
+    'weekday_coin_bonus',
+    'last_task_xp_bonus',
+    'first_task_coin_bonus',
+    'duplicate_coin_chance',
+)
+
+BuffVector = namedtuple('BuffVector', BUFF_FIELDS)
+EMPTY_BUFFS = BuffVector(*([0] * len(BUFF_FIELDS)))
+
+# Cache do processo: user_id -> (buff_version, BuffVector)
+_buff_cache = {}
+
+def build_buff_vector(user_id):
+    """Soma os efeitos de todos os pets equipados do usuário em um único vetor"""
+    from src.models.pet import Pet, UserPet
+
+    rows = db.session.query(UserPet.level, Pet.base_effects).join(
+        Pet, UserPet.pet_id == Pet.id
+    ).filter(
+        UserPet.user_id == user_id,
+        UserPet.is_equipped == True
+    ).all()
+
+    totals = dict.fromkeys(BUFF_FIELDS, 0)
+    for level, base_effects in rows:
+        for effect, value in (base_effects or {}).items():
+            if effect in totals and isinstance(value, (int, float)):
+                totals[effect] += value * level
+
+    return BuffVector(**totals)
+
+def get_buff_vector(user):
+    """Retorna o vetor de buffs do usuário, recalculando só quando a versão mudou"""
+    version = user.buff_version or 0
+    cached = _buff_cache.get(user.id)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    buffs = build_buff_vector(user.id)
+    _buff_cache[user.id] = (version, buffs)
+    return buffs
+
+def invalidate_buffs(user_id):
+    """Invalida o vetor de buffs do usuário (equipar, desequipar ou subir nível de pet)"""
+    User.query.filter_by(id=user_id).update(
+        {User.buff_version: db.func.coalesce(User.buff_version, 0) + 1},
+        synchronize_session=False
+    )
+    _buff_cache.pop(user_id, None)
+
+def compute_rewards(task, buffs, is_first_task_today=False, now=None, rng=None):
+    """Aplica todos os buffs sobre a recompensa base da tarefa em uma única passada
+
+    `rng` sorteia a chance de moedas em dobro; use uma sequência do usuário (user_stream)
+    e registre a semente, para que o sorteio possa ser reproduzido. Sem `rng` não há sorteio.
+    """
+    xp = task.xp_reward
+    coins = task.coin_reward
+
+    if buffs == EMPTY_BUFFS:
+        return xp, coins
+
+    (xp_bonus, coin_bonus, easy_task_xp_bonus, hard_task_coin_bonus,
+     weekend_xp_bonus, weekend_coin_bonus, weekday_xp_bonus, weekday_coin_bonus,
+     last_task_xp_bonus, first_task_coin_bonus, duplicate_coin_chance) = buffs
+
+    # Buffs gerais
+    if xp_bonus > 0:
+        xp = int(xp * (1 + xp_bonus))
+    if coin_bonus > 0:
+        coins = int(coins * (1 + coin_bonus))
+
+    # Buffs específicos por dificuldade
+    if task.difficulty == 'easy' and easy_task_xp_bonus > 0:
+        xp = int(xp * (1 + easy_task_xp_bonus))
+    if task.difficulty == 'hard' and hard_task_coin_bonus > 0:
+        coins = int(coins * (1 + hard_task_coin_bonus))
+
+    # Buffs de final de semana/dia da semana
+    now = now or datetime.now()
+    if now.weekday() >= 5:
+        if weekend_xp_bonus > 0:
+            xp = int(xp * (1 + weekend_xp_bonus))
+        if weekend_coin_bonus > 0:
+            coins = int(coins * (1 + weekend_coin_bonus))
+    else:
+        if weekday_xp_bonus > 0:
+            xp = int(xp * (1 + weekday_xp_bonus))
+        if weekday_coin_bonus > 0:
+            coins = int(coins * (1 + weekday_coin_bonus))
+
+    # Buffs especiais
+    if is_first_task_today and first_task_coin_bonus > 0:
+        coins += int(first_task_coin_bonus)
+
+    if last_task_xp_bonus > 0:
+        # Aplicar bônus na última tarefa (simplificado - aplicar sempre)
+        xp = int(xp * (1 + last_task_xp_bonus))
+
+    # Chance de duplicar moedas (limitada a 100%)
+    if duplicate_coin_chance > 0 and rng is not None and rng.random() < min(duplicate_coin_chance, 1.0):
+        coins *= 2
+
+    return xp, coins
@@ -0,0 +1,93 @@
+from datetime import timedelta
+from sqlalchemy.exc import IntegrityError
+from src.models.user import db
+from src.models.ledger import RewardLedger, DailyRewardRollup
+
+def record_reward(user, day, xp, coins, source='task', task_id=None, achievement_id=None, buffs=None,
+                  rng_seed=None, draw_index=None):
+    """Lança a recompensa no ledger e soma no total diário do usuário
+
+    `rng_seed`/`draw_index` registram o sorteio usado na recompensa para que ele possa ser refeito.
+    """
+    db.session.add(RewardLedger(
+        user_id=user.id,
+        source=source,
+        task_id=task_id,
+        achievement_id=achievement_id,
+        xp=xp,
+        coins=coins,
+        buffs=buffs,
+        rng_seed=rng_seed,
+        draw_index=draw_index,
+        day=day
+    ))
+
+    tasks_completed = 1 if source == 'task' else 0
+    if _add_to_rollup(user.id, day, xp, coins, tasks_completed):
+        return
+
+    # Primeiro lançamento do dia; se outro request criou a linha antes, soma nela
+    try:
+        with db.session.begin_nested():
+            db.session.add(DailyRewardRollup(
+                user_id=user.id, day=day, xp=xp, coins=coins, tasks_completed=tasks_completed
+            ))
+    except IntegrityError:
+        _add_to_rollup(user.id, day, xp, coins, tasks_completed)
+
+def _add_to_rollup(user_id, day, xp, coins, tasks_completed):
+    result = db.session.execute(
+        db.update(DailyRewardRollup).where(
+            DailyRewardRollup.user_id == user_id,
+            DailyRewardRollup.day == day
+        ).values(
+            xp=DailyRewardRollup.xp + xp,
+            coins=DailyRewardRollup.coins + coins,
+            tasks_completed=DailyRewardRollup.tasks_completed + tasks_completed
+        )
+    )
+    return result.rowcount > 0
+
+def buff_breakdown(task, buffs, is_first_task_today):
+    """Resumo da recompensa base e dos buffs ativos, guardado junto do lançamento"""
+    breakdown = {
+        'base_xp': task.xp_reward,
+        'base_coins': task.coin_reward,
+        'difficulty': task.difficulty
+    }
+    active = {effect: value for effect, value in buffs._asdict().items() if value}
+    if active:
+        breakdown['buffs'] = active
+        breakdown['first_task_today'] = is_first_task_today
+    return breakdown
+
+def get_daily_rollups(user_id, start, end):
+    """Retorna {dia: DailyRewardRollup} no intervalo [start, end] com uma leitura por chave primária"""
+    rows = DailyRewardRollup.query.filter(
+        DailyRewardRollup.user_id == user_id,
+        DailyRewardRollup.day >= start,
+        DailyRewardRollup.day <= end
+    ).all()
+    return {row.day: row for row in rows}
+
+def daily_series(user_id, end, days):
+    """Série contínua dos últimos `days` dias até `end`, com zero nos dias sem atividade"""
+    start = end - timedelta(days=days - 1)
+    rollups = get_daily_rollups(user_id, start, end)
+
+    series = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        rollup = rollups.get(day)
+        series.append({
+            'day': day,
+            'xp': rollup.xp if rollup else 0,
+            'coins': rollup.coins if rollup else 0,
+            'tasks_completed': rollup.tasks_completed if rollup else 0
+        })
+    return series
+
+def delete_user_history(user_id):
+    """Apaga o ledger e os totais diários do usuário (reset de progresso)"""
+    RewardLedger.query.filter_by(user_id=user_id).delete()
+    DailyRewardRollup.query.filter_by(user_id=user_id).delete()
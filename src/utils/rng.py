@@ -0,0 +1,50 @@
+import hashlib
+import random
+import secrets
+from src.models.user import db, User
+
+# Sementes de 63 bits cabem em um BIGINT com sinal em qualquer banco
+SEED_BITS = 63
+
+_base_seed = None
+
+def configure_rng(seed=None):
+    """Define a semente base (RNG_SEED); com ela, as sequências de cada usuário são reproduzíveis"""
+    global _base_seed
+    _base_seed = seed
+
+def derive_seed(*parts):
+    digest = hashlib.blake2b(':'.join(str(part) for part in parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') >> (64 - SEED_BITS)
+
+def next_stream_index(user_id):
+    """Reserva a próxima sequência do usuário (users.rng_streams) na transação atual
+
+    O contador fica no banco: reinícios e outros workers nunca repetem uma semente.
+    """
+    counter = db.session.execute(
+        db.update(User).where(User.id == user_id).values(
+            rng_streams=db.func.coalesce(User.rng_streams, 0) + 1
+        ).returning(User.rng_streams).execution_options(synchronize_session=False)
+    ).scalar_one()
+    return counter - 1
+
+def new_seed(user_id):
+    """Semente da próxima sequência do usuário
+
+    Sem RNG_SEED a semente é aleatória; com RNG_SEED ela depende só da semente base,
+    do usuário e de quantas sequências ele já abriu.
+    """
+    if _base_seed is None:
+        return secrets.randbits(SEED_BITS)
+    return derive_seed(_base_seed, user_id, next_stream_index(user_id))
+
+def user_stream(user_id, seed=None):
+    """Retorna (semente, random.Random) de uma nova sequência do usuário
+
+    Para reproduzir um sorteio, passe a semente registrada (ex.: PetBoxOpening.rng_seed
+    ou RewardLedger.rng_seed).
+    """
+    if seed is None:
+        seed = new_seed(user_id)
+    return seed, random.Random(seed)
@@ -0,0 +1,86 @@
+from operator import itemgetter
+from src.models.user import db, Task, Achievement
+from src.models.store import StoreItem
+
+class RowSerializer:
+    """Serializador pré-compilado: seleciona colunas fixas e monta os dicts direto das tuplas
+
+    Evita instanciar objetos do ORM e o acesso atributo a atributo do to_dict(). Datas e
+    horários seguem como objetos; o provedor JSON (src/utils/json_provider.py) os escreve
+    em ISO 8601, no mesmo formato do to_dict().
+    """
+
+    def __init__(self, columns):
+        self.columns = tuple(columns)
+        self.fields = tuple(column.key for column in self.columns)
+        self._projections = {}
+
+    def select(self):
+        return db.select(*self.columns)
+
+    def projection(self, fields=None):
+        """Função linhas -> [dict] para um subconjunto de campos, compilada uma vez por subconjunto"""
+        fields = tuple(fields) if fields else self.fields
+        serialize = self._projections.get(fields)
+        if serialize is None:
+            serialize = self._compile(fields)
+            self._projections[fields] = serialize
+        return serialize
+
+    def _compile(self, fields):
+        if fields == self.fields:
+            return lambda rows: [dict(zip(fields, row)) for row in rows]
+
+        indexes = [self.fields.index(name) for name in fields]
+        if len(indexes) == 1:
+            index = indexes[0]
+            name = fields[0]
+            return lambda rows: [{name: row[index]} for row in rows]
+
+        getter = itemgetter(*indexes)
+        return lambda rows: [dict(zip(fields, getter(row))) for row in rows]
+
+    def serialize(self, rows, fields=None):
+        return self.projection(fields)(rows)
+
+# Mesmas chaves e ordem de Task.to_dict()
+TASK_SERIALIZER = RowSerializer([
+    Task.id,
+    Task.user_id,
+    Task.title,
+    Task.description,
+    Task.task_type,
+    Task.difficulty,
+    Task.xp_reward,
+    Task.coin_reward,
+    Task.completed,
+    Task.completed_at,
+    Task.created_at,
+    Task.due_date,
+    Task.streak,
+    Task.last_completed,
+    Task.auto_delete_at,
+])
+
+# Mesmas chaves de StoreItem.to_dict()
+STORE_ITEM_SERIALIZER = RowSerializer([
+    StoreItem.id,
+    StoreItem.name,
+    StoreItem.description,
+    StoreItem.price,
+    StoreItem.icon,
+    StoreItem.is_active,
+    StoreItem.created_at,
+])
+
+# Mesmas chaves de Achievement.to_dict()
+ACHIEVEMENT_SERIALIZER = RowSerializer([
+    Achievement.id,
+    Achievement.name,
+    Achievement.description,
+    Achievement.icon,
+    Achievement.xp_reward,
+    Achievement.coin_reward,
+    Achievement.condition_type,
+    Achievement.condition_value,
+])
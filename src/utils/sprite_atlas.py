@@ -0,0 +1,153 @@
+import hashlib
+import io
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from src.utils.asset_manifest import GENERATED_DIR, GENERATED_URL, MANIFEST_PATH, source_images, read_manifest
+from src.utils.asset_pipeline import ENCODE_OPTIONS, content_hash, save_manifest, supported_formats, write_atomic
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow é opcional: só o comando assets-build precisa dele
+    Image = None
+
+ATLAS_FRAME_SIZES = (128, 256)  # Quadro 1x dos cards e a versão 2x para telas densas
+ATLAS_FORMATS = ('webp', 'png')
+BOX_SPRITES = ('pet_box', 'pet_luxury_box')
+
+# Prefixo dos arquivos (em português) -> raridade do catálogo
+RARITY_PREFIXES = {
+    'pet_comum_': 'common',
+    'pet_raro_': 'rare',
+    'pet_epico_': 'epic',
+    'pet_lendario_': 'legendary',
+}
+
+def atlas_group(name):
+    """Atlas de um sprite: a raridade do pet, 'boxes' para as caixas ou None (fora dos atlas)"""
+    if name in BOX_SPRITES:
+        return 'boxes'
+    for prefix, rarity in RARITY_PREFIXES.items():
+        if name.startswith(prefix):
+            return rarity
+    return None
+
+def atlas_groups(sources):
+    """{grupo: [(nome, caminho)]} a partir das imagens originais, em ordem de nome"""
+    groups = {}
+    for name, path in sorted(sources.items()):
+        group = atlas_group(name)
+        if group is not None:
+            groups.setdefault(group, []).append((name, path))
+    return groups
+
+def atlas_key(sprites, source_hashes, frame_sizes, formats):
+    """Identifica o conteúdo de um atlas: muda se um sprite ou a configuração mudar"""
+    parts = [f'{name}:{source_hashes[name]}' for name, _ in sprites]
+    parts.append(','.join(map(str, frame_sizes)))
+    parts.append(','.join(formats))
+    return hashlib.blake2b('|'.join(parts).encode(), digest_size=8).hexdigest()
+
+def _fit(width, height, size):
+    scale = size / max(width, height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+def build_atlas(group, sprites, key, frame_sizes, formats, output_dir=GENERATED_DIR):
+    """Empacota os sprites do grupo numa grade de quadros quadrados, uma folha por tamanho
+
+    Cada sprite é centralizado no seu quadro mantendo a proporção. Roda num processo do pool.
+    """
+    columns = math.ceil(math.sqrt(len(sprites)))
+    rows = math.ceil(len(sprites) / columns)
+    sheets = [
+        (size, Image.new('RGBA', (columns * size, rows * size)), {})
+        for size in sorted(frame_sizes)
+    ]
+
+    for index, (name, path) in enumerate(sprites):
+        column, row = index % columns, index // columns
+        with Image.open(path) as image:
+            image = image.convert('RGBA')
+            for size, sheet, frames in sheets:
+                width, height = _fit(image.width, image.height, size)
+                x = column * size + (size - width) // 2
+                y = row * size + (size - height) // 2
+                sheet.paste(image.resize((width, height), Image.LANCZOS), (x, y))
+                frames[name] = {'x': x, 'y': y, 'w': width, 'h': height}
+
+    entry_sheets = []
+    for size, sheet, frames in sheets:
+        images = {}
+        for fmt in formats:
+            buffer = io.BytesIO()
+            sheet.save(buffer, **ENCODE_OPTIONS[fmt])
+            data = buffer.getvalue()
+            filename = f'atlas_{group}.{size}.{content_hash(data)}.{fmt}'
+            path = os.path.join(output_dir, filename)
+            if not os.path.exists(path):
+                write_atomic(path, data)
+            images[fmt] = f'{GENERATED_URL}/{filename}'
+        entry_sheets.append({
+            'frame_size': size,
+            'width': sheet.width,
+            'height': sheet.height,
+            'images': images,
+            'frames': frames
+        })
+
+    return {
+        'key': key,
+        'columns': columns,
+        'rows': rows,
+        'names': [name for name, _ in sprites],
+        'sheets': entry_sheets
+    }
+
+def build_atlases(frame_sizes=ATLAS_FRAME_SIZES, formats=ATLAS_FORMATS, force=False, jobs=None,
+                  output_dir=GENERATED_DIR, manifest_path=MANIFEST_PATH):
+    """Gera um atlas por raridade e um para as caixas e grava-os no manifesto
+
+    Atlas cujo conteúdo (sprites e configuração) não mudou são mantidos. Retorna um resumo.
+    """
+    formats = supported_formats(formats)
+    frame_sizes = sorted(set(frame_sizes))
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = read_manifest(manifest_path)
+    previous = manifest.get('atlases', {})
+
+    atlases = {}
+    pending = {}
+    for group, sprites in atlas_groups(source_images()).items():
+        source_hashes = {}
+        for name, path in sprites:
+            with open(path, 'rb') as f:
+                source_hashes[name] = content_hash(f.read())
+        key = atlas_key(sprites, source_hashes, frame_sizes, formats)
+
+        entry = previous.get(group)
+        current = entry is not None and entry.get('key') == key and all(
+            os.path.exists(os.path.join(output_dir, os.path.basename(url)))
+            for sheet in entry['sheets'] for url in sheet['images'].values()
+        )
+        if current and not force:
+            atlases[group] = entry
+        else:
+            pending[group] = (sprites, key)
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            group: pool.submit(build_atlas, group, sprites, key, frame_sizes, formats, output_dir)
+            for group, (sprites, key) in pending.items()
+        }
+        for group, future in futures.items():
+            atlases[group] = future.result()
+
+    manifest['atlases'] = dict(sorted(atlases.items()))
+    removed = save_manifest(manifest, output_dir, manifest_path)
+    return {
+        'atlases': len(atlases),
+        'rebuilt': len(pending),
+        'sprites': sum(len(entry['names']) for entry in atlases.values()),
+        'frame_sizes': frame_sizes,
+        'removed': removed
+    }
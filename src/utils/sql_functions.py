@@ -0,0 +1,17 @@
+from sqlalchemy import Date
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+class day_bucket(FunctionElement):
+    """Dia de um DATETIME, independente do banco: CAST(x AS DATE) ou date(x) no SQLite"""
+    type = Date()
+    name = 'day_bucket'
+    inherit_cache = True
+
+@compiles(day_bucket)
+def _day_bucket_default(element, compiler, **kw):
+    return f'CAST({compiler.process(element.clauses, **kw)} AS DATE)'
+
+@compiles(day_bucket, 'sqlite')
+def _day_bucket_sqlite(element, compiler, **kw):
+    return f'date({compiler.process(element.clauses, **kw)})'
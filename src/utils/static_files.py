@@ -0,0 +1,189 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from collections import namedtuple
+from flask import Response, abort, request
+from werkzeug.wsgi import wrap_file
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele só os .gz são gerados e servidos
+    brotli = None
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'no-cache'  # Sempre revalida (ETag), para arquivos sem hash no nome
+INDEX_MAX_AGE = 60  # index.html: TTL curto, aponta para os bundles com hash
+
+# Extensões precomprimidas, na ordem de preferência, e o Content-Encoding de cada uma
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+COMPRESSIBLE_EXTENSIONS = {'.html', '.js', '.css', '.json', '.svg', '.txt', '.map', '.ico'}
+PRECOMPRESS_MIN_BYTES = 1024
+
+# Pastas de arquivos (bundles, imagens geradas): um caminho inexistente é 404, não a SPA
+ASSET_PREFIXES = ('assets/', 'generated/')
+
+# Nome com hash de conteúdo: Vite (index-Di0aVMBV.js) ou assets-build (pet.256w.e4e5821643.webp)
+_HASHED_NAME = re.compile(r'(-[A-Za-z0-9_-]{8}|\.[0-9a-f]{10})\.[A-Za-z0-9]+$')
+
+# Uma representação de um arquivo: caminho em disco, tamanho e ETag
+Representation = namedtuple('Representation', ('path', 'size', 'etag', 'encoding'))
+StaticFile = namedtuple('StaticFile', ('mimetype', 'mtime', 'cache_control', 'representations'))
+
+def is_hashed(filename):
+    return _HASHED_NAME.search(filename) is not None
+
+def _guess_mimetype(filename):
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    if mimetype.startswith('text/') or mimetype in ('application/javascript', 'image/svg+xml'):
+        mimetype += '; charset=utf-8'
+    return mimetype
+
+def _representation(path, stat, encoding=None):
+    # ETag a partir de tamanho e mtime: calculado uma vez, sem ler o arquivo
+    tag = hashlib.blake2b(f'{path}:{stat.st_size}:{stat.st_mtime_ns}'.encode(), digest_size=8).hexdigest()
+    return Representation(path, stat.st_size, tag, encoding)
+
+class StaticFiles:
+    """Manifesto em memória da pasta estática, montado uma vez na inicialização
+
+    Evita os os.path.exists/stat por requisição do serve() antigo: cada arquivo já tem
+    tamanho, ETag, tipo, política de cache e as versões .br/.gz vizinhas. Arquivos novos
+    só aparecem depois de rebuild(), chamado a cada recarga do manifesto de assets.
+    """
+
+    def __init__(self, root, index_max_age=INDEX_MAX_AGE):
+        self.root = root
+        self.index_max_age = index_max_age
+        self.rebuild()
+
+    def rebuild(self):
+        files = {}
+        if self.root and os.path.isdir(self.root):
+            for directory, _, filenames in os.walk(self.root):
+                names = set(filenames)
+                for filename in filenames:
+                    if any(filename.endswith(suffix) and filename[:-len(suffix)] in names for _, suffix in ENCODINGS):
+                        continue  # Versão precomprimida: entra como representação do original
+                    path = os.path.join(directory, filename)
+                    relative = os.path.relpath(path, self.root).replace(os.sep, '/')
+                    files[relative] = self._describe(path, filename, names)
+
+        self.files = files
+        self.index = self._load_index()
+
+    def _describe(self, path, filename, names):
+        stat = os.stat(path)
+        representations = [_representation(path, stat)]
+        for encoding, suffix in ENCODINGS:
+            if filename + suffix in names:
+                sibling = path + suffix
+                representations.append(_representation(sibling, os.stat(sibling), encoding))
+        return StaticFile(
+            _guess_mimetype(filename),
+            int(stat.st_mtime),
+            IMMUTABLE_CACHE if is_hashed(filename) else REVALIDATE_CACHE,
+            tuple(representations)
+        )
+
+    def _load_index(self):
+        """index.html e suas versões comprimidas em memória: {encoding: (corpo, ETag)}"""
+        entry = self.files.get('index.html')
+        if entry is None:
+            return None
+        bodies = {}
+        for representation in entry.representations:
+            with open(representation.path, 'rb') as f:
+                body = f.read()
+            bodies[representation.encoding] = (body, hashlib.blake2b(body, digest_size=8).hexdigest())
+        return entry, bodies
+
+    def _choose(self, representations, allow_encoded=True):
+        if allow_encoded and len(representations) > 1:
+            accept = request.accept_encodings
+            for representation in representations[1:]:
+                if accept[representation.encoding]:
+                    return representation
+        return representations[0]
+
+    def serve(self, path):
+        """Responde um caminho da SPA: o arquivo, se existir no manifesto, ou index.html"""
+        entry = self.files.get(path) if path else None
+        if entry is None and path.startswith(ASSET_PREFIXES):
+            # Um bundle ou imagem ausente com index.html no lugar quebra o navegador em silêncio
+            abort(404)
+        if entry is None or path == 'index.html':
+            return self.serve_index()
+
+        # Com Range o intervalo se refere ao arquivo original, então não usamos as versões comprimidas
+        representation = self._choose(entry.representations, allow_encoded=request.range is None)
+        response = Response(
+            wrap_file(request.environ, open(representation.path, 'rb')),
+            mimetype=entry.mimetype, direct_passthrough=True
+        )
+        response.content_length = representation.size
+        self._finish(response, entry, representation.encoding, representation.etag)
+        response.headers['Cache-Control'] = entry.cache_control
+        if representation.encoding is None:
+            response.accept_ranges = 'bytes'
+        return response.make_conditional(request.environ, accept_ranges=True, complete_length=representation.size)
+
+    def serve_index(self):
+        if self.index is None:
+            return 'index.html not found', 404
+
+        entry, bodies = self.index
+        encoding = None
+        accept = request.accept_encodings
+        for candidate, _ in ENCODINGS:
+            if candidate in bodies and accept[candidate]:
+                encoding = candidate
+                break
+
+        body, etag = bodies[encoding]
+        response = Response(body, mimetype=entry.mimetype)
+        self._finish(response, entry, encoding, etag)
+        response.headers['Cache-Control'] = f'public, max-age={self.index_max_age}'
+        return response.make_conditional(request.environ)
+
+    def _finish(self, response, entry, encoding, etag):
+        response.set_etag(etag)
+        response.last_modified = entry.mtime
+        if len(entry.representations) > 1:
+            response.vary.add('Accept-Encoding')
+        if encoding:
+            response.content_encoding = encoding
+
+def precompress_static(root, min_bytes=PRECOMPRESS_MIN_BYTES):
+    """Grava .gz (e .br, com brotli instalado) ao lado dos arquivos compressíveis da pasta estática
+
+    Só regrava quando o original é mais novo que o vizinho. Retorna quantos arquivos foram escritos.
+    """
+    written = 0
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if os.path.splitext(filename)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            path = os.path.join(directory, filename)
+            stat = os.stat(path)
+            if stat.st_size < min_bytes:
+                continue
+
+            data = None
+            for encoding, suffix in ENCODINGS:
+                if encoding == 'br' and brotli is None:
+                    continue
+                target = path + suffix
+                if os.path.exists(target) and os.stat(target).st_mtime >= stat.st_mtime:
+                    continue
+                if data is None:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                body = brotli.compress(data, quality=11) if encoding == 'br' else gzip.compress(data, 9, mtime=0)
+                if len(body) >= len(data):
+                    continue
+                with open(target, 'wb') as f:
+                    f.write(body)
+                written += 1
+    return written
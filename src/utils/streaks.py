@@ -0,0 +1,179 @@
+from array import array
+from datetime import datetime, date, timedelta, timezone
+from types import SimpleNamespace
+from src.models.user import db, Task
+from src.utils.daily_reset import get_zone
+
+# Contagem máxima por dia (array 'H' = inteiro sem sinal de 16 bits)
+MAX_DAY_COUNT = 0xFFFF
+
+def local_now(user):
+    """Data e hora atuais no fuso do usuário"""
+    return datetime.now(get_zone(user.timezone))
+
+def local_today(user):
+    """Data atual no fuso do usuário"""
+    return local_now(user).date()
+
+def local_date_of(user, completed_at):
+    """Converte um completed_at (UTC sem fuso) para a data local do usuário"""
+    return completed_at.replace(tzinfo=timezone.utc).astimezone(get_zone(user.timezone)).date()
+
+def advance_streak(last_date, streak, today):
+    """Avança uma sequência de dias: +1 se o último dia foi ontem, 1 se quebrou, igual se foi hoje"""
+    if last_date == today:
+        return streak
+    if last_date == today - timedelta(days=1):
+        return streak + 1
+    return 1
+
+def _load_days(user):
+    days = array('H')
+    days.frombytes(user.activity_days or b'')
+    return days
+
+def _store_days(user, days, origin):
+    user.activity_days = days.tobytes()
+    user.activity_origin = origin
+    _refresh_streaks(user, days, origin)
+
+def _refresh_streaks(user, days, origin):
+    """Recalcula a sequência atual a partir do fim do bitmap de atividade"""
+    last = len(days) - 1
+    while last >= 0 and days[last] == 0:
+        last -= 1
+
+    if last < 0:
+        user.current_streak = 0
+        user.last_activity_date = None
+        return
+
+    first = last
+    while first > 0 and days[first - 1]:
+        first -= 1
+
+    user.current_streak = last - first + 1
+    user.last_activity_date = date.fromordinal(origin + last)
+    user.max_streak = max(user.max_streak or 0, user.current_streak)
+
+def ensure_activity(user):
+    """Reconstrói o histórico de atividade a partir das tarefas completadas, se ainda não existir"""
+    if user.activity_days is not None:
+        return
+
+    completed = db.session.query(Task.completed_at).filter(
+        Task.user_id == user.id,
+        Task.completed == True,
+        Task.completed_at.isnot(None)
+    ).all()
+
+    ordinals = [local_date_of(user, completed_at).toordinal() for (completed_at,) in completed]
+    if not ordinals:
+        user.activity_days = b''
+        user.activity_origin = None
+        user.current_streak = 0
+        return
+
+    origin = min(ordinals)
+    days = array('H', [0]) * (max(ordinals) - origin + 1)
+    for ordinal in ordinals:
+        days[ordinal - origin] = min(days[ordinal - origin] + 1, MAX_DAY_COUNT)
+
+    # Maior sequência de todo o histórico
+    user.max_streak = max(user.max_streak or 0, _longest_run(days))
+
+    _store_days(user, days, origin)
+
+def _longest_run(days):
+    longest = run = 0
+    for count in days:
+        run = run + 1 if count else 0
+        longest = max(longest, run)
+    return longest
+
+def merge_activity(user, activity_days, activity_origin):
+    """Soma outro histórico de atividade (ex.: importado) ao do usuário, dia a dia"""
+    ensure_activity(user)
+    if activity_origin is None or not activity_days:
+        return
+
+    other = array('H')
+    other.frombytes(activity_days)
+    days = _load_days(user)
+    origin = activity_origin if user.activity_origin is None else user.activity_origin
+
+    start = min(origin, activity_origin)
+    end = max(origin + len(days), activity_origin + len(other))
+    merged = array('H', [0]) * (end - start)
+    for offset, source in ((origin - start, days), (activity_origin - start, other)):
+        for index, count in enumerate(source):
+            merged[offset + index] = min(merged[offset + index] + count, MAX_DAY_COUNT)
+
+    user.max_streak = max(user.max_streak or 0, _longest_run(merged))
+    _store_days(user, merged, start)
+
+def record_completion(user, day):
+    """Registra uma tarefa completada no dia (data local)"""
+    ensure_activity(user)
+    days = _load_days(user)
+    origin = user.activity_origin
+    ordinal = day.toordinal()
+
+    if origin is None:
+        origin = ordinal
+    elif ordinal < origin:
+        days = array('H', [0]) * (origin - ordinal) + days
+        origin = ordinal
+
+    index = ordinal - origin
+    if index >= len(days):
+        days.extend([0] * (index - len(days) + 1))
+    days[index] = min(days[index] + 1, MAX_DAY_COUNT)
+
+    _store_days(user, days, origin)
+
+def record_uncompletion(user, day):
+    """Remove uma tarefa completada do dia (data local)"""
+    ensure_activity(user)
+    if user.activity_origin is None:
+        return
+
+    days = _load_days(user)
+    index = day.toordinal() - user.activity_origin
+    if 0 <= index < len(days) and days[index]:
+        days[index] -= 1
+        _store_days(user, days, user.activity_origin)
+
+def activity_preview(user):
+    """Campos de atividade reconstruídos numa cópia solta, sem alterar (nem gravar) o usuário"""
+    preview = SimpleNamespace(
+        id=user.id,
+        timezone=user.timezone,
+        max_streak=user.max_streak,
+        activity_days=None,
+        activity_origin=None,
+        current_streak=0,
+        last_activity_date=user.last_activity_date
+    )
+    ensure_activity(preview)
+    return preview
+
+def get_streak(user, today=None):
+    """Retorna a sequência atual (0 se o último dia ativo foi antes de ontem) e a maior sequência
+
+    Somente leitura: sem histórico gravado, calcula a partir das tarefas sem gravar nada
+    (o histórico é gravado na próxima tarefa completada ou desfeita).
+    """
+    if user.activity_days is None:
+        user = activity_preview(user)
+    today = today or local_today(user)
+
+    current = 0
+    if user.last_activity_date and user.last_activity_date >= today - timedelta(days=1):
+        current = user.current_streak or 0
+
+    return {
+        'streak': current,
+        'longest_streak': user.max_streak or 0,
+        'last_activity': user.last_activity_date.isoformat() if user.last_activity_date else None
+    }
@@ -0,0 +1,261 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from src.utils.asset_manifest import ASSETS_DIR
+from src.utils.asset_pipeline import ENCODE_OPTIONS, supported_formats, write_atomic
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow é opcional: sem ele o endpoint de miniaturas responde 503
+    Image = None
+
+THUMBNAIL_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cache', 'thumbnails')
+THUMBNAIL_DISK_BYTES = 256 * 1024 * 1024
+THUMBNAIL_MEMORY_BYTES = 16 * 1024 * 1024
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_TIMEOUT = 30  # Segundos esperando a codificação antes de desistir
+
+# Larguras arredondadas para múltiplos de 16: limita quantas variantes um cliente pode gerar
+THUMBNAIL_WIDTH_STEP = 16
+MAX_THUMBNAIL_WIDTH = 1024
+THUMBNAIL_FORMATS = ('avif', 'webp', 'png')
+
+class ThumbnailError(ValueError):
+    pass
+
+class ThumbnailNotFound(ThumbnailError):
+    pass
+
+def snap_width(width):
+    width = min(max(width, THUMBNAIL_WIDTH_STEP), MAX_THUMBNAIL_WIDTH)
+    return -(-width // THUMBNAIL_WIDTH_STEP) * THUMBNAIL_WIDTH_STEP
+
+def render_thumbnail(source_path, width, fmt):
+    """Redimensiona e codifica uma imagem; roda num processo do pool"""
+    with Image.open(source_path) as image:
+        image.load()
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        if width < image.width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, **ENCODE_OPTIONS[fmt])
+        return buffer.getvalue()
+
+class ByteLRU:
+    """LRU limitada pelo total de bytes: {chave: valor} com o tamanho de cada valor"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.total = 0
+        self.items = OrderedDict()
+
+    def get(self, key):
+        item = self.items.get(key)
+        if item is not None:
+            self.items.move_to_end(key)
+        return item
+
+    def discard(self, key):
+        item = self.items.pop(key, None)
+        if item is not None:
+            self.total -= item[1]
+
+    def put(self, key, value, size):
+        """Insere e devolve os itens expulsos para caber no limite (o próprio, se for maior que ele)"""
+        if key in self.items:
+            self.total -= self.items.pop(key)[1]
+        self.items[key] = (value, size)
+        self.total += size
+
+        evicted = []
+        while self.total > self.max_bytes:
+            old_key, (old_value, old_size) = self.items.popitem(last=False)
+            self.total -= old_size
+            evicted.append((old_key, old_value))
+        return evicted
+
+class ThumbnailService:
+    """Miniaturas sob demanda das imagens de static/assets
+
+    Dois níveis de cache: memória (poucos MB, as mais pedidas) e disco (LRU limitada por
+    bytes, sobrevive a reinícios). Pedidos simultâneos da mesma variante esperam a mesma
+    codificação, que roda num ProcessPoolExecutor fora das threads das requisições.
+    """
+
+    def __init__(self, cache_dir=THUMBNAIL_CACHE_DIR, disk_bytes=THUMBNAIL_DISK_BYTES,
+                 memory_bytes=THUMBNAIL_MEMORY_BYTES, workers=THUMBNAIL_WORKERS, source_dir=ASSETS_DIR):
+        self.cache_dir = cache_dir
+        self.source_dir = source_dir
+        self.workers = workers
+        self.memory = ByteLRU(memory_bytes)
+        self.disk = ByteLRU(disk_bytes)
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.pool = None
+        self._formats = None
+        self._load_disk_index()
+
+    def _load_disk_index(self):
+        # Reconstrói a LRU do disco na ordem do último acesso (mtime é atualizado nos hits)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, filename)
+            if filename.endswith('.tmp'):
+                os.remove(path)
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, filename, stat.st_size))
+        for _, filename, size in sorted(entries):
+            for key, path in self.disk.put(filename, os.path.join(self.cache_dir, filename), size):
+                os.remove(path)
+
+    def formats(self):
+        if Image is None:
+            raise RuntimeError('Pillow não está instalado (pip install Pillow)')
+        if self._formats is None:
+            self._formats = supported_formats(THUMBNAIL_FORMATS)
+        return self._formats
+
+    def source_path(self, filename):
+        path = os.path.realpath(os.path.join(self.source_dir, filename))
+        if not path.startswith(os.path.realpath(self.source_dir) + os.sep) or not os.path.isfile(path):
+            raise ThumbnailNotFound('Imagem não encontrada')
+        return path
+
+    def cache_key(self, source_path, width, fmt):
+        # O mtime e o tamanho da origem entram na chave: trocar o arquivo gera outra miniatura
+        stat = os.stat(source_path)
+        digest = hashlib.blake2b(
+            f'{source_path}:{stat.st_mtime_ns}:{stat.st_size}:{width}'.encode(), digest_size=12
+        ).hexdigest()
+        return f'{digest}.{fmt}'
+
+    def get(self, filename, width, fmt):
+        """(bytes, chave) da miniatura; a chave serve de ETag"""
+        if fmt not in self.formats():
+            raise ThumbnailError(f'Formato não suportado: {fmt}')
+        source_path = self.source_path(filename)
+        width = snap_width(width)
+        key = self.cache_key(source_path, width, fmt)
+
+        with self.lock:
+            item = self.memory.get(key)
+            if item is not None:
+                return item[0], key
+            future = self.pending.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.pending[key] = future
+
+        if not owner:
+            return future.result(timeout=THUMBNAIL_TIMEOUT), key
+
+        try:
+            data = self._read_disk(key)
+            if data is None:
+                pool = self._executor()
+                try:
+                    data = pool.submit(render_thumbnail, source_path, width, fmt).result(timeout=THUMBNAIL_TIMEOUT)
+                except TimeoutError:  # Subclasse de OSError: não pode virar "imagem inválida"
+                    raise
+                except BrokenProcessPool:
+                    # Um worker morreu (ex.: sem memória); o próximo pedido usa um pool novo
+                    self._reset_executor(pool)
+                    raise
+                except OSError:  # Inclui o UnidentifiedImageError do Pillow
+                    raise ThumbnailError('Não foi possível ler a imagem')
+                self._write_disk(key, data)
+            with self.lock:
+                self.memory.put(key, data, len(data))
+            future.set_result(data)
+            return data, key
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.pending.pop(key, None)
+
+    def _executor(self):
+        with self.lock:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self.pool
+
+    def _reset_executor(self, pool):
+        with self.lock:
+            if self.pool is pool:
+                self.pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _read_disk(self, key):
+        with self.lock:
+            item = self.disk.get(key)
+        if item is None:
+            return None
+        try:
+            with open(item[0], 'rb') as f:
+                data = f.read()
+            os.utime(item[0])
+        except FileNotFoundError:
+            with self.lock:
+                self.disk.discard(key)
+            return None
+        return data
+
+    def _write_disk(self, key, data):
+        path = os.path.join(self.cache_dir, key)
+        write_atomic(path, data)
+        with self.lock:
+            evicted = self.disk.put(key, path, len(data))
+        for _, old_path in evicted:
+            try:
+                os.remove(old_path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        with self.lock:
+            return {
+                'memory_items': len(self.memory.items),
+                'memory_bytes': self.memory.total,
+                'disk_items': len(self.disk.items),
+                'disk_bytes': self.disk.total,
+                'pending': len(self.pending)
+            }
+
+_service = None
+_settings = {}
+_lock = threading.Lock()
+
+def configure_thumbnails(cache_dir=None, disk_bytes=None, memory_bytes=None, workers=None):
+    """Define diretório e limites das miniaturas; o serviço é criado no primeiro uso"""
+    global _service
+    _settings.clear()
+    _settings.update({
+        key: value for key, value in {
+            'cache_dir': cache_dir,
+            'disk_bytes': disk_bytes,
+            'memory_bytes': memory_bytes,
+            'workers': workers,
+        }.items() if value is not None
+    })
+    _service = None
+
+def get_thumbnail_service():
+    global _service
+    service = _service
+    if service is None:
+        with _lock:
+            if _service is None:
+                _service = ThumbnailService(**_settings)
+            service = _service
+    return service
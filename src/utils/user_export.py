@@ -0,0 +1,304 @@
+import base64
+from datetime import datetime, date
+from flask import current_app
+from src.models.user import db, User, Task, UserAchievement
+from src.models.ledger import RewardLedger, DailyRewardRollup
+from src.models.pet import UserPet, PetBoxOpening
+from src.models.store import Purchase
+from src.utils.reward_engine import invalidate_buffs
+from src.utils.user_stats import invalidate_stats
+from src.utils.migrations import user_counter_values
+from src.utils.streaks import ensure_activity, merge_activity
+
+EXPORT_FORMAT_VERSION = 1
+EXPORT_BATCH_SIZE = 500    # Linhas por lote do cursor no servidor (yield_per)
+IMPORT_CHUNK_SIZE = 1000   # Linhas por INSERT em lote na importação
+
+# Seções do histórico, na ordem do arquivo (tarefas antes do ledger, que referencia task_id)
+EXPORT_SECTIONS = (
+    ('tasks', Task),
+    ('reward_ledger', RewardLedger),
+    ('daily_rollups', DailyRewardRollup),
+    ('purchases', Purchase),
+    ('achievements', UserAchievement),
+    ('pets', UserPet),
+    ('box_openings', PetBoxOpening),
+)
+
+# Colunas que não são copiadas na importação (o usuário recebe versões novas)
+USER_SKIP_ON_IMPORT = {'id', 'buff_version', 'stats_version', 'data_version'}
+
+def _encode_value(value):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(value)).decode()
+    return value
+
+def _decoder_for(column):
+    python_type = None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        pass
+
+    if python_type is datetime:
+        return lambda value: datetime.fromisoformat(value) if value is not None else None
+    if python_type is date:
+        return lambda value: date.fromisoformat(value) if value is not None else None
+    if python_type is bytes:
+        return lambda value: base64.b64decode(value) if value is not None else None
+    return None
+
+def row_decoders(model):
+    """{coluna: função} só para as colunas que precisam de conversão a partir do JSON"""
+    decoders = {}
+    for column in model.__table__.columns:
+        decoder = _decoder_for(column)
+        if decoder is not None:
+            decoders[column.key] = decoder
+    return decoders
+
+def export_lines(user_id, batch_size=EXPORT_BATCH_SIZE):
+    """Gera o histórico do usuário como NDJSON, uma linha por registro
+
+    Cada seção é lida com yield_per (cursor no servidor), então a memória usada não
+    depende do tamanho do histórico.
+    """
+    dumps = current_app.json.dumps
+    user = db.session.get(User, user_id)
+
+    yield dumps({
+        'type': 'export',
+        'version': EXPORT_FORMAT_VERSION,
+        'user_id': user_id,
+        'exported_at': datetime.utcnow()
+    }) + '\n'
+
+    columns = [column.key for column in User.__table__.columns]
+    yield dumps({
+        'type': 'user',
+        'data': {key: _encode_value(getattr(user, key)) for key in columns}
+    }) + '\n'
+
+    for section, model in EXPORT_SECTIONS:
+        table = model.__table__
+        keys = [column.key for column in table.columns]
+        order = [column for column in table.primary_key.columns]
+        statement = db.select(*table.columns).where(table.c.user_id == user_id).order_by(*order)
+
+        for partition in db.session.execute(
+            statement.execution_options(yield_per=batch_size)
+        ).partitions():
+            yield ''.join(
+                dumps({
+                    'type': section,
+                    'data': dict(zip(keys, map(_encode_value, row)))
+                }) + '\n'
+                for row in partition
+            )
+
+class HistoryImportError(ValueError):
+    pass
+
+class HistoryImporter:
+    """Importa um arquivo NDJSON de export_lines() em lotes, lendo uma linha por vez
+
+    Sem `user_id` cria um usuário novo a partir da linha 'user'; com `user_id` acrescenta o
+    histórico a um usuário existente. Os ids das linhas são gerados de novo e os task_id do
+    ledger são remapeados; pets, itens da loja e conquistas são referenciados pelo id do
+    catálogo, que precisa ser o mesmo nos dois bancos.
+
+    Ao acrescentar: totais diários do mesmo dia são somados, conquistas e pets que o
+    usuário já tem são ignorados (pets novos chegam desequipados) e, no fim, os contadores
+    são recalculados do histórico e a atividade por dia é somada à do arquivo.
+    """
+
+    def __init__(self, user_id=None, chunk_size=IMPORT_CHUNK_SIZE):
+        self.user_id = user_id
+        self.chunk_size = chunk_size
+        self.models = dict(EXPORT_SECTIONS)
+        self.decoders = {section: row_decoders(model) for section, model in EXPORT_SECTIONS}
+        self.appending = user_id is not None
+        self.task_ids = {}
+        self.counts = {}
+        self._section = None
+        self._pending = []
+        self._imported_user = None
+        self._owned = {}  # Seção -> ids de catálogo que o usuário já tem (modo de acréscimo)
+
+    def run(self, lines):
+        loads = current_app.json.loads
+        for number, line in enumerate(lines, 1):
+            if isinstance(line, bytes):
+                line = line.decode('utf-8')
+            if not line.strip():
+                continue
+            try:
+                record = loads(line)
+                kind = record['type']
+            except (ValueError, KeyError, TypeError):
+                raise HistoryImportError(f'Linha {number}: registro inválido')
+
+            if kind == 'export':
+                if record.get('version') != EXPORT_FORMAT_VERSION:
+                    raise HistoryImportError(f"Versão de exportação não suportada: {record.get('version')}")
+            elif kind == 'user':
+                self._import_user(record['data'])
+            elif kind in self.models:
+                self._add(kind, record['data'])
+            else:
+                raise HistoryImportError(f'Linha {number}: tipo desconhecido {kind!r}')
+
+        self._flush()
+        if self.user_id is None:
+            raise HistoryImportError('Arquivo sem a linha do usuário')
+        if self.appending:
+            self._refresh_user()
+
+        invalidate_stats(self.user_id)
+        invalidate_buffs(self.user_id)
+        return {'user_id': self.user_id, 'imported': self.counts}
+
+    def _import_user(self, data):
+        decoders = row_decoders(User)
+        values = {
+            key: decoders[key](value) if key in decoders else value
+            for key, value in data.items()
+            if key not in USER_SKIP_ON_IMPORT and key in User.__table__.columns
+        }
+        if values.get('timezone') is None:
+            values.pop('timezone', None)  # Exportações antigas sem fuso ficam com o padrão
+        if self.appending:
+            user = db.session.get(User, self.user_id)
+            if user is None:
+                raise HistoryImportError(f'Usuário {self.user_id} não encontrado')
+            # Antes de inserir as tarefas importadas, que entram pela atividade do arquivo
+            ensure_activity(user)
+            self._imported_user = values
+            return
+
+        self.user_id = db.session.execute(
+            db.insert(User).values(**values).returning(User.id)
+        ).scalar_one()
+
+    def _add(self, section, data):
+        if self.user_id is None:
+            raise HistoryImportError('A linha do usuário deve vir antes do histórico')
+        if section != self._section:
+            self._flush()
+            self._section = section
+
+        self._pending.append(data)
+        if len(self._pending) >= self.chunk_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+
+        section, rows = self._section, self._pending
+        self._pending = []
+        model = self.models[section]
+        decoders = self.decoders[section]
+        columns = model.__table__.columns
+        keep_id = section == 'daily_rollups'  # Chave (user_id, day), sem id próprio
+
+        params = []
+        old_task_ids = []
+        for data in rows:
+            values = {
+                key: decoders[key](value) if key in decoders else value
+                for key, value in data.items()
+                if key in columns and (keep_id or key != 'id')
+            }
+            values['user_id'] = self.user_id
+            if section == 'tasks':
+                old_task_ids.append(data.get('id'))
+            elif section == 'reward_ledger' and values.get('task_id') is not None:
+                values['task_id'] = self.task_ids.get(values['task_id'])
+            params.append(values)
+
+        if self.appending and section == 'daily_rollups':
+            self._merge_rollups(params)
+        elif section == 'tasks':
+            new_ids = db.session.execute(
+                db.insert(Task).returning(Task.id, sort_by_parameter_order=True), params
+            ).scalars().all()
+            self.task_ids.update(zip(old_task_ids, new_ids))
+        else:
+            if self.appending and section in ('achievements', 'pets'):
+                params = self._skip_owned(section, params)
+            if params:
+                db.session.execute(db.insert(model), params)
+
+        self.counts[section] = self.counts.get(section, 0) + len(params)
+
+    def _skip_owned(self, section, params):
+        """Descarta conquistas e pets que o usuário já tem (ou que já vieram no arquivo)"""
+        model, key = (UserAchievement, 'achievement_id') if section == 'achievements' else (UserPet, 'pet_id')
+        owned = self._owned.get(section)
+        if owned is None:
+            owned = self._owned[section] = set(db.session.execute(
+                db.select(getattr(model, key)).where(model.user_id == self.user_id)
+            ).scalars())
+
+        kept = []
+        for values in params:
+            if values.get(key) in owned:
+                continue
+            owned.add(values.get(key))
+            if section == 'pets':
+                # Os slots do usuário já estão ocupados pelos pets dele
+                values.update(is_equipped=False, slot_position=None)
+            kept.append(values)
+        return kept
+
+    def _merge_rollups(self, params):
+        """Soma os totais importados aos dias que o usuário já tem e insere os demais"""
+        existing = {
+            row.day: row for row in db.session.execute(
+                db.select(
+                    DailyRewardRollup.day, DailyRewardRollup.xp,
+                    DailyRewardRollup.coins, DailyRewardRollup.tasks_completed
+                ).where(
+                    DailyRewardRollup.user_id == self.user_id,
+                    DailyRewardRollup.day.in_([values['day'] for values in params])
+                )
+            )
+        }
+        updates = []
+        inserts = []
+        for values in params:
+            row = existing.get(values['day'])
+            if row is None:
+                inserts.append(values)
+                continue
+            updates.append({
+                'user_id': self.user_id,
+                'day': row.day,
+                'xp': (row.xp or 0) + (values.get('xp') or 0),
+                'coins': (row.coins or 0) + (values.get('coins') or 0),
+                'tasks_completed': (row.tasks_completed or 0) + (values.get('tasks_completed') or 0)
+            })
+
+        if updates:
+            db.session.execute(db.update(DailyRewardRollup), updates)
+        if inserts:
+            db.session.execute(db.insert(DailyRewardRollup), inserts)
+
+    def _refresh_user(self):
+        """Recalcula os contadores do histórico e soma a atividade diária importada"""
+        user = db.session.get(User, self.user_id)
+        imported = self._imported_user or {}
+        merge_activity(user, imported.get('activity_days'), imported.get('activity_origin'))
+        user.max_streak = max(user.max_streak or 0, imported.get('max_streak') or 0)
+        db.session.flush()
+
+        db.session.execute(
+            db.update(User).where(User.id == self.user_id).values(**user_counter_values())
+            .execution_options(synchronize_session=False)
+        )
+        db.session.expire(user)
+
+def import_history(lines, user_id=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """Importa linhas NDJSON (arquivo, stream ou lista) sem commit; retorna o resumo"""
+    return HistoryImporter(user_id, chunk_size).run(lines)
@@ -0,0 +1,108 @@
+from src.models.user import db, User, Task
+from src.models.pet import UserPet
+from src.utils.achievement_evaluator import get_achievement_total
+from src.utils.load_plans import USER_PET_COLUMNS, user_pet_row_to_dict
+from src.utils.pet_catalog import MAX_PET_LEVEL, RARITIES, get_pet_catalog
+from src.utils.versions import catalog_version
+
+# Cache do processo: user_id -> (chave de versão, estatísticas)
+_task_stats_cache = {}
+_pet_stats_cache = {}
+
+def invalidate_stats(user_ids):
+    """Invalida as estatísticas dos usuários (tarefas, conquistas ou pets alterados)
+
+    `user_ids` pode ser um id, uma lista ou uma subconsulta de ids. Também incrementa
+    data_version, cobrindo os UPDATE/DELETE em lote que não passam pelo flush do ORM.
+    """
+    if isinstance(user_ids, int):
+        _task_stats_cache.pop(user_ids, None)
+        _pet_stats_cache.pop(user_ids, None)
+        user_ids = [user_ids]
+
+    db.session.execute(
+        db.update(User).where(User.id.in_(user_ids)).values(
+            stats_version=db.func.coalesce(User.stats_version, 0) + 1,
+            data_version=db.func.coalesce(User.data_version, 0) + 1
+        ).execution_options(synchronize_session=False)
+    )
+
+def count_tasks(user_id):
+    """Totais de tarefas do usuário em uma única consulta com agregação condicional"""
+    def count_if(condition):
+        return db.func.coalesce(db.func.sum(db.case((condition, 1), else_=0)), 0)
+
+    row = db.session.execute(
+        db.select(
+            db.func.count(Task.id),
+            count_if(Task.completed == True),
+            count_if(Task.task_type == 'habit'),
+            count_if(Task.task_type == 'daily'),
+            count_if(Task.task_type == 'unique'),
+        ).where(Task.user_id == user_id)
+    ).one()
+    return tuple(int(value or 0) for value in row)
+
+def get_task_stats(user):
+    """Estatísticas de /users/<id>/stats, recalculadas quando stats_version ou as conquistas mudam"""
+    key = (user.stats_version or 0, catalog_version('achievements'))
+    cached = _task_stats_cache.get(user.id)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    total_tasks, completed_tasks, habits, dailies, uniques = count_tasks(user.id)
+    stats = {
+        'total_tasks': total_tasks,
+        'completed_tasks': completed_tasks,
+        'completion_rate': (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0,
+        'habits': habits,
+        'dailies': dailies,
+        'uniques': uniques,
+        'achievements_earned': user.achievements_unlocked or 0,
+        'total_achievements': get_achievement_total()
+    }
+    _task_stats_cache[user.id] = (key, stats)
+    return stats
+
+def build_pet_stats(user_id):
+    """Estatísticas de /pets/stats a partir de uma única consulta das colunas de user_pets"""
+    rows = db.session.execute(
+        db.select(*USER_PET_COLUMNS).where(UserPet.user_id == user_id).order_by(UserPet.id)
+    ).all()
+    catalog = get_pet_catalog()
+
+    pets_by_rarity = dict.fromkeys(RARITIES, 0)
+    max_level_pets = 0
+    equipped_pet = None
+    for row in rows:
+        pet = catalog.by_id.get(row.pet_id)
+        if pet is not None and pet.rarity in pets_by_rarity:
+            pets_by_rarity[pet.rarity] += 1
+        if row.level == MAX_PET_LEVEL:
+            max_level_pets += 1
+        if row.is_equipped and equipped_pet is None:
+            equipped_pet = user_pet_row_to_dict(row, catalog)
+
+    return {
+        'total_pets': len(rows),
+        'pets_by_rarity': pets_by_rarity,
+        'max_level_pets': max_level_pets,
+        'equipped_pet': equipped_pet
+    }
+
+def get_pet_stats(user_id):
+    """Estatísticas de pets do usuário; a chave inclui buff_version (equipar/desequipar)"""
+    versions = db.session.execute(
+        db.select(User.stats_version, User.buff_version).where(User.id == user_id)
+    ).one_or_none()
+    if versions is None:
+        return build_pet_stats(user_id)
+
+    key = (versions.stats_version or 0, versions.buff_version or 0, get_pet_catalog().version)
+    cached = _pet_stats_cache.get(user_id)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    stats = build_pet_stats(user_id)
+    _pet_stats_cache[user_id] = (key, stats)
+    return stats
@@ -0,0 +1,146 @@
+import hashlib
+from functools import wraps
+from flask import g, has_request_context, make_response, request
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from src.models.user import db, User, Achievement
+from src.models.pet import Pet
+from src.models.store import StoreItem
+from src.models.version import CatalogVersion
+from src.utils.db_profile import RoutingSession
+from src.utils.asset_manifest import get_asset_manifest
+
+# Modelos de catálogo (globais) -> nome da versão em catalog_versions
+CATALOG_MODELS = {
+    Pet: 'pets',
+    StoreItem: 'store_items',
+    Achievement: 'achievements',
+}
+
+def changed_scopes(session):
+    """Usuários e catálogos afetados pelos objetos que o flush acabou de gravar"""
+    user_ids = set()
+    catalogs = set()
+    for obj in list(session.new) + list(session.deleted) + [
+        obj for obj in session.dirty if session.is_modified(obj, include_collections=False)
+    ]:
+        catalog = CATALOG_MODELS.get(type(obj))
+        if catalog:
+            catalogs.add(catalog)
+        elif isinstance(obj, User):
+            user_ids.add(obj.id)
+        elif getattr(obj, 'user_id', None) is not None:
+            user_ids.add(obj.user_id)
+    return user_ids, catalogs
+
+def bump_user_versions(conn, user_ids):
+    conn.execute(
+        db.update(User).where(User.id.in_(user_ids)).values(
+            data_version=db.func.coalesce(User.data_version, 0) + 1
+        )
+    )
+
+def bump_catalog_versions(conn, catalogs):
+    for name in catalogs:
+        result = conn.execute(
+            db.update(CatalogVersion).where(CatalogVersion.name == name).values(
+                version=CatalogVersion.version + 1
+            )
+        )
+        if result.rowcount:
+            continue
+        try:
+            with conn.begin_nested():
+                conn.execute(db.insert(CatalogVersion).values(name=name, version=1))
+        except IntegrityError:
+            # Outro worker criou a linha ao mesmo tempo
+            conn.execute(
+                db.update(CatalogVersion).where(CatalogVersion.name == name).values(
+                    version=CatalogVersion.version + 1
+                )
+            )
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _bump_versions(session, flush_context):
+    """Toda alteração gravada pelo ORM incrementa a versão do usuário ou do catálogo afetado"""
+    user_ids, catalogs = changed_scopes(session)
+    if not user_ids and not catalogs:
+        return
+    conn = session.connection()
+    if user_ids:
+        bump_user_versions(conn, user_ids)
+    if catalogs:
+        bump_catalog_versions(conn, catalogs)
+
+def read_versions(user_id=None, catalogs=()):
+    """Versão do usuário (None se ele não existir) e dos catálogos, em uma única consulta"""
+    if user_id is None and not catalogs:
+        return None, []
+    columns = []
+    if user_id is not None:
+        columns.append(
+            db.select(db.func.coalesce(User.data_version, 0)).where(User.id == user_id).scalar_subquery()
+        )
+    for name in catalogs:
+        columns.append(
+            db.select(CatalogVersion.version).where(CatalogVersion.name == name).scalar_subquery()
+        )
+    row = db.session.execute(db.select(*columns)).one()
+    user_version = row[0] if user_id is not None else None
+    catalog_versions = [version or 0 for version in row[len(row) - len(catalogs):]]
+    if has_request_context():
+        # Caches de catálogo (ex.: get_pet_catalog) usam estas versões sem consultar de novo
+        g.setdefault('catalog_versions', {}).update(zip(catalogs, catalog_versions))
+    return user_version, catalog_versions
+
+def catalog_version(name):
+    """Versão atual de um catálogo, para caches de processo chaveados por ela
+
+    Uma leitura por requisição (reaproveita a do GET condicional); fora delas lê sempre,
+    então alterações feitas por outros workers ou pela CLI também são vistas.
+    """
+    if has_request_context():
+        versions = g.setdefault('catalog_versions', {})
+        if name not in versions:
+            versions[name] = read_versions(catalogs=(name,))[1][0]
+        return versions[name]
+    return read_versions(catalogs=(name,))[1][0]
+
+def conditional_get(user=False, catalogs=(), assets=False):
+    """GET condicional com ETag forte derivado das versões do usuário e/ou dos catálogos
+
+    A versão é lida antes de montar a resposta: se algo mudar no meio, o ETag fica
+    mais antigo que o conteúdo e o cliente apenas recebe 200 de novo na próxima vez.
+    Com `assets` o ETag também muda a cada `flask assets-build` (respostas com URLs geradas).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            user_id = kwargs['user_id'] if user else None
+            user_version, catalog_versions = read_versions(user_id, catalogs)
+            if user and user_version is None:
+                return view(*args, **kwargs)
+
+            parts = [request.full_path]
+            if user:
+                parts.append(f'u{user_id}.{user_version}')
+            parts.extend(f'{name}.{version}' for name, version in zip(catalogs, catalog_versions))
+            if assets:
+                parts.append(f"a{get_asset_manifest()['digest']}")
+
+            etag = etag_for(parts)
+            # Comparação fraca (RFC 7232): a resposta comprimida leva o mesmo ETag como W/
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+                response.set_etag(etag)
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+            return response
+        return wrapper
+    return decorator
+
+def etag_for(parts):
+    return hashlib.blake2b('|'.join(parts).encode(), digest_size=12).hexdigest()
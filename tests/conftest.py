@@ -0,0 +1,33 @@
+"""Aplicação compartilhada pelos testes que usam o banco no mesmo processo
+
+src/main.py monta a aplicação ao ser importado, com a configuração lida do ambiente;
+por isso a importação acontece uma única vez, com um SQLite temporário e o orçamento
+de consultas em modo 'raise' (uma rota acima de QUERY_BUDGETS falha o teste).
+"""
+import uuid
+
+import pytest
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    database = tmp_path_factory.mktemp('database') / 'app.db'
+    with pytest.MonkeyPatch.context() as env:
+        env.setenv('DATABASE_URL', f'sqlite:///{database}')
+        env.setenv('ROTINA_QUERY_BUDGET_CHECK', 'raise')
+        from src.main import app
+    app.testing = True  # Exceções (ex.: QueryBudgetExceeded) chegam ao teste
+    return app
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def make_user(client):
+    """Cria um usuário com nome único pela API e devolve o id"""
+    def make_user():
+        suffix = uuid.uuid4().hex[:12]
+        response = client.post('/api/users', json={'username': f'teste_{suffix}', 'email': f'{suffix}@teste.io'})
+        assert response.status_code == 201
+        return response.get_json()['id']
+    return make_user
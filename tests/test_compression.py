@@ -0,0 +1,80 @@
+"""Regras de CompressionMiddleware (src/utils/compression.py)"""
+import gzip
+
+import pytest
+from werkzeug.test import Client
+from werkzeug.wrappers import Response
+
+from src.utils.compression import CompressionMetrics, CompressionMiddleware, GzipCodec, negotiate
+
+BIG = b'{"tarefa": "Beber agua"}' * 200   # Acima de COMPRESSION_MIN_BYTES
+SMALL = b'{"ok": true}'
+
+def client_for(app, metrics=None):
+    middleware = CompressionMiddleware(app, codecs=[GzipCodec()], metrics=metrics or CompressionMetrics())
+    return Client(middleware)
+
+def get(app, headers=None, method='GET', metrics=None):
+    headers = {'Accept-Encoding': 'gzip', **(headers or {})}
+    return client_for(app, metrics).open('/', method=method, headers=headers)
+
+def test_compresses_large_json():
+    app = Response(BIG, content_type='application/json', headers={'ETag': '"v1"', 'Vary': 'Origin'})
+    metrics = CompressionMetrics()
+    response = get(app, metrics=metrics)
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data) == BIG
+    assert int(response.headers['Content-Length']) == len(response.data)
+    assert response.headers['ETag'] == 'W/"v1"'
+    assert response.headers['Vary'] == 'Origin, Accept-Encoding'
+    totals = metrics.snapshot()['<sem rota>']['encodings']['gzip']
+    assert totals['responses'] == 1 and totals['bytes_in'] == len(BIG)
+
+def test_compresses_streams_without_content_length():
+    chunks = [b'{"linha": %d}\n' % n * 20 for n in range(200)]
+    app = Response(iter(chunks), content_type='application/x-ndjson')
+    response = get(app)
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert gzip.decompress(response.data) == b''.join(chunks)
+
+@pytest.mark.parametrize('name, wsgi_app, headers, method', [
+    ('sem Accept-Encoding', Response(BIG, content_type='application/json'), {'Accept-Encoding': ''}, 'GET'),
+    ('gzip recusado', Response(BIG, content_type='application/json'), {'Accept-Encoding': 'gzip;q=0'}, 'GET'),
+    ('HEAD', Response(BIG, content_type='application/json'), {}, 'HEAD'),
+    ('Range', Response(BIG, content_type='application/json'), {'Range': 'bytes=0-9'}, 'GET'),
+    ('tipo não comprimível', Response(BIG, content_type='image/png'), {}, 'GET'),
+    ('já codificado', Response(BIG, content_type='application/json', headers={'Content-Encoding': 'br'}), {}, 'GET'),
+    ('no-transform', Response(BIG, content_type='application/json', headers={'Cache-Control': 'no-transform'}), {}, 'GET'),
+    ('erro', Response(BIG, status=404, content_type='application/json'), {}, 'GET'),
+    ('206', Response(BIG, status=206, content_type='application/json'), {}, 'GET'),
+])
+def test_passes_through_unchanged(name, wsgi_app, headers, method):
+    response = get(wsgi_app, headers, method)
+    assert response.headers.get('Content-Encoding') == wsgi_app.headers.get('Content-Encoding'), name
+    if method != 'HEAD':
+        assert response.data == BIG, name
+
+def test_small_responses_pass_through_and_are_counted():
+    metrics = CompressionMetrics()
+    response = get(Response(SMALL, content_type='application/json'), metrics=metrics)
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == SMALL
+    assert metrics.snapshot()['<sem rota>']['below_threshold'] == 1
+
+def test_small_streams_pass_through():
+    response = get(Response(iter([SMALL, SMALL]), content_type='application/json'))
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == SMALL * 2
+
+@pytest.mark.parametrize('accept, expected', [
+    ('gzip, br', 'gzip'),
+    ('identity', None),
+    ('*', 'gzip'),
+    ('', None),
+])
+def test_negotiate(accept, expected):
+    codec = negotiate(accept, [GzipCodec()])
+    assert (codec.name if codec else None) == expected
@@ -0,0 +1,36 @@
+"""Curva de níveis por XP acumulado (src/utils/level_curve.py)"""
+import pytest
+
+from src.utils.level_curve import LevelCurve, avatar_stage_for_level, title_for_level
+
+@pytest.fixture
+def curve():
+    # Níveis 1→2: 100 XP, 2→3: 110 XP, 3→4: 120 XP (acumulado 0, 100, 210, 330)
+    return LevelCurve.arithmetic(base=100, step=10, levels=3)
+
+@pytest.mark.parametrize('xp, level', [
+    (-5, 1), (0, 1), (99, 1), (100, 2), (209, 2), (210, 3), (329, 3), (330, 4), (10**9, 4),
+])
+def test_level_boundaries(curve, xp, level):
+    assert curve.level_for_xp(xp) == level
+
+def test_progress_inside_a_level(curve):
+    assert curve.progress(100) == {'level': 2, 'xp_into_level': 0, 'xp_for_level': 110, 'xp_to_next': 110}
+    assert curve.progress(209) == {'level': 2, 'xp_into_level': 109, 'xp_for_level': 110, 'xp_to_next': 1}
+
+def test_progress_at_max_level(curve):
+    assert curve.max_level == 4
+    assert curve.progress(400) == {'level': 4, 'xp_into_level': 70, 'xp_for_level': None, 'xp_to_next': None}
+
+def test_from_config():
+    assert LevelCurve.from_config(None).cumulative == LevelCurve.arithmetic().cumulative
+    assert LevelCurve.from_config({'xp_per_level': [10, 20]}).cumulative == [0, 10, 30]
+    assert LevelCurve.from_config({'base': 50, 'step': 0, 'levels': 2}).cumulative == [0, 50, 100]
+
+@pytest.mark.parametrize('level, stage', [(0, 1), (1, 1), (4, 1), (5, 2), (49, 7), (50, 8), (99, 8)])
+def test_avatar_stage_boundaries(level, stage):
+    assert avatar_stage_for_level(level) == stage
+
+@pytest.mark.parametrize('level, title', [(0, 'Novato'), (4, 'Novato'), (5, 'Aprendiz'), (50, 'Lenda Suprema')])
+def test_title_boundaries(level, title):
+    assert title_for_level(level) == title
@@ -0,0 +1,77 @@
+"""Paginação por cursor (src/utils/pagination.py) nas rotas de lista"""
+from datetime import datetime
+
+import pytest
+
+from src.models.user import db, Task, User
+from src.utils.pagination import PageError, decode_cursor, encode_cursor
+
+@pytest.mark.parametrize('timestamp, row_id', [
+    (datetime(2024, 3, 10, 23, 59, 59, 999999), 42),
+    (datetime(2024, 1, 1), 1),
+    (None, 7),
+])
+def test_cursor_round_trip(timestamp, row_id):
+    cursor = encode_cursor(timestamp, row_id)
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == (timestamp, row_id)
+
+@pytest.mark.parametrize('cursor', ['', 'nao-e-base64!', encode_cursor(None, 1)[:-3], 'WyJ4IiwgMV0'])
+def test_invalid_cursor(cursor):
+    with pytest.raises(PageError):
+        decode_cursor(cursor)
+
+def newest_first(items, time_key):
+    """Ordem do keyset_page: mais recentes primeiro, empates pelo maior id"""
+    return [item['id'] for item in sorted(items, key=lambda item: (item[time_key], item['id']), reverse=True)]
+
+def fetch_all_pages(client, url, **params):
+    items, cursor, pages = [], None, 0
+    while True:
+        response = client.get(url, query_string={**params, **({'cursor': cursor} if cursor else {})})
+        assert response.status_code == 200
+        items.extend(response.get_json())
+        pages += 1
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            return items, pages
+
+def test_task_pages_match_the_full_list(app, client, make_user):
+    user_id = make_user()
+    task_ids = [
+        client.post(f'/api/users/{user_id}/tasks', json={'title': f'Tarefa {n}', 'task_type': 'habit'}).get_json()['id']
+        for n in range(7)
+    ]
+    # Empates no created_at são desfeitos pelo id
+    with app.app_context():
+        db.session.execute(db.update(Task).where(Task.id.in_(task_ids[2:5])).values(created_at=datetime(2024, 3, 10)))
+        db.session.commit()
+
+    full = client.get(f'/api/users/{user_id}/tasks').get_json()
+    paged, pages = fetch_all_pages(client, f'/api/users/{user_id}/tasks', limit=2)
+    assert pages == 4
+    assert [task['id'] for task in paged] == newest_first(full, 'created_at')
+    assert sorted(task['id'] for task in paged) == sorted(task_ids)
+
+    titles = {task['id']: task['title'] for task in full}
+    projected, _ = fetch_all_pages(client, f'/api/users/{user_id}/tasks', limit=3, fields='id,title')
+    assert projected == [{'id': id_, 'title': titles[id_]} for id_ in newest_first(full, 'created_at')]
+
+def test_purchase_pages_match_the_full_list(app, client, make_user):
+    user_id = make_user()
+    with app.app_context():
+        db.session.get(User, user_id).coins = 10_000
+        db.session.commit()
+    item_id = client.post('/api/store/items', json={'name': 'Poção', 'price': 5}).get_json()['id']
+    for _ in range(5):
+        assert client.post(f'/api/users/{user_id}/purchase', json={'item_id': item_id}).status_code == 200
+
+    full = client.get(f'/api/users/{user_id}/purchases').get_json()
+    paged, pages = fetch_all_pages(client, f'/api/users/{user_id}/purchases', limit=2)
+    assert pages == 3
+    assert [purchase['id'] for purchase in paged] == newest_first(full, 'purchased_at')
+
+@pytest.mark.parametrize('params', [{'limit': 0}, {'limit': 'dez'}, {'cursor': 'lixo'}, {'fields': 'id,senha'}])
+def test_invalid_page_parameters_are_rejected(client, make_user, params):
+    user_id = make_user()
+    assert client.get(f'/api/users/{user_id}/tasks', query_string=params).status_code == 400
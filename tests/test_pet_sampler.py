@@ -0,0 +1,89 @@
+"""Tabelas de alias das caixas (src/utils/pet_sampler.py)"""
+import random
+from collections import Counter
+
+import pytest
+
+from src.utils.pet_catalog import get_pet_catalog
+from src.utils.pet_sampler import BOX_PROBABILITIES, AliasTable, build_box_sampler, pet_weights
+
+def exact_distribution(table, key=lambda item: item):
+    """Probabilidade de cada item (por `key`) a partir de prob/alias, sem sortear"""
+    n = len(table)
+    result = Counter()
+    for i in range(n):
+        result[key(table.items[i])] += table.prob[i] / n
+        result[key(table.items[table.alias[i]])] += (1 - table.prob[i]) / n
+    return result
+
+def pet_id(pet):
+    return pet.id
+
+@pytest.mark.parametrize('weights', [
+    [1, 1, 1, 1],
+    [0.6, 0.25, 0.125, 0.025],
+    [5, 0, 3, 2],
+    [1e-6, 1, 1000],
+])
+def test_alias_table_matches_weights(weights):
+    items = [f'item{i}' for i in range(len(weights))]
+    distribution = exact_distribution(AliasTable(items, weights))
+    total = sum(weights)
+    for item, weight in zip(items, weights):
+        assert distribution[item] == pytest.approx(weight / total, abs=1e-12)
+
+def test_alias_table_draws_follow_weights():
+    table = AliasTable('abc', [0.7, 0.2, 0.1])
+    rng = random.Random(1234)
+    draws = Counter(table.draw(rng) for _ in range(20000))
+    assert draws['a'] / 20000 == pytest.approx(0.7, abs=0.02)
+    assert draws['b'] / 20000 == pytest.approx(0.2, abs=0.02)
+    assert draws['c'] / 20000 == pytest.approx(0.1, abs=0.02)
+
+def test_alias_table_never_draws_zero_weight():
+    table = AliasTable('abc', [0, 1, 0])
+    rng = random.Random(7)
+    assert {table.draw(rng) for _ in range(1000)} == {'b'}
+
+@pytest.mark.parametrize('weights', [[], [0, 0]])
+def test_alias_table_needs_a_positive_weight(weights):
+    with pytest.raises(ValueError):
+        AliasTable(['x'] * len(weights), weights)
+
+def test_box_sampler_exclusions_redistribute_rarity(app):
+    with app.app_context():
+        catalog = get_pet_catalog()
+        legendary = [pet.id for pet in catalog.by_rarity['legendary']]
+        sampler = build_box_sampler('basic', frozenset(legendary))
+        distribution = exact_distribution(sampler, pet_id)
+
+        assert not any(pet.id in legendary for pet in sampler.items)
+        assert sum(distribution.values()) == pytest.approx(1.0)
+        # As demais raridades mantêm a proporção entre si
+        by_rarity = Counter()
+        for id_, probability in distribution.items():
+            by_rarity[catalog.by_id[id_].rarity] += probability
+        remaining = {rarity: p for rarity, p in BOX_PROBABILITIES['basic'].items() if rarity != 'legendary'}
+        for rarity, probability in remaining.items():
+            assert by_rarity[rarity] == pytest.approx(probability / sum(remaining.values()))
+
+def test_box_sampler_pets_of_a_rarity_share_its_weight(app):
+    with app.app_context():
+        pets = get_pet_catalog().pets
+        weights = list(zip(pets, pet_weights('luxury', pets)))
+        for rarity, probability in BOX_PROBABILITIES['luxury'].items():
+            assert sum(weight for pet, weight in weights if pet.rarity == rarity) == pytest.approx(probability)
+
+def test_box_sampler_falls_back_to_equal_chances_and_none(app):
+    with app.app_context():
+        catalog = get_pet_catalog()
+        commons = {pet.id for pet in catalog.by_rarity['common']}
+        others = frozenset(pet.id for pet in catalog.pets if pet.id not in commons)
+
+        # A caixa de luxo não sorteia comuns; se só eles restam, saem com chances iguais
+        sampler = build_box_sampler('luxury', others)
+        distribution = exact_distribution(sampler, pet_id)
+        assert set(distribution) == commons
+        assert all(p == pytest.approx(1 / len(commons)) for p in distribution.values())
+
+        assert build_box_sampler('luxury', frozenset(pet.id for pet in catalog.pets)) is None
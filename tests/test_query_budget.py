@@ -0,0 +1,82 @@
+"""Orçamento de consultas (src/utils/query_budget.py) das rotas de QUERY_BUDGETS
+
+A aplicação dos testes roda com QUERY_BUDGET_CHECK='raise' (ver conftest.py): uma rota
+que passa do orçamento lança QueryBudgetExceeded. Além disso, um usuário com muitos
+registros precisa do mesmo número de consultas que um com um só (sem N+1).
+"""
+import pytest
+from flask import url_for
+
+from src.models.user import db, User, Achievement, UserAchievement
+from src.utils.query_budget import QUERY_BUDGETS
+
+@pytest.fixture(scope='module')
+def store_item_ids(app):
+    client = app.test_client()
+    return [
+        client.post('/api/store/items', json={'name': f'Item {n}', 'price': 10 + n}).get_json()['id']
+        for n in range(6)
+    ]
+
+def seed_user(client, app, user_id, store_item_ids, count):
+    """Compras, pets (alguns equipados), aberturas de caixa, conquistas e tarefas"""
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        user.coins = 1_000_000
+        achievement_ids = db.session.execute(
+            db.select(Achievement.id).order_by(Achievement.id).limit(count)
+        ).scalars().all()
+        db.session.add_all(UserAchievement(user_id=user_id, achievement_id=id_) for id_ in achievement_ids)
+        user.achievements_unlocked = len(achievement_ids)
+        db.session.commit()
+
+    for item_id in store_item_ids[:count]:
+        assert client.post(f'/api/users/{user_id}/purchase', json={'item_id': item_id, 'quantity': 2}).status_code == 200
+
+    response = client.post(f'/api/users/{user_id}/pets/open-boxes', json={'box_type': 'luxury', 'count': count})
+    assert response.status_code == 200
+
+    pets = client.get(f'/api/users/{user_id}/pets').get_json()
+    slots = min(count, 3)
+    for _ in range(slots - 1):
+        assert client.post(f'/api/users/{user_id}/pets/buy-slot').status_code == 200
+    for slot, pet in enumerate(pets[:slots], start=1):
+        assert client.post(f"/api/users/{user_id}/pets/{pet['id']}/equip-slot/{slot}").status_code == 200
+
+    for n in range(count):
+        task = client.post(f'/api/users/{user_id}/tasks', json={'title': f'Tarefa {n}', 'task_type': 'habit'})
+        assert task.status_code == 201
+        if n % 2 == 0:
+            assert client.post(f"/api/tasks/{task.get_json()['id']}/complete").status_code == 200
+
+def query_counts(client, app, user_id):
+    """X-Query-Count de cada rota de QUERY_BUDGETS para o usuário (primeira leitura)"""
+    with app.test_request_context():
+        urls = {endpoint: url_for(endpoint, user_id=user_id) for endpoint in QUERY_BUDGETS}
+
+    counts = {}
+    for endpoint, url in urls.items():
+        response = client.get(url)
+        assert response.status_code == 200, f'{endpoint}: {response.status_code}'
+        counts[endpoint] = int(response.headers['X-Query-Count'])
+    return counts
+
+def test_routes_stay_within_budget_without_n_plus_one(app, client, make_user, store_item_ids):
+    # Aquece os caches do processo (catálogos, índice de conquistas) com outro usuário
+    warm_up = make_user()
+    seed_user(client, app, warm_up, store_item_ids, 1)
+    query_counts(client, app, warm_up)
+
+    small, large = make_user(), make_user()
+    seed_user(client, app, small, store_item_ids, 1)
+    seed_user(client, app, large, store_item_ids, 6)
+
+    small_counts = query_counts(client, app, small)
+    large_counts = query_counts(client, app, large)
+
+    for endpoint, budget in QUERY_BUDGETS.items():
+        assert large_counts[endpoint] <= budget, endpoint
+        assert large_counts[endpoint] == small_counts[endpoint], (
+            f'{endpoint}: {small_counts[endpoint]} consultas com 1 registro, '
+            f'{large_counts[endpoint]} com 6 (N+1?)'
+        )
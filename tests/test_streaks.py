@@ -0,0 +1,120 @@
+"""Sequência de dias pelo histórico de atividade por dia (src/utils/streaks.py)"""
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils.streaks import get_streak, local_date_of, merge_activity, record_completion, record_uncompletion
+
+DAY = date(2024, 3, 10)
+
+def new_user(timezone='America/Sao_Paulo'):
+    # activity_days vazio: o histórico já existe (sem tarefas), então não há consulta ao banco
+    return SimpleNamespace(
+        id=1, timezone=timezone, activity_days=b'', activity_origin=None,
+        current_streak=0, max_streak=0, last_activity_date=None
+    )
+
+def complete_on(user, *days):
+    for day in days:
+        record_completion(user, day)
+
+def test_consecutive_days_increment_and_same_day_does_not():
+    user = new_user()
+    complete_on(user, DAY, DAY, DAY + timedelta(days=1), DAY + timedelta(days=2))
+    assert user.current_streak == 3
+    assert user.max_streak == 3
+    assert user.last_activity_date == DAY + timedelta(days=2)
+
+def test_gap_restarts_the_streak_but_keeps_the_longest():
+    user = new_user()
+    complete_on(user, DAY, DAY + timedelta(days=1), DAY + timedelta(days=3))
+    assert user.current_streak == 1
+    assert user.max_streak == 2
+
+def test_completing_an_earlier_day_extends_the_history_backwards():
+    user = new_user()
+    complete_on(user, DAY, DAY - timedelta(days=1))
+    assert user.activity_origin == (DAY - timedelta(days=1)).toordinal()
+    assert user.current_streak == 2
+    assert user.last_activity_date == DAY
+
+def test_uncompleting_the_last_task_of_a_day_decrements():
+    user = new_user()
+    complete_on(user, DAY, DAY + timedelta(days=1), DAY + timedelta(days=1))
+
+    record_uncompletion(user, DAY + timedelta(days=1))
+    assert user.current_streak == 2  # Ainda resta uma tarefa no dia
+
+    record_uncompletion(user, DAY + timedelta(days=1))
+    assert user.current_streak == 1
+    assert user.last_activity_date == DAY
+
+    record_uncompletion(user, DAY)
+    assert user.current_streak == 0
+    assert user.last_activity_date is None
+    assert user.max_streak == 2  # A maior sequência não é desfeita
+
+def test_uncompleting_a_middle_day_splits_the_streak():
+    user = new_user()
+    complete_on(user, DAY, DAY + timedelta(days=1), DAY + timedelta(days=2))
+    record_uncompletion(user, DAY + timedelta(days=1))
+    assert user.current_streak == 1
+
+def test_uncompleting_a_day_without_activity_is_ignored():
+    user = new_user()
+    complete_on(user, DAY)
+    record_uncompletion(user, DAY - timedelta(days=5))
+    record_uncompletion(user, DAY + timedelta(days=5))
+    assert user.current_streak == 1
+    assert user.last_activity_date == DAY
+
+@pytest.mark.parametrize('today, streak', [
+    (DAY + timedelta(days=1), 2),  # Último dia ativo foi hoje
+    (DAY + timedelta(days=2), 2),  # Ontem: a sequência ainda vale
+    (DAY + timedelta(days=3), 0),  # Anteontem: quebrou
+])
+def test_get_streak_counts_until_the_day_after(today, streak):
+    user = new_user()
+    complete_on(user, DAY, DAY + timedelta(days=1))
+    assert get_streak(user, today=today) == {
+        'streak': streak, 'longest_streak': 2, 'last_activity': (DAY + timedelta(days=1)).isoformat()
+    }
+
+@pytest.mark.parametrize('timezone, local_day', [
+    ('America/Sao_Paulo', date(2024, 3, 9)),   # UTC-3: ainda é dia 9
+    ('UTC', date(2024, 3, 10)),
+    ('Asia/Tokyo', date(2024, 3, 10)),          # UTC+9
+    ('Pacific/Kiritimati', date(2024, 3, 10)),  # UTC+14
+])
+def test_completion_day_follows_the_user_timezone(timezone, local_day):
+    completed_at = datetime(2024, 3, 10, 2, 30)  # UTC sem fuso, como gravado em Task.completed_at
+    assert local_date_of(new_user(timezone), completed_at) == local_day
+
+def test_streak_across_local_midnight():
+    # 23:30 e 00:30 em São Paulo: dois dias locais seguidos, embora no mesmo dia UTC
+    user = new_user('America/Sao_Paulo')
+    for completed_at in (datetime(2024, 3, 10, 2, 30), datetime(2024, 3, 10, 3, 30)):
+        record_completion(user, local_date_of(user, completed_at))
+    assert user.current_streak == 2
+
+    # As mesmas horas em UTC caem no mesmo dia: sem aumento
+    utc_user = new_user('UTC')
+    for completed_at in (datetime(2024, 3, 10, 2, 30), datetime(2024, 3, 10, 3, 30)):
+        record_completion(utc_user, local_date_of(utc_user, completed_at))
+    assert utc_user.current_streak == 1
+
+def test_merge_activity_sums_overlapping_histories():
+    user = new_user()
+    complete_on(user, DAY, DAY + timedelta(days=1))
+    other = new_user()
+    complete_on(other, DAY + timedelta(days=1), DAY + timedelta(days=2), DAY + timedelta(days=3))
+
+    merge_activity(user, other.activity_days, other.activity_origin)
+    assert user.current_streak == 4
+    assert user.max_streak == 4
+    assert user.last_activity_date == DAY + timedelta(days=3)
+
+    # O dia em comum tem duas tarefas: desfazer uma mantém a sequência
+    record_uncompletion(user, DAY + timedelta(days=1))
+    assert user.current_streak == 4
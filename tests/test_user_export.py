@@ -0,0 +1,99 @@
+"""Exportação e importação do histórico (src/utils/user_export.py)"""
+from datetime import datetime, timedelta
+
+from src.models.ledger import DailyRewardRollup
+from src.models.pet import Pet, UserPet
+from src.models.user import db, Task, User, UserAchievement
+
+def complete_tasks(client, user_id, count):
+    for n in range(count):
+        task = client.post(f'/api/users/{user_id}/tasks', json={'title': f'Tarefa {n}', 'task_type': 'habit'})
+        assert client.post(f"/api/tasks/{task.get_json()['id']}/complete").status_code == 200
+
+def give_pets(user_id, pet_ids, equipped=()):
+    for slot, pet_id in enumerate(pet_ids, start=1):
+        is_equipped = pet_id in equipped
+        db.session.add(UserPet(
+            user_id=user_id, pet_id=pet_id, is_equipped=is_equipped, slot_position=slot if is_equipped else None
+        ))
+
+def rollups(user_id):
+    return {
+        row.day: (row.xp, row.coins, row.tasks_completed)
+        for row in DailyRewardRollup.query.filter_by(user_id=user_id)
+    }
+
+def test_export_import_round_trip(client, make_user):
+    user_id = make_user()
+    complete_tasks(client, user_id, 2)
+    exported = client.get(f'/api/users/{user_id}/export').get_data(as_text=True)
+    exported = exported.replace('teste_', 'copia_').replace('@teste.io', '@copia.io')
+
+    response = client.post('/api/users/import', data=exported)
+    assert response.status_code == 201
+    summary = response.get_json()
+    assert summary['imported']['tasks'] == 2
+
+    original = client.get(f'/api/users/{user_id}/stats').get_json()['stats']
+    copy = client.get(f"/api/users/{summary['user_id']}/stats").get_json()['stats']
+    assert copy == original
+
+def test_append_import_merges_instead_of_duplicating(app, client, make_user):
+    source, target = make_user(), make_user()
+    complete_tasks(client, source, 2)
+    complete_tasks(client, target, 1)
+
+    yesterday = datetime.utcnow().date() - timedelta(days=1)
+    with app.app_context():
+        pet_ids = db.session.execute(db.select(Pet.id).order_by(Pet.id).limit(3)).scalars().all()
+        give_pets(source, pet_ids[:2], equipped=pet_ids[:1])   # O primeiro pet os dois já têm
+        give_pets(target, [pet_ids[0], pet_ids[2]], equipped=[pet_ids[2]])
+        # Um dia só do arquivo importado
+        db.session.add(DailyRewardRollup(user_id=source, day=yesterday, xp=7, coins=3, tasks_completed=1))
+        db.session.commit()
+
+        source_rollups, target_rollups = rollups(source), rollups(target)
+        target_streak = db.session.get(User, target).current_streak
+
+    exported = client.get(f'/api/users/{source}/export').get_data(as_text=True)
+    response = client.post(f'/api/users/import?user_id={target}', data=exported)
+    assert response.status_code == 201
+    assert response.get_json()['user_id'] == target
+
+    with app.app_context():
+        user = db.session.get(User, target)
+
+        # Totais diários do mesmo dia somados; o dia novo entra como estava
+        merged = rollups(target)
+        assert set(merged) == set(source_rollups) | set(target_rollups)
+        for day, values in merged.items():
+            expected = [0, 0, 0]
+            for totals in (source_rollups.get(day), target_rollups.get(day)):
+                for i, value in enumerate(totals or (0, 0, 0)):
+                    expected[i] += value
+            assert values == tuple(expected), day
+
+        # A primeira tarefa desbloqueou as mesmas conquistas nos dois usuários: nada duplicado
+        achievement_ids = db.session.execute(
+            db.select(UserAchievement.achievement_id).where(UserAchievement.user_id == target)
+        ).scalars().all()
+        assert len(achievement_ids) == len(set(achievement_ids))
+
+        # Pets: um por pet_id; os novos chegam desequipados e o equipado do usuário continua
+        pets = {pet.pet_id: pet for pet in UserPet.query.filter_by(user_id=target)}
+        assert sorted(pets) == sorted(pet_ids)
+        assert not pets[pet_ids[1]].is_equipped
+        assert pets[pet_ids[2]].is_equipped and pets[pet_ids[2]].slot_position == 2
+
+        # Contadores recalculados do histórico
+        completed = db.session.execute(
+            db.select(db.func.count(Task.id)).where(Task.user_id == target, Task.completed == True)
+        ).scalar()
+        assert completed == 3
+        assert user.tasks_completed == 3
+        assert user.achievements_unlocked == len(achievement_ids)
+        assert user.current_streak >= target_streak
+
+    stats = client.get(f'/api/users/{target}/stats').get_json()['stats']
+    assert stats['completed_tasks'] == 3
+    assert stats['achievements_earned'] == len(achievement_ids)